@@ -0,0 +1,64 @@
+"""Add recurring activity series
+
+Revision ID: 0c7a3e5b9d21
+Revises: f2b6e91d4c08
+Create Date: 2026-10-19 19:34:11.482905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7a3e5b9d21'
+down_revision: Union[str, None] = 'f2b6e91d4c08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('activity_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('location', sa.String(), nullable=True),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('max_participants', sa.Integer(), nullable=True),
+    sa.Column('is_online', sa.Boolean(), nullable=True),
+    sa.Column('category', sa.String(), nullable=True),
+    sa.Column('dtstart', sa.DateTime(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=False),
+    sa.Column('rrule', sa.String(), nullable=False),
+    sa.Column('until', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('organizer_id', sa.Integer(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['organizer_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_activity_series_id'), 'activity_series', ['id'], unique=False)
+    op.create_index(op.f('ix_activity_series_until'), 'activity_series', ['until'], unique=False)
+    op.create_index(op.f('ix_activity_series_deleted_at'), 'activity_series', ['deleted_at'], unique=False)
+    op.add_column('activities', sa.Column('series_id', sa.Integer(), nullable=True))
+    op.add_column('activities', sa.Column('occurrence_start', sa.DateTime(), nullable=True))
+    op.create_foreign_key(
+        'activities_series_id_fkey', 'activities', 'activity_series', ['series_id'], ['id']
+    )
+    op.create_unique_constraint(
+        'uq_activities_series_occurrence', 'activities', ['series_id', 'occurrence_start']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_activities_series_occurrence', 'activities', type_='unique')
+    op.drop_constraint('activities_series_id_fkey', 'activities', type_='foreignkey')
+    op.drop_column('activities', 'occurrence_start')
+    op.drop_column('activities', 'series_id')
+    op.drop_index(op.f('ix_activity_series_deleted_at'), table_name='activity_series')
+    op.drop_index(op.f('ix_activity_series_until'), table_name='activity_series')
+    op.drop_index(op.f('ix_activity_series_id'), table_name='activity_series')
+    op.drop_table('activity_series')
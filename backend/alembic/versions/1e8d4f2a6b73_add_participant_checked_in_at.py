@@ -0,0 +1,26 @@
+"""Add participant check-in time
+
+Revision ID: 1e8d4f2a6b73
+Revises: 0c7a3e5b9d21
+Create Date: 2026-10-19 20:08:45.127093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e8d4f2a6b73'
+down_revision: Union[str, None] = '0c7a3e5b9d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activity_participants', sa.Column('checked_in_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('activity_participants', 'checked_in_at')
@@ -0,0 +1,85 @@
+"""Add guide full-text search vector
+
+Revision ID: 2a5f9c3e7d14
+Revises: 1e8d4f2a6b73
+Create Date: 2026-10-19 20:41:26.733810
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.utils.text_search import to_document
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a5f9c3e7d14'
+down_revision: Union[str, None] = '1e8d4f2a6b73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('guides', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    op.create_index(
+        'ix_guides_search_vector', 'guides', ['search_vector'], unique=False, postgresql_using='gin'
+    )
+    # 分词在应用内完成；离线生成 SQL 时无法读取已有指南，
+    # 升级后运行 python -m app.crud.search 生成
+    if not context.is_offline_mode() and op.get_bind().dialect.name == 'postgresql':
+        _backfill_search_vector(op.get_bind())
+
+
+def _backfill_search_vector(bind) -> None:
+    # 与 app.crud.search.GuideSearch.documents 的文档一致，迁移里不导入模型和 CRUD
+    guides = sa.table(
+        'guides',
+        sa.column('id', sa.Integer),
+        sa.column('title', sa.String),
+        sa.column('description', sa.Text),
+        sa.column('search_vector', postgresql.TSVECTOR),
+    )
+    steps = sa.table(
+        'guide_steps',
+        sa.column('guide_id', sa.Integer),
+        sa.column('title', sa.String),
+        sa.column('description', sa.Text),
+        sa.column('content', sa.Text),
+        sa.column('order', sa.Integer),
+    )
+    step_texts = {}
+    rows = bind.execute(
+        sa.select(steps.c.guide_id, steps.c.title, steps.c.description, steps.c.content)
+        .order_by(steps.c.guide_id, steps.c.order)
+    )
+    for guide_id, *texts in rows:
+        step_texts.setdefault(guide_id, []).extend(text for text in texts if text)
+    documents = [
+        {
+            'doc_id': id,
+            'doc_title': to_document(title or ''),
+            'doc_description': to_document(description or ''),
+            'doc_steps': to_document(' '.join(step_texts.get(id, []))),
+        }
+        for id, title, description in bind.execute(
+            sa.select(guides.c.id, guides.c.title, guides.c.description)
+        )
+    ]
+    if not documents:
+        return
+    vector = (
+        sa.func.setweight(sa.func.to_tsvector('simple', sa.bindparam('doc_title')), sa.literal_column("'A'"))
+        .op('||')(sa.func.setweight(sa.func.to_tsvector('simple', sa.bindparam('doc_description')), sa.literal_column("'B'")))
+        .op('||')(sa.func.setweight(sa.func.to_tsvector('simple', sa.bindparam('doc_steps')), sa.literal_column("'C'")))
+    )
+    bind.execute(
+        guides.update().where(guides.c.id == sa.bindparam('doc_id')).values(search_vector=vector),
+        documents,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_guides_search_vector', table_name='guides')
+    op.drop_column('guides', 'search_vector')
@@ -0,0 +1,25 @@
+"""Add guide_steps.guide_id index
+
+Revision ID: 3b6e0d8f1a25
+Revises: 2a5f9c3e7d14
+Create Date: 2026-10-19 21:15:52.206418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b6e0d8f1a25'
+down_revision: Union[str, None] = '2a5f9c3e7d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_guide_steps_guide_id'), 'guide_steps', ['guide_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_guide_steps_guide_id'), table_name='guide_steps')
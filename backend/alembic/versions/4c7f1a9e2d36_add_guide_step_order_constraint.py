@@ -0,0 +1,78 @@
+"""Add unique deferrable (guide_id, order) constraint on guide_steps
+
+Revision ID: 4c7f1a9e2d36
+Revises: 3b6e0d8f1a25
+Create Date: 2026-10-19 22:04:37.581203
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7f1a9e2d36'
+down_revision: Union[str, None] = '3b6e0d8f1a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 先把有重复顺序的指南按 (order, id) 重新编号
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute(
+            """
+            UPDATE guide_steps AS s
+            SET "order" = ranked.position
+            FROM (
+                SELECT id, row_number() OVER (PARTITION BY guide_id ORDER BY "order", id) AS position
+                FROM guide_steps
+                WHERE guide_id IN (
+                    SELECT guide_id FROM guide_steps
+                    GROUP BY guide_id, "order" HAVING count(*) > 1
+                )
+            ) AS ranked
+            WHERE s.id = ranked.id
+            """
+        )
+    elif not context.is_offline_mode():
+        # 其他数据库不一定支持 UPDATE ... FROM，在这里算好位置逐行更新
+        _renumber_duplicate_orders(op.get_bind())
+    op.create_unique_constraint(
+        'uq_guide_steps_guide_order', 'guide_steps', ['guide_id', 'order'],
+        deferrable=True, initially='DEFERRED'
+    )
+
+
+def _renumber_duplicate_orders(bind) -> None:
+    steps = sa.table(
+        'guide_steps', sa.column('id', sa.Integer), sa.column('guide_id', sa.Integer),
+        sa.column('order', sa.Integer),
+    )
+    duplicated = (
+        sa.select(steps.c.guide_id)
+        .group_by(steps.c.guide_id, steps.c.order)
+        .having(sa.func.count() > 1)
+    )
+    rows = bind.execute(
+        sa.select(steps.c.id, steps.c.guide_id)
+        .where(steps.c.guide_id.in_(duplicated))
+        .order_by(steps.c.guide_id, steps.c.order, steps.c.id)
+    )
+    positions = []
+    previous_guide_id, position = None, 0
+    for id, guide_id in rows:
+        position = position + 1 if guide_id == previous_guide_id else 1
+        previous_guide_id = guide_id
+        positions.append({'step_id': id, 'position': position})
+    if positions:
+        bind.execute(
+            steps.update().where(steps.c.id == sa.bindparam('step_id'))
+            .values(order=sa.bindparam('position')),
+            positions,
+        )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_guide_steps_guide_order', 'guide_steps', type_='unique')
@@ -0,0 +1,79 @@
+"""Add guide reading progress, step views and step stats
+
+Revision ID: 5d2a8c4f7e19
+Revises: 4c7f1a9e2d36
+Create Date: 2026-10-19 23:12:08.734519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a8c4f7e19'
+down_revision: Union[str, None] = '4c7f1a9e2d36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'guide_progress',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('guide_id', sa.Integer(), nullable=False),
+        sa.Column('steps_viewed', sa.Integer(), nullable=False),
+        sa.Column('last_step_id', sa.Integer(), nullable=True),
+        sa.Column('last_viewed_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['guide_id'], ['guides.id'], ),
+        sa.ForeignKeyConstraint(['last_step_id'], ['guide_steps.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'guide_id', name='uq_guide_progress_user_guide')
+    )
+    op.create_index(op.f('ix_guide_progress_id'), 'guide_progress', ['id'], unique=False)
+    op.create_index('ix_guide_progress_guide_completed', 'guide_progress', ['guide_id', 'completed_at'], unique=False)
+
+    op.create_table(
+        'guide_step_views',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('guide_id', sa.Integer(), nullable=False),
+        sa.Column('step_id', sa.Integer(), nullable=False),
+        sa.Column('view_count', sa.Integer(), nullable=False),
+        sa.Column('first_viewed_at', sa.DateTime(), nullable=False),
+        sa.Column('last_viewed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['guide_id'], ['guides.id'], ),
+        sa.ForeignKeyConstraint(['step_id'], ['guide_steps.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'step_id', name='uq_guide_step_views_user_step')
+    )
+    op.create_index(op.f('ix_guide_step_views_id'), 'guide_step_views', ['id'], unique=False)
+    op.create_index('ix_guide_step_views_user_guide', 'guide_step_views', ['user_id', 'guide_id'], unique=False)
+
+    op.create_table(
+        'guide_step_stats',
+        sa.Column('step_id', sa.Integer(), nullable=False),
+        sa.Column('guide_id', sa.Integer(), nullable=False),
+        sa.Column('viewers', sa.Integer(), nullable=False),
+        sa.Column('views', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['guide_id'], ['guides.id'], ),
+        sa.ForeignKeyConstraint(['step_id'], ['guide_steps.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('step_id')
+    )
+    op.create_index(op.f('ix_guide_step_stats_guide_id'), 'guide_step_stats', ['guide_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_guide_step_stats_guide_id'), table_name='guide_step_stats')
+    op.drop_table('guide_step_stats')
+    op.drop_index('ix_guide_step_views_user_guide', table_name='guide_step_views')
+    op.drop_index(op.f('ix_guide_step_views_id'), table_name='guide_step_views')
+    op.drop_table('guide_step_views')
+    op.drop_index('ix_guide_progress_guide_completed', table_name='guide_progress')
+    op.drop_index(op.f('ix_guide_progress_id'), table_name='guide_progress')
+    op.drop_table('guide_progress')
@@ -0,0 +1,29 @@
+"""Add activity series UTC offset
+
+Revision ID: 6e3b9d5a1c47
+Revises: 5d2a8c4f7e19
+Create Date: 2026-10-20 09:41:17.205836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e3b9d5a1c47'
+down_revision: Union[str, None] = '5d2a8c4f7e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'activity_series',
+        sa.Column('utc_offset_minutes', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('activity_series', 'utc_offset_minutes')
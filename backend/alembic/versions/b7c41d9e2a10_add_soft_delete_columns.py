@@ -0,0 +1,36 @@
+"""Add soft delete columns
+
+Revision ID: b7c41d9e2a10
+Revises: 31a2f3618543
+Create Date: 2026-10-19 10:12:40.118452
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41d9e2a10'
+down_revision: Union[str, None] = '31a2f3618543'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activities', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_activities_deleted_at'), 'activities', ['deleted_at'], unique=False)
+    op.add_column('guides', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_guides_deleted_at'), 'guides', ['deleted_at'], unique=False)
+    op.add_column('pets', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_pets_deleted_at'), 'pets', ['deleted_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pets_deleted_at'), table_name='pets')
+    op.drop_column('pets', 'deleted_at')
+    op.drop_index(op.f('ix_guides_deleted_at'), table_name='guides')
+    op.drop_column('guides', 'deleted_at')
+    op.drop_index(op.f('ix_activities_deleted_at'), table_name='activities')
+    op.drop_column('activities', 'deleted_at')
@@ -0,0 +1,48 @@
+"""Add participant count and unique registration per user
+
+Revision ID: c5d2e8f41a37
+Revises: b7c41d9e2a10
+Create Date: 2026-10-19 16:40:12.527901
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8f41a37'
+down_revision: Union[str, None] = 'b7c41d9e2a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activities', sa.Column('participant_count', sa.Integer(), server_default='0', nullable=False))
+    # 同一用户重复报名留下的多行只保留最新一行
+    op.execute(
+        """
+        DELETE FROM activity_participants
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM activity_participants GROUP BY activity_id, user_id
+        )
+        """
+    )
+    op.execute(
+        """
+        UPDATE activities SET participant_count = (
+            SELECT COUNT(*) FROM activity_participants
+            WHERE activity_participants.activity_id = activities.id
+              AND activity_participants.status != 'cancelled'
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_activity_participants_activity_user', 'activity_participants', ['activity_id', 'user_id']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_activity_participants_activity_user', 'activity_participants', type_='unique')
+    op.drop_column('activities', 'participant_count')
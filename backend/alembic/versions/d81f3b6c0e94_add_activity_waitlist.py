@@ -0,0 +1,32 @@
+"""Add activity waitlist positions
+
+Revision ID: d81f3b6c0e94
+Revises: c5d2e8f41a37
+Create Date: 2026-10-19 17:05:48.310254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81f3b6c0e94'
+down_revision: Union[str, None] = 'c5d2e8f41a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activities', sa.Column('waitlist_seq', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('activity_participants', sa.Column('position', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_activity_participants_activity_position', 'activity_participants', ['activity_id', 'position'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activity_participants_activity_position', table_name='activity_participants')
+    op.drop_column('activity_participants', 'position')
+    op.drop_column('activities', 'waitlist_seq')
@@ -0,0 +1,34 @@
+"""Add activity time indexes
+
+Revision ID: e4a9c27b1f53
+Revises: d81f3b6c0e94
+Create Date: 2026-10-19 18:12:37.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c27b1f53'
+down_revision: Union[str, None] = 'd81f3b6c0e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_activities_scheduled_start_time', 'activities', ['start_time'], unique=False,
+        postgresql_where=sa.text("status = 'scheduled' AND deleted_at IS NULL")
+    )
+    op.create_index(
+        'ix_activities_time_range', 'activities', [sa.text('tsrange(start_time, greatest(start_time, end_time))')], unique=False,
+        postgresql_using='gist', postgresql_where=sa.text('deleted_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activities_time_range', table_name='activities')
+    op.drop_index('ix_activities_scheduled_start_time', table_name='activities')
@@ -0,0 +1,32 @@
+"""Add activity coordinates
+
+Revision ID: f2b6e91d4c08
+Revises: e4a9c27b1f53
+Create Date: 2026-10-19 18:47:02.915337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6e91d4c08'
+down_revision: Union[str, None] = 'e4a9c27b1f53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('activities', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('activities', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('activities', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index(op.f('ix_activities_geohash'), 'activities', ['geohash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_activities_geohash'), table_name='activities')
+    op.drop_column('activities', 'geohash')
+    op.drop_column('activities', 'longitude')
+    op.drop_column('activities', 'latitude')
@@ -1,47 +1,48 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 
-from app.db.session import SessionLocal
-from app.core.config import settings
-from app.core import security
+from app.db.session import get_db  # noqa: F401  单一的请求级 Session 依赖
+from app.core import security, tokens
+from app.models.app_user import AppUser
 from app.models.user import User
+from app.crud.crud_app_user import app_user as crud_app_user
 from app.crud.user import user as crud_user
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/api/v1/login/access-token"
 )
 
-def get_db() -> Generator:
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
     try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
+        payload = security.decode_token(token)
+    except (jwt.JWTError, ValidationError):
+        raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    if payload.get("type", security.ACCESS_TOKEN_TYPE) != security.ACCESS_TOKEN_TYPE:
+        raise credentials_exception
+    if await tokens.is_revoked(payload):
+        raise credentials_exception
+    return payload
 
 async def get_current_user(
     db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme)
+    payload: Dict[str, Any] = Depends(get_token_payload)
 ) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: Optional[int] = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except (jwt.JWTError, ValidationError):
+    # App 用户的令牌不能用来访问管理后台接口
+    if payload.get("pt") != security.USER_PRINCIPAL:
         raise credentials_exception
-    
-    user = crud_user.get(db, id=user_id)
+    user = crud_user.get(db, id=payload["sub"])
     if not user:
         raise credentials_exception
     if not user.is_active:
@@ -51,6 +52,34 @@ async def get_current_user(
         )
     return user
 
+async def get_current_app_user(
+    db: Session = Depends(get_db),
+    payload: Dict[str, Any] = Depends(get_token_payload)
+) -> AppUser:
+    # 管理后台用户的令牌不能冒充 App 用户，两者的 id 会重复
+    if payload.get("pt") != security.APP_USER_PRINCIPAL:
+        raise credentials_exception
+    app_user = crud_app_user.get(db, id=payload["sub"])
+    if not app_user:
+        raise credentials_exception
+    if not app_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return app_user
+
+async def get_current_account(
+    db: Session = Depends(get_db),
+    payload: Dict[str, Any] = Depends(get_token_payload)
+) -> Union[User, AppUser]:
+    """
+    App 和管理后台共用的只读接口：按令牌的主体类型返回 App 用户或管理后台用户。
+    """
+    if payload.get("pt") == security.APP_USER_PRINCIPAL:
+        return await get_current_app_user(db, payload)
+    return await get_current_user(db, payload)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -58,6 +87,29 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def list_fields(schema: Type[BaseModel]) -> Callable[..., List[str]]:
+    """
+    列表接口的 fields= 参数：逗号分隔的字段名，只能取 schema 中的字段，缺省返回全部。
+    """
+    allowed = list(schema.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(
+            None, description=f"Comma-separated subset of: {','.join(allowed)}"
+        )
+    ) -> List[str]:
+        if not fields:
+            return allowed
+        requested = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = sorted(set(requested) - set(allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+        return requested
+
+    return dependency
+
 def get_current_active_superuser(
     current_user: User = Depends(get_current_user),
 ) -> User:
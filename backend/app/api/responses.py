@@ -0,0 +1,153 @@
+from typing import Any, Optional, Sequence, Set, Type
+import hashlib
+import os
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+import orjson
+
+from app.core.pagination import InvalidCursor
+from app.crud.guide_snapshot import CURRENT_NAME, VERSION_MAX_AGE, read_current_version
+from app.schemas.page import Page
+
+
+def model_response(
+    model: BaseModel,
+    *,
+    status_code: int = 200,
+    exclude_unset: bool = False,
+    exclude: Optional[Set[str]] = None
+) -> Response:
+    """
+    直接把已校验的模型编码为 JSON 响应，返回 Response 时 FastAPI 不再按
+    response_model 重新校验和编码。model_dump() 保留 datetime 等原生类型，
+    交给 orjson 编码；对列表接口的投影数据比 model_dump_json 更快。
+    """
+    return Response(
+        content=orjson.dumps(model.model_dump(exclude_unset=exclude_unset, exclude=exclude)),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
+
+def page_response(
+    schema: Type[BaseModel],
+    items: Sequence[Any],
+    next_cursor: Optional[str],
+    total: Optional[int] = None,
+    *,
+    exclude_unset: bool = False
+) -> Response:
+    """
+    列表接口的快速路径：ORM 实体或投影 dict 只校验一次成 Page[schema]，再直接输出 JSON。
+    路由上仍保留 response_model，用于生成 OpenAPI 文档。
+    total 为 None（没有请求 count）时响应中不带 total 字段。
+    """
+    page = Page[schema].model_validate(
+        {"items": items, "next_cursor": next_cursor, "total": total}, from_attributes=True
+    )
+    return model_response(
+        page, exclude_unset=exclude_unset, exclude={"total"} if total is None else None
+    )
+
+
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    """
+    无效或被篡改的分页游标返回 400。
+    """
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+def make_etag(version: Any) -> str:
+    """
+    由内容版本（任意可 repr 的值）生成弱 ETag。
+    """
+    return 'W/"' + hashlib.sha1(repr(version).encode()).hexdigest()[:20] + '"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """
+    客户端的 If-None-Match 与 etag 相同时返回 304 响应，否则返回 None。
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+def etag_response(content: bytes, etag: str) -> Response:
+    """
+    已编码的 JSON 响应体加上 ETag；no-cache 要求客户端每次带 If-None-Match 重新验证。
+    """
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+class SnapshotFiles(StaticFiles):
+    """
+    提供指南快照（见 app.crud.guide_snapshot）：按 Accept-Encoding 返回预压缩的
+    .br / .gz 文件，ETag 为内容版本号（强校验），带版本号的文件缓存 VERSION_MAX_AGE 秒，
+    current.json 缓存 max_age 秒，并用 Content-Location 给出当前版本的文件名。
+    """
+
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def __init__(self, *, directory: str, max_age: int) -> None:
+        super().__init__(directory=directory)
+        self.max_age = max_age
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Any,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        name = os.path.basename(full_path).split(".", 1)[0]
+        if name == CURRENT_NAME:
+            version = read_current_version(full_path, stat_result)
+            cache_control = f"public, max-age={self.max_age}"
+        else:
+            version = name
+            cache_control = f"public, max-age={VERSION_MAX_AGE}, immutable"
+
+        accepted = {
+            item.split(";", 1)[0].strip()
+            for item in request_headers.get("accept-encoding", "").split(",")
+        }
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if name == CURRENT_NAME:
+            headers["Content-Location"] = f"{version}.json"
+        etag = version
+        for encoding, suffix in self.ENCODINGS:
+            if encoding in accepted and os.path.isfile(full_path + suffix):
+                full_path += suffix
+                stat_result = os.stat(full_path)
+                headers["Content-Encoding"] = encoding
+                etag = f"{version}-{encoding}"
+                break
+        headers["ETag"] = f'"{etag}"'
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type="application/json",
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return Response(status_code=304, headers={
+                key: headers[key]
+                for key in ("ETag", "Cache-Control", "Vary", "Content-Location")
+                if key in headers
+            })
+        return response
@@ -1,21 +1,76 @@
-from typing import Any, List
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator, List, Optional, Tuple, Union
+import csv
+import io
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.crud.activity import activity as crud_activity
+from app.api.responses import page_response
+from app.core.check_in import create_check_in_code, read_check_in_code
+from app.core.pagination import CountMode
+from app.crud.activity import ActivityFull, AlreadyJoined, activity as crud_activity
+from app.crud.activity_series import NotAnOccurrence, activity_series as crud_activity_series
+from app.db.session import SessionLocal
+from app.models.activity import Activity as ActivityModel
+from app.models.app_user import AppUser
 from app.models.user import User
 from app.schemas.activity import (
     Activity,
+    ActivityCalendarDay,
     ActivityCreate,
+    ActivityNearby,
     ActivityUpdate,
     ActivityParticipant,
-    ActivityParticipantCreate
+    ActivitySeries,
+    ActivitySeriesCreate,
+    ActivitySummary,
+    CheckInCode,
+    CheckInRequest,
+    CheckInResult
 )
+from app.schemas.page import Page
+from app.utils.notifications import notify_waitlist_promoted
 
 router = APIRouter()
 
+# 日历接口一次最多查询的天数（约两个月视图）
+MAX_CALENDAR_DAYS = 62
+
+# 附近活动的最大搜索半径（千米）
+MAX_NEARBY_RADIUS_KM = 50
+
+EXPORT_COLUMNS = [
+    "user_id", "full_name", "phone", "email", "nickname", "gender", "birth_date",
+    "status", "waitlist_position", "joined_at", "checked_in_at",
+]
+
+def _as_utc(value: datetime) -> datetime:
+    # 数据库中存的是不带时区的 UTC 时间
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _require_organizer(activity: ActivityModel, user: User) -> None:
+    if not user.is_superuser and activity.organizer_id != user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
+def _participant_id(account: Union[User, AppUser]) -> Optional[int]:
+    # 报名记录关联的是 users 表，App 用户的 id 与之重复，不能用来判断是否已报名
+    return account.id if isinstance(account, User) else None
+
+def _calendar_window(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    start, end = _as_utc(start), _as_utc(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=MAX_CALENDAR_DAYS):
+        raise HTTPException(
+            status_code=400, detail=f"Calendar window cannot exceed {MAX_CALENDAR_DAYS} days"
+        )
+    return start, end
+
 @router.post("/", response_model=Activity)
 def create_activity(
     *,
@@ -31,30 +86,173 @@ def create_activity(
     )
     return activity
 
-@router.get("/", response_model=List[Activity])
+@router.get("/", response_model=Page[ActivitySummary], response_model_exclude_unset=True)
 def read_activities(
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    fields: List[str] = Depends(deps.list_fields(ActivitySummary)),
+    count: Optional[CountMode] = None,
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
 ) -> Any:
     """
     Retrieve activities.
     """
-    activities = crud_activity.get_multi(db, skip=skip, limit=limit)
-    return activities
+    activities, next_cursor, total = crud_activity.get_page(
+        db,
+        user_id=_participant_id(current_user),
+        cursor=cursor,
+        limit=limit,
+        fields=fields,
+        count=count,
+    )
+    return page_response(ActivitySummary, activities, next_cursor, total, exclude_unset=True)
+
+@router.get(
+    "/calendar", response_model=List[ActivityCalendarDay], response_model_exclude_unset=True
+)
+def read_activity_calendar(
+    db: Session = Depends(deps.get_db),
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    fields: List[str] = Depends(deps.list_fields(ActivitySummary)),
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
+) -> Any:
+    """
+    Activities overlapping the [from, to) window, grouped by day.
+    Days follow the UTC offset of `from` (e.g. 2025-03-01T00:00:00+08:00), or UTC when naive.
+    """
+    utc_offset = start.utcoffset() or timedelta(0)
+    start, end = _calendar_window(start, end)
+    return crud_activity.get_calendar(
+        db,
+        start=start,
+        end=end,
+        utc_offset=utc_offset,
+        fields=fields,
+        user_id=_participant_id(current_user),
+    )
+
+@router.post("/series", response_model=ActivitySeries)
+def create_activity_series(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_in: ActivitySeriesCreate,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Create a recurring activity. Occurrences are expanded on read and only
+    stored once someone joins them.
+    BYDAY and monthly rules follow the UTC offset of `dtstart`, or UTC when naive.
+    """
+    utc_offset = series_in.dtstart.utcoffset() or timedelta(0)
+    series_in = series_in.model_copy(update={"dtstart": _as_utc(series_in.dtstart)})
+    return crud_activity_series.create_with_organizer(
+        db=db, obj_in=series_in, organizer_id=current_user.id, utc_offset=utc_offset
+    )
+
+@router.get(
+    "/series/{series_id}/occurrences",
+    response_model=List[ActivitySummary],
+    response_model_exclude_unset=True
+)
+def read_series_occurrences(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    start: datetime = Query(..., alias="from"),
+    end: datetime = Query(..., alias="to"),
+    fields: List[str] = Depends(deps.list_fields(ActivitySummary)),
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
+) -> Any:
+    """
+    Occurrences of a recurring activity within [from, to) that nobody has joined yet.
+    Joined occurrences are regular activities (with series_id set).
+    """
+    if not crud_activity_series.get(db=db, id=series_id):
+        raise HTTPException(status_code=404, detail="Activity series not found")
+    start, end = _calendar_window(start, end)
+    fields = [field for field in fields if field != "is_participant"]
+    return crud_activity_series.expand(
+        db, start=start, end=end, fields=fields, series_id=series_id
+    )
+
+@router.post("/series/{series_id}/join", response_model=ActivityParticipant)
+def join_series_occurrence(
+    *,
+    db: Session = Depends(deps.get_db),
+    series_id: int,
+    occurrence_start: datetime,
+    waitlist: bool = True,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Join one occurrence of a recurring activity, storing it as an activity first.
+    """
+    series = crud_activity_series.get(db=db, id=series_id)
+    if not series:
+        raise HTTPException(status_code=404, detail="Activity series not found")
+    try:
+        activity = crud_activity_series.materialize(
+            db=db, series=series, occurrence_start=_as_utc(occurrence_start)
+        )
+    except NotAnOccurrence:
+        raise HTTPException(status_code=400, detail="Not an occurrence of this activity series")
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+
+    try:
+        return crud_activity.add_participant(
+            db=db, activity_id=activity.id, user_id=current_user.id, waitlist=waitlist
+        )
+    except AlreadyJoined:
+        raise HTTPException(status_code=400, detail="Already joined this activity")
+    except ActivityFull:
+        raise HTTPException(status_code=400, detail="Activity is full")
+
+@router.get(
+    "/nearby", response_model=List[ActivityNearby], response_model_exclude_unset=True
+)
+def read_nearby_activities(
+    db: Session = Depends(deps.get_db),
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=MAX_NEARBY_RADIUS_KM),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    limit: int = Query(50, ge=1, le=100),
+    fields: List[str] = Depends(deps.list_fields(ActivitySummary)),
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
+) -> Any:
+    """
+    Upcoming activities within radius_km of (lat, lng), nearest first.
+    from/to restrict the start time; from defaults to now.
+    """
+    return crud_activity.get_nearby(
+        db,
+        latitude=lat,
+        longitude=lng,
+        radius_km=radius_km,
+        fields=fields,
+        start=_as_utc(start) if start else None,
+        end=_as_utc(end) if end else None,
+        limit=limit,
+        user_id=_participant_id(current_user),
+    )
 
 @router.get("/{activity_id}", response_model=Activity)
 def read_activity(
     *,
     db: Session = Depends(deps.get_db),
     activity_id: int,
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
 ) -> Any:
     """
     Get activity by ID.
     """
-    activity = crud_activity.get(db=db, id=activity_id)
+    activity = crud_activity.get_with_participation(
+        db=db, id=activity_id, user_id=_participant_id(current_user)
+    )
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     return activity
@@ -93,7 +291,7 @@ def delete_activity(
         raise HTTPException(status_code=404, detail="Activity not found")
     if not current_user.is_superuser and (activity.creator_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    activity = crud_activity.remove(db=db, id=activity_id)
+    activity = crud_activity.remove(db=db, db_obj=activity)
     return activity
 
 @router.post("/{activity_id}/join", response_model=ActivityParticipant)
@@ -101,48 +299,140 @@ def join_activity(
     *,
     db: Session = Depends(deps.get_db),
     activity_id: int,
+    waitlist: bool = True,
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    Join an activity.
+    Join an activity. When it is full the user is queued on its waitlist
+    (status "waitlisted") unless waitlist=false.
     """
     activity = crud_activity.get(db=db, id=activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
-    
-    # Check if user is already a participant
-    if crud_activity.is_participant(db=db, activity_id=activity_id, user_id=current_user.id):
+
+    try:
+        return crud_activity.add_participant(
+            db=db, activity_id=activity_id, user_id=current_user.id, waitlist=waitlist
+        )
+    except AlreadyJoined:
         raise HTTPException(status_code=400, detail="Already joined this activity")
-    
-    # Check if activity is full
-    if activity.max_participants and len(activity.participants) >= activity.max_participants:
+    except ActivityFull:
         raise HTTPException(status_code=400, detail="Activity is full")
-    
-    participant_in = ActivityParticipantCreate(
-        activity_id=activity_id,
-        user_id=current_user.id,
-        status="registered"
-    )
-    return crud_activity.add_participant(db=db, obj_in=participant_in)
 
 @router.post("/{activity_id}/leave", response_model=ActivityParticipant)
 def leave_activity(
     *,
     db: Session = Depends(deps.get_db),
     activity_id: int,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
-    Leave an activity.
+    Leave an activity or its waitlist. A freed seat goes to the head of the waitlist.
     """
     activity = crud_activity.get(db=db, id=activity_id)
     if not activity:
         raise HTTPException(status_code=404, detail="Activity not found")
     
-    participant = crud_activity.get_participant(
+    participant, promoted = crud_activity.remove_participant(
         db=db, activity_id=activity_id, user_id=current_user.id
     )
     if not participant:
         raise HTTPException(status_code=400, detail="Not a participant of this activity")
-    
-    return crud_activity.remove_participant(db=db, participant=participant)
+    if promoted is not None:
+        background_tasks.add_task(
+            notify_waitlist_promoted, promoted.user_id, promoted.activity_id
+        )
+    return participant
+
+@router.get("/{activity_id}/check-in-code", response_model=CheckInCode)
+def read_check_in_code_for_user(
+    *,
+    db: Session = Depends(deps.get_db),
+    activity_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    The current user's check-in code for an activity they registered for, shown as a QR code.
+    """
+    if not crud_activity.get_participant(db=db, activity_id=activity_id, user_id=current_user.id):
+        raise HTTPException(status_code=400, detail="Not a participant of this activity")
+    return {"code": create_check_in_code(activity_id, current_user.id)}
+
+@router.post("/{activity_id}/check-in", response_model=CheckInResult)
+def check_in_participants(
+    *,
+    db: Session = Depends(deps.get_db),
+    activity_id: int,
+    check_in_in: CheckInRequest,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Mark registered participants as attended, by user id and/or scanned check-in code.
+    """
+    activity = crud_activity.get(db=db, id=activity_id)
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    _require_organizer(activity, current_user)
+
+    user_ids = set(check_in_in.user_ids)
+    invalid_codes = []
+    for code in check_in_in.codes:
+        user_id = read_check_in_code(code, activity_id)
+        if user_id is None:
+            invalid_codes.append(code)
+        else:
+            user_ids.add(user_id)
+
+    checked_in, already = crud_activity.check_in(
+        db=db, activity_id=activity_id, user_ids=list(user_ids)
+    )
+    return {
+        "checked_in": checked_in,
+        "already_checked_in": already,
+        "not_registered": sorted(user_ids - set(checked_in) - set(already)),
+        "invalid_codes": invalid_codes,
+    }
+
+def _export_csv(activity_id: int) -> Iterator[str]:
+    # 请求的 Session 在响应开始发送前就已关闭，流式输出使用独立的 Session
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        # 带 BOM，Excel 打开时能正确识别 UTF-8 中文
+        buffer.write("\ufeff")
+        writer.writerow(EXPORT_COLUMNS)
+        for index, row in enumerate(
+            crud_activity.iter_participant_rows(db, activity_id=activity_id), 1
+        ):
+            writer.writerow(["" if value is None else value for value in row])
+            if index % 500 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+@router.get("/{activity_id}/participants/export")
+def export_participants(
+    *,
+    db: Session = Depends(deps.get_db),
+    activity_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Stream the attendance sheet (participants and waitlist with user details) as CSV.
+    """
+    activity = crud_activity.get(db=db, id=activity_id)
+    if not activity:
+        raise HTTPException(status_code=404, detail="Activity not found")
+    _require_organizer(activity, current_user)
+    return StreamingResponse(
+        _export_csv(activity_id),
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="activity-{activity_id}-participants.csv"'
+        },
+    )
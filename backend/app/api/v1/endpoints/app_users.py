@@ -1,28 +1,42 @@
 from typing import Any, List, Optional
+from anyio import from_thread
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.responses import page_response
+from app.core import security, tokens
+from app.core.pagination import CountMode
+from app.schemas.app_user import AppUserSummary
+from app.schemas.page import Page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.AppUser])
+@router.get("/", response_model=Page[AppUserSummary], response_model_exclude_unset=True)
 def read_app_users(
     db: Session = Depends(deps.get_db),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(100, ge=1, le=100),
     phone: Optional[str] = None,
     is_active: Optional[bool] = None,
+    fields: List[str] = Depends(deps.list_fields(AppUserSummary)),
+    count: Optional[CountMode] = None,
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Retrieve app users.
     """
-    app_users = crud.app_user.get_multi(
-        db, skip=skip, limit=limit, phone=phone, is_active=is_active
+    app_users, next_cursor, total = crud.app_user.get_page(
+        db,
+        cursor=cursor,
+        limit=limit,
+        phone=phone,
+        is_active=is_active,
+        fields=fields,
+        count=count,
     )
-    return app_users
+    return page_response(AppUserSummary, app_users, next_cursor, total, exclude_unset=True)
 
 @router.get("/{user_id}", response_model=schemas.AppUser)
 def read_app_user(
@@ -53,6 +67,9 @@ def update_app_user(
     if not app_user:
         raise HTTPException(status_code=404, detail="App user not found")
     app_user = crud.app_user.update(db, db_obj=app_user, obj_in=user_in)
+    if user_in.is_active is False:
+        # 停用后立即吊销该用户已签发的令牌
+        from_thread.run(tokens.revoke_user, user_id, security.APP_USER_PRINCIPAL)
     return app_user
 
 @router.delete("/{user_id}")
@@ -68,5 +85,6 @@ def delete_app_user(
     app_user = crud.app_user.get(db, id=user_id)
     if not app_user:
         raise HTTPException(status_code=404, detail="App user not found")
-    app_user = crud.app_user.remove(db, id=user_id)
+    app_user = crud.app_user.remove(db, db_obj=app_user)
+    from_thread.run(tokens.revoke_user, user_id, security.APP_USER_PRINCIPAL)
     return {"status": "success"}
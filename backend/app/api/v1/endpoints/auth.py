@@ -1,19 +1,49 @@
-from datetime import datetime, timedelta
-from typing import Any
+from typing import Any, Dict
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from jose import jwt
 from sqlalchemy.orm import Session
-from app import crud, models, schemas
+from app import crud, schemas
 from app.api import deps
-from app.core import security
+from app.core import security, tokens
 from app.core.config import settings
 from app.schemas.auth import Token
-from app.utils.sms import send_verification_code
+from app.schemas.token import RefreshTokenRequest, Token as TokenPair
+from app.utils.sms import generate_verification_code, normalize_phone, send_verification_code
 from app.core.redis import redis_client
+from app.core.rate_limit import LimitRule, rate_limit
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/send-code")
+# 发送验证码：同一手机号冷却 + 手机号/IP 每小时上限，防止短信轰炸
+send_code_limit = rate_limit(
+    "sms_send",
+    LimitRule("phone", 1, settings.SMS_SEND_COOLDOWN_SECONDS),
+    LimitRule("phone", settings.SMS_SEND_LIMIT_PER_PHONE, settings.SMS_SEND_PERIOD_SECONDS),
+    LimitRule("ip", settings.SMS_SEND_LIMIT_PER_IP, settings.SMS_SEND_PERIOD_SECONDS),
+)
+
+# 校验验证码（verify-code / login / register 共用），防止暴力破解
+verify_code_limit = rate_limit(
+    "sms_verify",
+    LimitRule("phone", settings.SMS_VERIFY_LIMIT_PER_PHONE, settings.SMS_VERIFY_PERIOD_SECONDS),
+    LimitRule("ip", settings.SMS_VERIFY_LIMIT_PER_IP, settings.SMS_VERIFY_PERIOD_SECONDS),
+)
+
+def _valid_phone(phone: str) -> str:
+    # 与限流使用同一个规范化的手机号作为键
+    phone = normalize_phone(phone)
+    if phone is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid phone number",
+        )
+    return phone
+
+@router.post("/send-code", dependencies=[Depends(send_code_limit)])
 async def send_verification_code_api(
     *,
     phone: str,
@@ -23,29 +53,18 @@ async def send_verification_code_api(
     发送验证码
     """
     # 验证手机号格式
-    if not phone or not phone.isdigit() or len(phone) != 11:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid phone number",
-        )
+    phone = _valid_phone(phone)
     
-    # 检查是否频繁发送
-    last_send_time = await redis_client.get(f"sms:lasttime:{phone}")
-    if last_send_time:
-        raise HTTPException(
-            status_code=400,
-            detail="Please wait 60 seconds before requesting another code",
-        )
+    # 发送频率（含 60 秒冷却）已由 send_code_limit 原子地检查
     
     # 生成验证码
-    code = "123456"  # TODO: 生成随机验证码
+    code = generate_verification_code()
     
     # 发送验证码
     try:
-        # TODO: 集成短信服务
-        # await send_verification_code(phone, code)
-        pass
-    except Exception as e:
+        await send_verification_code(phone, code)
+    except Exception:
+        logger.exception("Sending verification code failed")
         raise HTTPException(
             status_code=500,
             detail="Failed to send verification code",
@@ -53,12 +72,10 @@ async def send_verification_code_api(
     
     # 保存验证码到 Redis，有效期 5 分钟
     await redis_client.setex(f"sms:code:{phone}", 300, code)
-    # 设置发送冷却时间 60 秒
-    await redis_client.setex(f"sms:lasttime:{phone}", 60, "1")
     
     return {"message": "Verification code sent"}
 
-@router.post("/verify-code")
+@router.post("/verify-code", dependencies=[Depends(verify_code_limit)])
 async def verify_code(
     *,
     phone: str,
@@ -67,6 +84,7 @@ async def verify_code(
     """
     验证验证码
     """
+    phone = _valid_phone(phone)
     stored_code = await redis_client.get(f"sms:code:{phone}")
     if not stored_code or stored_code != code:
         raise HTTPException(
@@ -75,7 +93,7 @@ async def verify_code(
         )
     return {"message": "Code verified"}
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(verify_code_limit)])
 async def login(
     *,
     phone: str,
@@ -87,6 +105,7 @@ async def login(
     使用手机号和验证码登录，如果用户不存在则自动注册
     """
     # 验证验证码
+    phone = _valid_phone(phone)
     stored_code = await redis_client.get(f"sms:code:{phone}")
     if not stored_code or stored_code != code:
         raise HTTPException(
@@ -94,38 +113,23 @@ async def login(
             detail="Invalid verification code",
         )
     
-    # 获取或创建用户
-    user = crud.app_user.get_by_phone(db, phone=phone)
-    if not user:
-        if not nickname:
-            nickname = f"用户{phone[-4:]}"  # 使用手机号后四位作为默认昵称
-        user_in = schemas.AppUserCreate(
-            phone=phone,
-            nickname=nickname,
-            is_active=True,
-        )
-        user = crud.app_user.create(db, obj_in=user_in)
+    # 获取或创建用户并更新最后登录时间（单条 upsert 语句）
+    if not nickname:
+        nickname = f"用户{phone[-4:]}"  # 使用手机号后四位作为默认昵称
+    user = crud.app_user.upsert_by_phone(db, phone=phone, nickname=nickname)
     
-    # 更新最后登录时间
-    user.last_login = datetime.utcnow()
-    db.commit()
-    
-    # 生成 token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = security.create_access_token(
-        user.id, expires_delta=access_token_expires
-    )
+    # 生成 token（开启新的登录会话）
+    token_pair = security.create_token_pair(user.id, principal=security.APP_USER_PRINCIPAL)
     
     # 删除验证码
     await redis_client.delete(f"sms:code:{phone}")
     
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **token_pair,
         "user": user,
     }
 
-@router.post("/register", response_model=Token)
+@router.post("/register", response_model=Token, dependencies=[Depends(verify_code_limit)])
 async def register(
     *,
     phone: str,
@@ -137,6 +141,7 @@ async def register(
     注册新用户
     """
     # 验证验证码
+    phone = _valid_phone(phone)
     stored_code = await redis_client.get(f"sms:code:{phone}")
     if not stored_code or stored_code != code:
         raise HTTPException(
@@ -159,26 +164,50 @@ async def register(
     )
     user = crud.app_user.create(db, obj_in=user_in)
     
-    # 生成 token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    token = security.create_access_token(
-        user.id, expires_delta=access_token_expires
-    )
+    # 生成 token（开启新的登录会话）
+    token_pair = security.create_token_pair(user.id, principal=security.APP_USER_PRINCIPAL)
     
     # 删除验证码
     await redis_client.delete(f"sms:code:{phone}")
     
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **token_pair,
         "user": user,
     }
 
+@router.post("/refresh", response_model=TokenPair)
+async def refresh_token(
+    *,
+    token_in: RefreshTokenRequest,
+) -> Any:
+    """
+    使用刷新令牌换取新的令牌对，旧的刷新令牌随即失效（轮换）。
+    刷新令牌放在请求体中，不会出现在访问日志里
+    """
+    try:
+        payload = security.decode_token(token_in.refresh_token)
+    except jwt.JWTError:
+        raise deps.credentials_exception
+    if payload.get("type") != security.REFRESH_TOKEN_TYPE or not payload.get("fam"):
+        raise deps.credentials_exception
+    if payload.get("pt") not in (security.USER_PRINCIPAL, security.APP_USER_PRINCIPAL):
+        raise deps.credentials_exception
+    if await tokens.is_revoked(payload):
+        raise deps.credentials_exception
+
+    family = await tokens.consume_refresh_token(payload)
+    if family is None:
+        # 刷新令牌被重复使用，整个会话已被吊销
+        raise deps.credentials_exception
+    return security.create_token_pair(payload["sub"], family=family, principal=payload["pt"])
+
 @router.post("/logout")
 async def logout(
-    current_user: models.AppUser = Depends(deps.get_current_user),
+    payload: Dict[str, Any] = Depends(deps.get_token_payload),
 ) -> Any:
     """
-    退出登录
+    退出登录，吊销当前会话的访问令牌和刷新令牌
     """
+    if payload.get("fam"):
+        await tokens.revoke_family(payload["fam"])
     return {"message": "Successfully logged out"}
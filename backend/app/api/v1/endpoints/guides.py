@@ -1,23 +1,52 @@
-from typing import Any, List
+from typing import Any, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+import orjson
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.crud.guide import guide as crud_guide
+from app.api.responses import etag_response, make_etag, not_modified, page_response
+from app.core.config import settings
+from app.core.pagination import CountMode
+from app.crud.cache import LRUCache
+from app.crud.guide import InvalidStepBatch, guide as crud_guide
+from app.crud.guide_progress import guide_progress as crud_guide_progress, progress_buffer
+from app.models.app_user import AppUser
+from app.models.guide import Guide as GuideModel
 from app.models.user import User
 from app.schemas.guide import (
     Guide,
     GuideCreate,
+    GuideDetail,
+    GuideFunnel,
+    GuideProgress,
+    GuideSearchHit,
     GuideUpdate,
     GuideWithSteps,
     GuideStep,
+    GuideStepBatch,
     GuideStepCreate,
-    GuideStepUpdate
+    GuideStepUpdate,
+    GuideSummary
 )
+from app.schemas.page import Page
 
 router = APIRouter()
 
+# 已发布指南详情的响应体，按 ETag 缓存；内容修改后 ETag 改变，旧条目自然淘汰
+published_guide_bodies = LRUCache(
+    settings.MODEL_CACHE_MAX_ENTRIES, settings.MODEL_CACHE_TTL_SECONDS
+)
+
+def _is_superuser(account: Union[User, AppUser]) -> bool:
+    return isinstance(account, User) and account.is_superuser
+
+def _require_author(guide: GuideModel, user: Union[User, AppUser]) -> None:
+    # App 用户的 id 与 users 表重复，不能据此认作作者
+    if not isinstance(user, User) or (not user.is_superuser and guide.author_id != user.id):
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+
 @router.post("/", response_model=GuideWithSteps)
 def create_guide(
     *,
@@ -33,38 +62,77 @@ def create_guide(
     )
     return guide
 
-@router.get("/", response_model=List[Guide])
+@router.get("/", response_model=Page[GuideSummary], response_model_exclude_unset=True)
 def read_guides(
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_user)
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    fields: List[str] = Depends(deps.list_fields(GuideSummary)),
+    count: Optional[CountMode] = None,
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
 ) -> Any:
     """
     Retrieve guides.
     """
-    if current_user.is_superuser:
-        guides = crud_guide.get_multi(db, skip=skip, limit=limit)
+    if _is_superuser(current_user):
+        guides, next_cursor, total = crud_guide.get_page(
+            db, cursor=cursor, limit=limit, fields=fields, count=count
+        )
     else:
-        guides = crud_guide.get_published(db, skip=skip, limit=limit)
-    return guides
+        guides, next_cursor, total = crud_guide.get_published_page(
+            db, cursor=cursor, limit=limit, fields=fields, count=count
+        )
+    return page_response(GuideSummary, guides, next_cursor, total, exclude_unset=True)
 
-@router.get("/{guide_id}", response_model=GuideWithSteps)
+@router.get("/search", response_model=List[GuideSearchHit])
+def search_guides(
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=500),
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
+) -> Any:
+    """
+    Search guide titles, descriptions and step contents, most relevant first.
+    """
+    hits = crud_guide.search(
+        db, text=q, published_only=not _is_superuser(current_user), limit=limit, offset=offset
+    )
+    return [
+        GuideSearchHit(**GuideSummary.model_validate(guide).model_dump(), rank=rank)
+        for guide, rank in hits
+    ]
+
+@router.get("/{guide_id}", response_model=GuideDetail)
 def read_guide(
     *,
     db: Session = Depends(deps.get_db),
+    request: Request,
     guide_id: int,
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Union[User, AppUser] = Depends(deps.get_current_account)
 ) -> Any:
     """
-    Get guide by ID.
+    Get guide by ID, with its steps.
+    Responses carry an ETag; send it back in If-None-Match to get 304 when unchanged.
+    Published guides are also served as static snapshots at /static/guides/{id}/current.json.
     """
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not guide.is_published and not current_user.is_superuser and guide.creator_id != current_user.id:
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    return guide
+    if not guide.is_published:
+        _require_author(guide, current_user)
+
+    etag = make_etag(crud_guide.content_version(db=db, guide=guide))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    body = published_guide_bodies.get(etag) if guide.is_published else None
+    if not isinstance(body, bytes):
+        guide = crud_guide.get_with_steps(db=db, id=guide_id)
+        body = orjson.dumps(GuideDetail.model_validate(guide).model_dump())
+        if guide.is_published:
+            published_guide_bodies.set(etag, body)
+    return etag_response(body, etag)
 
 @router.put("/{guide_id}", response_model=Guide)
 def update_guide(
@@ -80,8 +148,7 @@ def update_guide(
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not current_user.is_superuser and (guide.creator_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
+    _require_author(guide, current_user)
     guide = crud_guide.update(db=db, db_obj=guide, obj_in=guide_in)
     return guide
 
@@ -98,9 +165,8 @@ def delete_guide(
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not current_user.is_superuser and (guide.creator_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    guide = crud_guide.remove(db=db, id=guide_id)
+    _require_author(guide, current_user)
+    guide = crud_guide.remove(db=db, db_obj=guide)
     return guide
 
 @router.post("/{guide_id}/steps", response_model=GuideStep)
@@ -117,11 +183,40 @@ def create_guide_step(
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not current_user.is_superuser and (guide.creator_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    step = crud_guide.create_step(db=db, obj_in=step_in, guide_id=guide_id)
+    _require_author(guide, current_user)
+    try:
+        step = crud_guide.create_step(db=db, obj_in=step_in, guide_id=guide_id)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Step order already used in this guide")
     return step
 
+@router.patch("/{guide_id}/steps", response_model=List[GuideStep])
+def update_guide_steps(
+    *,
+    db: Session = Depends(deps.get_db),
+    guide_id: int,
+    batch_in: GuideStepBatch,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Reorder and edit several steps of a guide in one transaction.
+    `order` lists every step id in the new order; `steps` patches individual steps.
+    Returns all steps of the guide in their new order.
+    """
+    guide = crud_guide.get(db=db, id=guide_id)
+    if not guide:
+        raise HTTPException(status_code=404, detail="Guide not found")
+    _require_author(guide, current_user)
+    try:
+        steps = crud_guide.update_steps(
+            db=db, guide_id=guide_id, order=batch_in.order, patches=batch_in.steps
+        )
+    except InvalidStepBatch as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Step order already used in this guide")
+    return steps
+
 @router.put("/{guide_id}/steps/{step_id}", response_model=GuideStep)
 def update_guide_step(
     *,
@@ -137,14 +232,16 @@ def update_guide_step(
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not current_user.is_superuser and (guide.creator_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
+    _require_author(guide, current_user)
     
     step = crud_guide.get_step(db=db, id=step_id)
     if not step or step.guide_id != guide_id:
         raise HTTPException(status_code=404, detail="Step not found")
     
-    step = crud_guide.update_step(db=db, db_obj=step, obj_in=step_in)
+    try:
+        step = crud_guide.update_step(db=db, db_obj=step, obj_in=step_in)
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Step order already used in this guide")
     return step
 
 @router.delete("/{guide_id}/steps/{step_id}", response_model=GuideStep)
@@ -161,8 +258,7 @@ def delete_guide_step(
     guide = crud_guide.get(db=db, id=guide_id)
     if not guide:
         raise HTTPException(status_code=404, detail="Guide not found")
-    if not current_user.is_superuser and (guide.creator_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
+    _require_author(guide, current_user)
     
     step = crud_guide.get_step(db=db, id=step_id)
     if not step or step.guide_id != guide_id:
@@ -170,3 +266,56 @@ def delete_guide_step(
     
     step = crud_guide.remove_step(db=db, id=step_id)
     return step
+
+@router.post("/{guide_id}/steps/{step_id}/view", status_code=202)
+def record_guide_step_view(
+    *,
+    guide_id: int,
+    step_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Record that the current user viewed a step. Views are buffered in memory and
+    written in batches, so progress and funnels may lag a few seconds behind.
+    """
+    guide = crud_guide.get(db=db, id=guide_id)
+    if not guide:
+        raise HTTPException(status_code=404, detail="Guide not found")
+    if not guide.is_published:
+        _require_author(guide, current_user)
+    # 步骤是否属于指南在批量写入时校验，这里不查询步骤；积压时由后台任务提前写入
+    progress_buffer.record(user_id=current_user.id, guide_id=guide_id, step_id=step_id)
+    return {"status": "accepted"}
+
+@router.get("/{guide_id}/progress", response_model=GuideProgress)
+def read_guide_progress(
+    *,
+    db: Session = Depends(deps.get_db),
+    guide_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Get the current user's reading progress through a guide.
+    """
+    guide = crud_guide.get(db=db, id=guide_id)
+    if not guide:
+        raise HTTPException(status_code=404, detail="Guide not found")
+    return crud_guide_progress.get_progress(db=db, user_id=current_user.id, guide_id=guide_id)
+
+@router.get("/{guide_id}/funnel", response_model=GuideFunnel)
+def read_guide_funnel(
+    *,
+    db: Session = Depends(deps.get_db),
+    guide_id: int,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Get the completion funnel of a guide: how many readers started and finished it,
+    and how many viewed each step.
+    """
+    guide = crud_guide.get(db=db, id=guide_id)
+    if not guide:
+        raise HTTPException(status_code=404, detail="Guide not found")
+    _require_author(guide, current_user)
+    return crud_guide_progress.get_funnel(db=db, guide_id=guide_id)
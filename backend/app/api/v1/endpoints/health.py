@@ -113,7 +113,7 @@ def delete_health_record(
     if record.user_id != current_user.id and not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
         
-    crud.health_record.remove(db, id=record_id)
+    crud.health_record.remove(db, db_obj=record)
     return {"status": "success"}
 
 @router.get("/alerts/", response_model=List[HealthAlert])
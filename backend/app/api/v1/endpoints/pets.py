@@ -1,12 +1,17 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.responses import page_response
+from app.core.pagination import CountMode
 from app.crud.pet import pet as crud_pet
 from app.models.user import User
-from app.schemas.pet import Pet, PetCreate, PetUpdate, PetInteraction, PetInteractionCreate
+from app.schemas.page import Page
+from app.schemas.pet import (
+    Pet, PetCreate, PetUpdate, PetInteraction, PetInteractionCreate, PetSummary
+)
 
 router = APIRouter()
 
@@ -30,23 +35,32 @@ def create_pet(
     pet = crud_pet.create_with_owner(db=db, obj_in=pet_in, owner_id=current_user.id)
     return pet
 
-@router.get("/", response_model=List[Pet])
+@router.get("/", response_model=Page[PetSummary], response_model_exclude_unset=True)
 def read_pets(
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    fields: List[str] = Depends(deps.list_fields(PetSummary)),
+    count: Optional[CountMode] = None,
     current_user: User = Depends(deps.get_current_active_user)
 ) -> Any:
     """
     Retrieve pets.
     """
     if current_user.is_superuser:
-        pets = crud_pet.get_multi(db, skip=skip, limit=limit)
+        pets, next_cursor, total = crud_pet.get_page(
+            db, cursor=cursor, limit=limit, fields=fields, count=count
+        )
     else:
-        pets = crud_pet.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+        pets, next_cursor, total = crud_pet.get_page_by_owner(
+            db=db,
+            owner_id=current_user.id,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+            count=count,
         )
-    return pets
+    return page_response(PetSummary, pets, next_cursor, total, exclude_unset=True)
 
 @router.get("/{pet_id}", response_model=Pet)
 def read_pet(
@@ -99,7 +113,7 @@ def delete_pet(
         raise HTTPException(status_code=404, detail="Pet not found")
     if not current_user.is_superuser and (pet.owner_id != current_user.id):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    pet = crud_pet.remove(db=db, id=pet_id)
+    pet = crud_pet.remove(db=db, db_obj=pet)
     return pet
 
 @router.post("/{pet_id}/interact", response_model=PetInteraction)
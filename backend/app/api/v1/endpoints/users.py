@@ -1,16 +1,19 @@
-from typing import Any, List
+from typing import Any, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.encoders import jsonable_encoder
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.responses import page_response
 from app.core.config import settings
+from app.core.pagination import CountMode
 from app.crud.user import user as crud_user
 from app.models.user import User
 from app.schemas.user import User as UserSchema
 from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.page import Page
 
 router = APIRouter()
 
@@ -82,15 +85,16 @@ def read_user_by_id(
         )
     return user
 
-@router.get("/", response_model=List[UserSchema])
+@router.get("/", response_model=Page[UserSchema])
 def read_users(
     db: Session = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
+    count: Optional[CountMode] = None,
     current_user: User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = crud_user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users, next_cursor, total = crud_user.get_page(db, cursor=cursor, limit=limit, count=count)
+    return page_response(UserSchema, users, next_cursor, total)
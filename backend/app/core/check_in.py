@@ -0,0 +1,39 @@
+from typing import Optional
+import base64
+import hashlib
+import hmac
+
+from app.core.config import settings
+
+SIGNATURE_BYTES = 10
+
+
+def _signature(activity_id: int, user_id: int) -> str:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(),
+        f"check-in:{activity_id}:{user_id}".encode(),
+        hashlib.sha256,
+    ).digest()[:SIGNATURE_BYTES]
+    return base64.b32encode(digest).decode().rstrip("=")
+
+
+def create_check_in_code(activity_id: int, user_id: int) -> str:
+    """
+    签到码（生成二维码给工作人员扫描）：活动、用户和签名，不需要存库。
+    """
+    return f"{activity_id}-{user_id}-{_signature(activity_id, user_id)}"
+
+
+def read_check_in_code(code: str, activity_id: int) -> Optional[int]:
+    """
+    校验签到码并返回用户 id；格式错误、签名不符或不是本活动的签到码时返回 None。
+    """
+    parts = code.strip().upper().split("-")
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        return None
+    code_activity_id, user_id = int(parts[0]), int(parts[1])
+    if code_activity_id != activity_id:
+        return None
+    if not hmac.compare_digest(parts[2], _signature(activity_id, user_id)):
+        return None
+    return user_id
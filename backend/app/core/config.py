@@ -18,13 +18,40 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
     
     # 管理员设置
     ADMIN_EMAIL: str = "admin@example.com"
     ADMIN_PASSWORD: str = "admin123"
 
-    # Redis 设置
+    # Redis 设置（memory:// 表示使用进程内实现，适用于测试和单节点部署）
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 20
+
+    # 模型读缓存设置（MODEL_CACHE_REDIS_URL 为空时只使用进程内缓存）
+    MODEL_CACHE_TTL_SECONDS: int = 60
+    MODEL_CACHE_MAX_ENTRIES: int = 1024
+    MODEL_CACHE_REDIS_URL: Optional[str] = None
+    MODEL_CACHE_LOCAL_TTL_SECONDS: int = 5
+
+    # 短信验证码限流设置（次数 / 时间窗口秒数）
+    SMS_SEND_COOLDOWN_SECONDS: int = 60
+    SMS_SEND_LIMIT_PER_PHONE: int = 5
+    SMS_SEND_LIMIT_PER_IP: int = 20
+    SMS_SEND_PERIOD_SECONDS: int = 3600
+    SMS_VERIFY_LIMIT_PER_PHONE: int = 10
+    SMS_VERIFY_LIMIT_PER_IP: int = 50
+    SMS_VERIFY_PERIOD_SECONDS: int = 600
+
+    # 短信网关：验证码以 JSON {"phone", "code"} POST 到该地址，令牌放在 Authorization 头。
+    # 未配置时只有 development 环境可用（验证码写入日志）
+    SMS_GATEWAY_URL: Optional[str] = None
+    SMS_GATEWAY_TOKEN: Optional[str] = None
+    SMS_GATEWAY_TIMEOUT_SECONDS: float = 5.0
+
+    # 通知推送服务：事件以 JSON {"type", "payload"} POST 到该地址，未配置时只写日志
+    NOTIFICATION_WEBHOOK_URL: Optional[str] = None
+    NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
 
     # 文件存储设置
     UPLOAD_DIR: str = "/tmp/silver_companion/uploads"
@@ -42,6 +69,21 @@ class Settings(BaseSettings):
     MAX_DIFFICULTY_LEVEL: int = 5
     MAX_STEPS_PER_GUIDE: int = 20
 
+    # 全文搜索的中文分词方式：bigram（二元切分，无额外依赖）或 jieba（需安装 jieba）。
+    # 修改后需要重建索引（python -m app.crud.search）
+    SEARCH_TOKENIZER: str = "bigram"
+
+    # 已发布指南的静态快照目录，挂载在 /static/guides，也可同步到 CDN 或对象存储。
+    # 全量重建：python -m app.crud.guide_snapshot
+    GUIDE_SNAPSHOT_DIR: str = "/tmp/silver_companion/guides"
+    # current.json 的缓存时间（秒）；带版本号的快照内容不变，缓存一年，被替换一年后删除
+    GUIDE_SNAPSHOT_MAX_AGE: int = 60
+
+    # 指南阅读进度：查看记录在内存中合并，每隔这么多秒批量写入一次；
+    # 积压超过 GUIDE_PROGRESS_MAX_PENDING 条时立即写入
+    GUIDE_PROGRESS_FLUSH_SECONDS: float = 5.0
+    GUIDE_PROGRESS_MAX_PENDING: int = 5000
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,90 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, List, Tuple
+import base64
+import hashlib
+import hmac
+import json
+
+from app.core.config import settings
+
+SIGNATURE_BYTES = 16
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CountMode(str, Enum):
+    """
+    列表接口可选的总数：exact 在同一条查询里用 count(*) OVER () 精确计数，
+    estimated 对整表列表读取 pg_class.reltuples 估算（无法估算时退回 exact）。
+    """
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise InvalidCursor("Invalid cursor")
+    return value
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(
+        settings.SECRET_KEY.encode(), payload, hashlib.sha256
+    ).digest()[:SIGNATURE_BYTES]
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def encode_cursor(key: str, values: List[Any], position: int = 0) -> str:
+    """
+    把排序键名、最后一行的排序值和已翻过的行数编码为签名的不透明游标。
+    """
+    payload = json.dumps(
+        [key, [_encode_value(value) for value in values], position], separators=(",", ":")
+    ).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, key: str) -> Tuple[List[Any], int]:
+    """
+    校验签名并还原 (排序值, 已翻过的行数)；游标被篡改或属于其他排序方式时抛出 InvalidCursor。
+    """
+    try:
+        payload_part, signature_part = cursor.split(".", 1)
+        payload = _b64decode(payload_part)
+        signature = _b64decode(signature_part)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise InvalidCursor("Invalid cursor")
+
+    try:
+        cursor_key, values, position = json.loads(payload)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if cursor_key != key:
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    if not isinstance(values, list) or not isinstance(position, int) or position < 0:
+        raise InvalidCursor("Invalid cursor")
+    return [_decode_value(value) for value in values], position
@@ -0,0 +1,178 @@
+from threading import Lock
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import logging
+import math
+import time
+
+from fastapi import HTTPException, Request, status
+
+from app.core.redis import InMemoryRedis, redis_client
+from app.utils.sms import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+
+class LimitRule(NamedTuple):
+    """
+    令牌桶规则：按 by（"ip" 或 "phone"）区分调用方，每 period 秒最多 limit 次。
+    """
+    by: str
+    limit: int
+    period: int
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.period
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    retry_after: float
+
+
+# 所有桶都有足够令牌时才一起扣减，保证多条规则的检查与扣减是原子的。
+# 时间取 Redis 服务器的 TIME，各 worker 的时钟偏差不影响回填。
+# KEYS: 桶的键; ARGV: 每个键依次为 capacity, rate, ttl
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local current = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    current = math.min(capacity, current + math.max(0, now - ts) * rate)
+    tokens[i] = current
+    if current < 1 then
+        retry_after = math.max(retry_after, (1 - current) / rate)
+    end
+end
+local allowed = retry_after == 0
+for i, key in ipairs(KEYS) do
+    local current = tokens[i]
+    if allowed then
+        current = current - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(current), 'ts', tostring(now))
+    redis.call('EXPIRE', key, tonumber(ARGV[i * 3]))
+end
+if allowed then
+    return {1, '0'}
+end
+return {0, tostring(retry_after)}
+"""
+
+
+def _bucket_ttl(rule: LimitRule) -> int:
+    # 桶完全回满所需的时间之后就可以丢弃
+    return int(math.ceil(rule.period)) + 1
+
+
+class RedisRateLimiter:
+    """
+    基于 Redis Lua 脚本的令牌桶，一次往返完成所有规则的检查和扣减。
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, buckets: Sequence[Tuple[str, LimitRule]]) -> RateLimitResult:
+        keys = [key for key, _ in buckets]
+        args: List[Any] = []
+        for _, rule in buckets:
+            args.extend([rule.limit, rule.rate, _bucket_ttl(rule)])
+        allowed, retry_after = await self._script(keys=keys, args=args)
+        return RateLimitResult(bool(int(allowed)), float(retry_after))
+
+
+class MemoryRateLimiter:
+    """
+    进程内令牌桶，语义与 RedisRateLimiter 相同，用于测试和单节点部署。
+    """
+
+    SWEEP_EVERY = 1000
+
+    def __init__(self) -> None:
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = Lock()
+        self._calls = 0
+
+    def _sweep(self, now: float) -> None:
+        expired = [key for key, (_, _, expires_at) in self._buckets.items() if expires_at <= now]
+        for key in expired:
+            del self._buckets[key]
+
+    async def hit(self, buckets: Sequence[Tuple[str, LimitRule]]) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.SWEEP_EVERY == 0:
+                self._sweep(now)
+
+            tokens = []
+            retry_after = 0.0
+            for key, rule in buckets:
+                current, ts, _ = self._buckets.get(key, (rule.limit, now, 0.0))
+                current = min(rule.limit, current + (now - ts) * rule.rate)
+                tokens.append(current)
+                if current < 1:
+                    retry_after = max(retry_after, (1 - current) / rule.rate)
+
+            allowed = retry_after == 0
+            for (key, rule), current in zip(buckets, tokens):
+                if allowed:
+                    current -= 1
+                self._buckets[key] = (current, now, now + _bucket_ttl(rule))
+        return RateLimitResult(allowed, retry_after)
+
+
+def create_rate_limiter(client: Any) -> Any:
+    if isinstance(client, InMemoryRedis):
+        return MemoryRateLimiter()
+    return RedisRateLimiter(client)
+
+
+limiter = create_rate_limiter(redis_client)
+
+
+def _identity(request: Request, by: str) -> Optional[str]:
+    if by == "ip":
+        return request.client.host if request.client else None
+    value = request.query_params.get(by) or request.path_params.get(by)
+    if by == "phone":
+        # 与接口使用同一个规范化的手机号；格式不对的请求不建桶，只受 IP 规则限制，随后由接口返回 400
+        return normalize_phone(value)
+    return value
+
+
+def rate_limit(scope: str, *rules: LimitRule) -> Callable:
+    """
+    生成 FastAPI 依赖：按 scope + 规则 + 调用方标识限流，超限时返回 429。
+    同一 scope 可被多个路由共用，从而共享同一组令牌桶。
+    """
+    async def dependency(request: Request) -> None:
+        buckets = []
+        for rule in rules:
+            ident = _identity(request, rule.by)
+            if ident is None:
+                continue
+            key = f"ratelimit:{scope}:{rule.by}:{rule.limit}/{rule.period}:{ident}"
+            buckets.append((key, rule))
+        if not buckets:
+            return
+
+        result = await limiter.hit(buckets)
+        if not result.allowed:
+            retry_after = max(1, int(math.ceil(result.retry_after)))
+            logger.warning(f"Rate limit exceeded for {scope} from {_identity(request, 'ip')}")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Too many requests, please retry after {retry_after} seconds",
+                headers={"Retry-After": str(retry_after)},
+            )
+
+    return dependency
@@ -0,0 +1,215 @@
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEMORY_URL = "memory://"
+
+
+class InMemoryRedis:
+    """
+    Redis 的进程内替代实现，接口与 redis.asyncio.Redis 中用到的子集一致。
+    用于测试和单节点部署；所有值都以字符串保存（等同 decode_responses=True）。
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+        self._lock = Lock()
+
+    # 内部方法：调用方需已持有锁
+    def _alive(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at = item[1]
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    def _set(
+        self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False
+    ) -> Optional[bool]:
+        if nx and self._alive(key) is not None:
+            return None
+        expires_at = time.monotonic() + ex if ex else None
+        self._data[key] = (str(value), expires_at)
+        return True
+
+    def _get(self, key: str) -> Optional[str]:
+        item = self._alive(key)
+        return item[0] if item else None
+
+    def _mget(self, *keys: str) -> List[Optional[str]]:
+        return [self._get(key) for key in keys]
+
+    def _setex(self, key: str, seconds: int, value: Any) -> bool:
+        return self._set(key, value, ex=seconds)
+
+    def _delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self._alive(key) is not None:
+                del self._data[key]
+                removed += 1
+        return removed
+
+    def _incr(self, key: str, amount: int = 1) -> int:
+        item = self._alive(key)
+        if item is None:
+            value, expires_at = amount, None
+        else:
+            try:
+                value = int(item[0]) + amount
+            except ValueError:
+                raise ValueError("value is not an integer or out of range")
+            expires_at = item[1]
+        self._data[key] = (str(value), expires_at)
+        return value
+
+    def _expire(self, key: str, seconds: int) -> bool:
+        item = self._alive(key)
+        if item is None:
+            return False
+        self._data[key] = (item[0], time.monotonic() + seconds)
+        return True
+
+    def _ttl(self, key: str) -> int:
+        item = self._alive(key)
+        if item is None:
+            return -2
+        if item[1] is None:
+            return -1
+        return max(0, int(round(item[1] - time.monotonic())))
+
+    def _call(self, name: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return getattr(self, f"_{name}")(*args, **kwargs)
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._call("get", key)
+
+    async def mget(self, *keys: str) -> List[Optional[str]]:
+        return self._call("mget", *keys)
+
+    async def set(
+        self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False
+    ) -> Optional[bool]:
+        return self._call("set", key, value, ex, nx)
+
+    async def setex(self, key: str, seconds: int, value: Any) -> bool:
+        return self._call("setex", key, seconds, value)
+
+    async def delete(self, *keys: str) -> int:
+        return self._call("delete", *keys)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return self._call("incr", key, amount)
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        return self._call("expire", key, seconds)
+
+    async def ttl(self, key: str) -> int:
+        return self._call("ttl", key)
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        return InMemoryPipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def flushdb(self) -> bool:
+        with self._lock:
+            self._data.clear()
+        return True
+
+    async def aclose(self) -> None:
+        pass
+
+
+class InMemoryPipeline:
+    """
+    缓冲命令并在 execute() 时一次性（原子地）执行，行为与 redis 事务管道一致。
+    """
+
+    def __init__(self, client: InMemoryRedis) -> None:
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def _queue(self, name: str, *args: Any, **kwargs: Any) -> "InMemoryPipeline":
+        self._commands.append((name, args, kwargs))
+        return self
+
+    def get(self, key: str) -> "InMemoryPipeline":
+        return self._queue("get", key)
+
+    def mget(self, *keys: str) -> "InMemoryPipeline":
+        return self._queue("mget", *keys)
+
+    def set(
+        self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False
+    ) -> "InMemoryPipeline":
+        return self._queue("set", key, value, ex, nx)
+
+    def setex(self, key: str, seconds: int, value: Any) -> "InMemoryPipeline":
+        return self._queue("setex", key, seconds, value)
+
+    def delete(self, *keys: str) -> "InMemoryPipeline":
+        return self._queue("delete", *keys)
+
+    def incr(self, key: str, amount: int = 1) -> "InMemoryPipeline":
+        return self._queue("incr", key, amount)
+
+    def expire(self, key: str, seconds: int) -> "InMemoryPipeline":
+        return self._queue("expire", key, seconds)
+
+    def ttl(self, key: str) -> "InMemoryPipeline":
+        return self._queue("ttl", key)
+
+    async def execute(self) -> List[Any]:
+        client = self._client
+        results = []
+        with client._lock:
+            for name, args, kwargs in self._commands:
+                results.append(getattr(client, f"_{name}")(*args, **kwargs))
+        self._commands = []
+        return results
+
+    async def reset(self) -> None:
+        self._commands = []
+
+    async def __aenter__(self) -> "InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.reset()
+
+
+def create_redis_client(url: str = None) -> Any:
+    """
+    根据 URL 创建客户端：memory:// 使用进程内实现，其余使用带连接池的 redis.asyncio 客户端。
+    """
+    url = url or settings.REDIS_URL
+    if url.startswith(MEMORY_URL):
+        logger.info("Using in-memory Redis stand-in")
+        return InMemoryRedis()
+
+    import redis.asyncio as aioredis
+
+    pool = aioredis.ConnectionPool.from_url(
+        url,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        decode_responses=True,
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
+redis_client = create_redis_client()
+
+
+async def close_redis() -> None:
+    await redis_client.aclose()
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
+import uuid
 
 from jose import jwt
 from passlib.context import CryptContext
@@ -8,14 +9,40 @@ from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# 令牌主体的类型（pt 声明）：管理后台用户（users 表）和 App 用户（app_users 表）的 id 互相独立
+USER_PRINCIPAL = "user"
+APP_USER_PRINCIPAL = "app_user"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _encode_token(
+    subject: Union[str, Any], token_type: str, expire: datetime, family: str, principal: str
+) -> Tuple[str, str]:
+    jti = uuid.uuid4().hex
+    to_encode = {
+        "exp": expire,
+        "iat": datetime.utcnow(),
+        "sub": str(subject),
+        "type": token_type,
+        "jti": jti,
+        "fam": family,
+        "pt": principal,
+    }
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return encoded_jwt, jti
+
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    family: Optional[str] = None,
+    principal: str = USER_PRINCIPAL,
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -23,6 +50,41 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt, _ = _encode_token(
+        subject, ACCESS_TOKEN_TYPE, expire, family or uuid.uuid4().hex, principal
+    )
     return encoded_jwt
+
+def create_refresh_token(
+    subject: Union[str, Any],
+    family: str,
+    expires_delta: timedelta = None,
+    principal: str = USER_PRINCIPAL,
+) -> str:
+    """
+    刷新令牌与同一登录会话（family）内的访问令牌共享 fam，便于整体吊销。
+    """
+    if expires_delta:
+        expire = datetime.utcnow() + expires_delta
+    else:
+        expire = datetime.utcnow() + timedelta(
+            days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+        )
+    encoded_jwt, _ = _encode_token(subject, REFRESH_TOKEN_TYPE, expire, family, principal)
+    return encoded_jwt
+
+def create_token_pair(
+    subject: Union[str, Any], family: Optional[str] = None, principal: str = USER_PRINCIPAL
+) -> Dict[str, str]:
+    """
+    签发一组访问令牌 + 刷新令牌；family 为空时开启新的登录会话。
+    """
+    family = family or uuid.uuid4().hex
+    return {
+        "access_token": create_access_token(subject, family=family, principal=principal),
+        "refresh_token": create_refresh_token(subject, family=family, principal=principal),
+        "token_type": "bearer",
+    }
+
+def decode_token(token: str) -> Dict[str, Any]:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
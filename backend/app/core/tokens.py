@@ -0,0 +1,71 @@
+from typing import Any, Dict, Optional
+import time
+
+from app.core import security
+from app.core.config import settings
+from app.core.redis import redis_client
+
+# 吊销记录只需保留到对应令牌自然过期为止，取刷新令牌的最长有效期
+REVOCATION_TTL = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+
+
+def _family_key(family: str) -> str:
+    return f"auth:revoked:fam:{family}"
+
+
+def _user_key(principal: Any, user_id: Any) -> str:
+    # 管理后台用户和 App 用户的 id 会重复，键中带上主体类型
+    return f"auth:revoked:{principal}:{user_id}"
+
+
+def _used_refresh_key(jti: str) -> str:
+    return f"auth:refresh:used:{jti}"
+
+
+async def is_revoked(payload: Dict[str, Any]) -> bool:
+    """
+    检查令牌所属会话或用户是否已被吊销，一次 MGET 完成。
+    """
+    family = payload.get("fam")
+    keys = [_user_key(payload.get("pt"), payload.get("sub"))]
+    if family:
+        keys.append(_family_key(family))
+    values = await redis_client.mget(*keys)
+
+    # iat 是整数秒，吊销时间也按整数秒记录；同一秒内吊销后重新登录签发的令牌仍然有效
+    revoked_before = values[0]
+    if revoked_before is not None and payload.get("iat", 0) < int(revoked_before):
+        return True
+    return len(values) > 1 and values[1] is not None
+
+
+async def revoke_family(family: str) -> None:
+    """
+    吊销一个登录会话内签发的所有访问令牌和刷新令牌（退出登录）。
+    """
+    await redis_client.setex(_family_key(family), REVOCATION_TTL, "1")
+
+
+async def revoke_user(user_id: Any, principal: str = security.USER_PRINCIPAL) -> None:
+    """
+    吊销某个用户此刻之前签发的所有令牌（停用、删除账号等）；
+    principal 区分管理后台用户和 App 用户。
+    """
+    await redis_client.setex(
+        _user_key(principal, user_id), REVOCATION_TTL, str(int(time.time()))
+    )
+
+
+async def consume_refresh_token(payload: Dict[str, Any]) -> Optional[str]:
+    """
+    标记刷新令牌已使用并返回其会话 family；令牌被重复使用时视为泄露，
+    吊销整个会话并返回 None。
+    """
+    ttl = max(1, int(payload["exp"] - time.time()))
+    first_use = await redis_client.set(
+        _used_refresh_key(payload["jti"]), "1", ex=ttl, nx=True
+    )
+    if not first_use:
+        await revoke_family(payload["fam"])
+        return None
+    return payload["fam"]
@@ -1,5 +1,8 @@
 from .user import user
 from .activity import activity
+from .activity_series import activity_series
 from .guide import guide
-from .health import health
+from .guide_progress import guide_progress
+from .health import health_record, health_alert
 from .pet import pet
+from .crud_app_user import app_user
@@ -0,0 +1,168 @@
+from typing import Any, Dict, List, Optional, Sequence
+from datetime import datetime, timedelta
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
+from sqlalchemy import and_, or_
+
+from app.crud.base import CRUDBase
+from app.models.activity import Activity, ActivitySeries
+from app.schemas.activity import ActivitySeriesCreate
+from app.utils.geo import encode_geohash
+from app.utils.recurrence import last_occurrence, occurrences, parse_rrule
+
+# 与 ActivitySeriesBase.duration_minutes 的上限一致
+MAX_DURATION = timedelta(days=1)
+
+
+class NotAnOccurrence(Exception):
+    pass
+
+
+def series_offset(series: ActivitySeries) -> timedelta:
+    return timedelta(minutes=series.utc_offset_minutes or 0)
+
+
+class CRUDActivitySeries(CRUDBase[ActivitySeries, ActivitySeriesCreate, ActivitySeriesCreate]):
+    def create_with_organizer(
+        self,
+        db: Session,
+        *,
+        obj_in: ActivitySeriesCreate,
+        organizer_id: int,
+        utc_offset: timedelta = timedelta(0)
+    ) -> ActivitySeries:
+        """
+        obj_in.dtstart 为不带时区的 UTC 时间，utc_offset 为组织者所在的 UTC 偏移。
+        """
+        rule = parse_rrule(obj_in.rrule)
+        db_obj = ActivitySeries(
+            **obj_in.model_dump(),
+            utc_offset_minutes=int(utc_offset.total_seconds()) // 60,
+            until=last_occurrence(rule, obj_in.dtstart, utc_offset),
+            organizer_id=organizer_id
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def query_overlapping(self, db: Session, *, start: datetime, end: datetime) -> Query:
+        """
+        可能在 [start, end) 内有某一次的周期活动。
+        """
+        return db.query(self.model).filter(
+            ActivitySeries.dtstart < end,
+            or_(ActivitySeries.until.is_(None), ActivitySeries.until > start - MAX_DURATION),
+        )
+
+    def occurrence_values(self, series: ActivitySeries, occurrence_start: datetime) -> Dict[str, Any]:
+        """
+        某一次活动的列值：从周期活动复制，开始时间为 occurrence_start。
+        """
+        return {
+            "title": series.title,
+            "description": series.description,
+            "location": series.location,
+            "latitude": series.latitude,
+            "longitude": series.longitude,
+            "max_participants": series.max_participants,
+            "is_online": series.is_online,
+            "category": series.category,
+            "status": "scheduled",
+            "participant_count": 0,
+            "start_time": occurrence_start,
+            "end_time": occurrence_start + timedelta(minutes=series.duration_minutes),
+            "organizer_id": series.organizer_id,
+            "series_id": series.id,
+            "occurrence_start": occurrence_start,
+        }
+
+    def expand(
+        self,
+        db: Session,
+        *,
+        start: datetime,
+        end: datetime,
+        fields: Sequence[str],
+        series_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        把周期活动展开为与 [start, end) 重叠、尚未物化的各次活动，只生成这个窗口内的。
+        已物化的那一次是普通的 Activity 行，由活动查询返回，这里跳过。
+        结果是与 get_page 投影相同形状的 dict（id 为空），按开始时间排序。
+        """
+        query = self.query_overlapping(db, start=start, end=end)
+        if series_id is not None:
+            query = query.filter(ActivitySeries.id == series_id)
+        series_list = query.all()
+        if not series_list:
+            return []
+        materialized = set(
+            db.query(Activity.series_id, Activity.occurrence_start)
+            .filter(
+                Activity.series_id.in_([series.id for series in series_list]),
+                Activity.occurrence_start >= start - MAX_DURATION,
+                Activity.occurrence_start < end,
+            )
+            .execution_options(include_deleted=True)
+            .all()
+        )
+
+        # 未物化的一次没有 id，始终带上 series_id 和 occurrence_start 供报名使用
+        keys = {"id", "series_id", "occurrence_start", "start_time", "end_time", *fields}
+        results = []
+        for series in series_list:
+            duration = timedelta(minutes=series.duration_minutes)
+            rule = parse_rrule(series.rrule)
+            for occurrence_start in occurrences(
+                rule, series.dtstart, start - duration, end, series_offset(series)
+            ):
+                if (series.id, occurrence_start) in materialized:
+                    continue
+                if occurrence_start + duration <= start:
+                    continue
+                values = self.occurrence_values(series, occurrence_start)
+                values.update(id=None, is_participant=False)
+                results.append({key: values[key] for key in keys if key in values})
+        results.sort(key=lambda item: item["start_time"])
+        return results
+
+    def materialize(
+        self, db: Session, *, series: ActivitySeries, occurrence_start: datetime
+    ) -> Optional[Activity]:
+        """
+        把某一次物化为 Activity 行（已存在则直接返回），用于报名。
+        INSERT ... ON CONFLICT DO NOTHING 依赖 (series_id, occurrence_start) 唯一约束，
+        并发报名同一次只会产生一行。occurrence_start 不是规则中的某一次时抛出
+        NotAnOccurrence；这一次已被删除（组织者取消）时返回 None。
+        """
+        rule = parse_rrule(series.rrule)
+        window_end = occurrence_start + timedelta(microseconds=1)
+        found = occurrences(
+            rule, series.dtstart, occurrence_start, window_end, series_offset(series)
+        )
+        if found != [occurrence_start]:
+            raise NotAnOccurrence()
+
+        values = self.occurrence_values(series, occurrence_start)
+        if values["latitude"] is not None and values["longitude"] is not None:
+            # 批量 INSERT 不触发 ORM 事件，geohash 在这里补上
+            values["geohash"] = encode_geohash(values["latitude"], values["longitude"])
+        now = datetime.utcnow()
+        dialect = db.get_bind().dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        db.execute(
+            insert(Activity)
+            .values(**values, created_at=now, updated_at=now)
+            .on_conflict_do_nothing(index_elements=[Activity.series_id, Activity.occurrence_start])
+        )
+        db.commit()
+        return db.query(Activity).filter(
+            and_(
+                Activity.series_id == series.id,
+                Activity.occurrence_start == occurrence_start
+            )
+        ).first()
+
+
+activity_series = CRUDActivitySeries(ActivitySeries)
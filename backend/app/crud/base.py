@@ -1,33 +1,220 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 
-from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, func, insert, inspect, text, tuple_, update
+from sqlalchemy.orm import MANYTOONE, Query, Session
 
-from app.db.base_class import Base
+from app.core.pagination import CountMode, InvalidCursor, decode_cursor, encode_cursor
+from app.crud.cache import CACHE_IDS_OPTION, model_cache
+from app.db.base_class import Base, SoftDeleteMixin
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# get_page 计数时窗口函数列的标签
+TOTAL_LABEL = "_total"
+
+
+def column_keys(model: Type[Base]) -> FrozenSet[str]:
+    """
+    模型的列属性名集合，直接读取 mapper，无需序列化实例或触发关系加载。
+    """
+    return frozenset(inspect(model).columns.keys())
+
+
+def needs_orm_delete(model: Type[Base]) -> bool:
+    """
+    删除时需要 ORM 处理关联行的模型：一对多或多对多关系会被级联删除、delete-orphan，
+    或者子表外键被置空。这些行为 DELETE 语句不会执行；passive_deletes 的关系交给数据库的
+    ON DELETE 处理，不算在内。
+    """
+    return any(
+        rel.direction is not MANYTOONE and not rel.viewonly and not rel.passive_deletes
+        for rel in inspect(model).relationships
+    )
+
+
+def dump_create(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    return obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+
+
+def dump_update(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+    return obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+
+
+def apply_update(db_obj: Any, update_data: Dict[str, Any], columns: FrozenSet[str]) -> None:
+    for field in columns.intersection(update_data):
+        setattr(db_obj, field, update_data[field])
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    # 批量操作每条语句处理的行数
+    bulk_chunk_size: int = 1000
+
+    def __init__(self, model: Type[ModelType], *, cache: bool = False):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
+
+        cache=True 时 get/get_multi 走读穿透缓存，提交写入后自动失效。
         """
         self.model = model
+        self.columns = column_keys(model)
+        self.soft_delete = issubclass(model, SoftDeleteMixin)
+        self.orm_delete = not self.soft_delete and needs_orm_delete(model)
+        self.cache = model_cache(model) if cache else None
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        if self.cache is not None:
+            values = self.cache.get(id)
+            if values is not None:
+                return self.cache.attach(db, values)
+        obj = db.query(self.model).filter(self.model.id == id).first()
+        if obj is not None and self.cache is not None:
+            values = self.cache.dump(obj)
+            if values is not None:
+                self.cache.set(id, values)
+        return obj
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        if self.cache is not None:
+            rows = self.cache.get_list(skip, limit)
+            if rows is not None:
+                return [self.cache.attach(db, values) for values in rows]
+        objs = db.query(self.model).offset(skip).limit(limit).all()
+        if self.cache is not None:
+            rows = [self.cache.dump(obj) for obj in objs]
+            if None not in rows:
+                self.cache.set_list(skip, limit, rows)
+        return objs
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        query: Optional[Query] = None,
+        order_by: Any = None,
+        descending: bool = False,
+        fields: Optional[Sequence[str]] = None,
+        count: Optional[CountMode] = None,
+        computed: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Any], Optional[str], Optional[int]]:
+        """
+        键集（游标）分页：按 (order_by, id) 排序，从游标之后取 limit 行。
+        开销与翻页深度无关，并发插入时也不会出现重复或遗漏的行。
+        传入 fields 时只查询这些列（以及排序列），返回 dict 而不是 ORM 实体；
+        fields 中可以包含 computed 里的派生字段。
+        count 指定时同时返回总数（见 CountMode），不额外扫描表。
+        返回 (本页数据, 下一页游标, 总数)，没有下一页时游标为 None，未要求总数时总数为 None。
+        """
+        total = None
+        if count == CountMode.ESTIMATED and query is None:
+            total = self.estimate_count(db)
+        window_count = count is not None and total is None
+
+        if query is None:
+            query = db.query(self.model)
+        sort_columns = [self.model.id]
+        if order_by is not None and order_by is not self.model.id:
+            sort_columns.insert(0, order_by)
+        if fields is not None:
+            query = query.with_entities(*self.projection(fields, sort_columns, computed))
+        key = ",".join(column.key for column in sort_columns)
+        if descending:
+            key += ":desc"
+
+        position = 0
+        if cursor:
+            values, position = decode_cursor(cursor, key)
+            if len(values) != len(sort_columns):
+                raise InvalidCursor("Invalid cursor")
+            if len(sort_columns) == 1:
+                row, after = sort_columns[0], values[0]
+            else:
+                row, after = tuple_(*sort_columns), tuple_(*values)
+            query = query.filter(row < after if descending else row > after)
+
+        if window_count:
+            # 窗口函数在 WHERE 之后、LIMIT 之前计算，得到游标之后剩余的行数
+            query = query.add_columns(func.count().over().label(TOTAL_LABEL))
+        query = query.order_by(
+            *(column.desc() if descending else column.asc() for column in sort_columns)
+        )
+        items = query.limit(limit + 1).all()
+        if window_count:
+            total = position + (getattr(items[0], TOTAL_LABEL) if items else 0)
+            if fields is None:
+                items = [row[0] for row in items]
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(
+                key, [getattr(last, column.key) for column in sort_columns], position + limit
+            )
+        if fields is not None:
+            # 响应模型按属性读取 Row 时，未投影的字段每次都会抛出并捕获
+            # AttributeError；转换成 dict 后缺失字段直接取默认值
+            items = [row._asdict() for row in items]
+            if window_count:
+                for item in items:
+                    del item[TOTAL_LABEL]
+        return items, next_cursor, total
+
+    def estimate_count(self, db: Session) -> Optional[int]:
+        """
+        从 pg_class.reltuples 读取整表行数的估算值（由 ANALYZE/autovacuum 维护），
+        只查系统表，不扫描数据；非 PostgreSQL 或从未分析过的表返回 None。
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+            {"table": self.model.__tablename__},
+        ).scalar()
+        if estimate is None or estimate < 0:
+            return None
+        return estimate
+
+    def projection(
+        self,
+        fields: Sequence[str],
+        required: Sequence[Any] = (),
+        computed: Optional[Dict[str, Any]] = None
+    ) -> List[Any]:
+        """
+        把字段名转换为要 SELECT 的列，必需的列（主键、排序列）总会带上。
+        computed 为 {字段名: SQL 表达式}，用于在同一条查询里算出的派生字段。
+        """
+        computed = computed or {}
+        unknown = set(fields) - self.columns - computed.keys()
+        if unknown:
+            raise ValueError(f"Unknown columns for {self.model.__name__}: {sorted(unknown)}")
+        columns = list(required)
+        keys = {column.key for column in columns}
+        for field in fields:
+            if field in keys:
+                continue
+            if field in computed:
+                columns.append(computed[field].label(field))
+            else:
+                columns.append(getattr(self.model, field))
+            keys.add(field)
+        return columns
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data = dump_create(obj_in)
         db_obj = self.model(**obj_in_data)  # type: ignore
         db.add(db_obj)
         db.commit()
@@ -41,21 +228,129 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        apply_update(db_obj, dump_update(obj_in), self.columns)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
+    def remove(
+        self, db: Session, *, id: Any = None, db_obj: Optional[ModelType] = None
+    ) -> Optional[ModelType]:
+        """
+        一条语句删除一行并返回它：DELETE ... RETURNING，软删除模型为
+        UPDATE ... SET deleted_at RETURNING。已加载的对象可直接传入 db_obj，
+        不会再查询一次，也不会为级联加载关系。
+        有一对多关系的硬删除模型（见 needs_orm_delete）仍用 db.delete，
+        由 ORM 级联删除或置空关联行。
+        """
+        if self.orm_delete:
+            obj = db_obj if db_obj is not None else db.get(self.model, id)
+            if obj is None:
+                return None
+            db.delete(obj)
+            db.commit()
+            return obj
+        if db_obj is not None:
+            id = db_obj.id
+        if self.soft_delete:
+            stmt = (
+                update(self.model)
+                .where(self.model.id == id, self.model.deleted_at.is_(None))
+                .values(deleted_at=datetime.utcnow())
+            )
+        else:
+            stmt = delete(self.model).where(self.model.id == id)
+        obj = db.scalars(
+            stmt.returning(self.model),
+            execution_options={"populate_existing": True, CACHE_IDS_OPTION: [id]},
+        ).first()
+        if obj is not None and obj in db:
+            # RETURNING 已带回所有列，脱离会话以免 commit 后再次 SELECT
+            db.expunge(obj)
         db.commit()
         return obj
+
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        extra_fields: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None
+    ) -> List[ModelType]:
+        """
+        批量插入，每批一条 INSERT ... RETURNING（executemany），整体一个事务。
+        extra_fields 会合并到每一行（例如 creator_id）。
+        """
+        rows = []
+        for obj_in in objs_in:
+            data = dump_create(obj_in)
+            if extra_fields:
+                data = {**data, **extra_fields}
+            rows.append({key: value for key, value in data.items() if key in self.columns})
+
+        db_objs: List[ModelType] = []
+        stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        for chunk in _chunks(rows, chunk_size or self.bulk_chunk_size):
+            db_objs.extend(db.scalars(stmt, chunk).all())
+        # RETURNING 已带回所有列，脱离会话以免 commit 后逐行重新加载
+        for db_obj in db_objs:
+            db.expunge(db_obj)
+        db.commit()
+        return db_objs
+
+    def update_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Dict[Any, Union[UpdateSchemaType, Dict[str, Any]]],
+        chunk_size: Optional[int] = None
+    ) -> None:
+        """
+        按主键批量更新，objs_in 为 {id: 更新内容}；每批一条 executemany UPDATE，整体一个事务。
+        """
+        rows = []
+        for id, obj_in in objs_in.items():
+            data = dump_update(obj_in)
+            row = {key: value for key, value in data.items() if key in self.columns}
+            row["id"] = id
+            rows.append(row)
+
+        for chunk in _chunks(rows, chunk_size or self.bulk_chunk_size):
+            db.execute(
+                update(self.model),
+                chunk,
+                execution_options={CACHE_IDS_OPTION: [row["id"] for row in chunk]},
+            )
+        db.commit()
+
+    def remove_many(
+        self, db: Session, *, ids: Sequence[Any], chunk_size: Optional[int] = None
+    ) -> int:
+        """
+        按主键批量删除（软删除模型为批量写 deleted_at），每批一条语句，返回删除的行数。
+        需要 ORM 处理关联行的模型与 remove 一样逐个 db.delete。
+        """
+        ids = list(ids)
+        deleted = 0
+        for chunk in _chunks(ids, chunk_size or self.bulk_chunk_size):
+            if self.orm_delete:
+                objs = db.query(self.model).filter(self.model.id.in_(chunk)).all()
+                for obj in objs:
+                    db.delete(obj)
+                deleted += len(objs)
+                continue
+            if self.soft_delete:
+                stmt = (
+                    update(self.model)
+                    .where(self.model.id.in_(chunk), self.model.deleted_at.is_(None))
+                    .values(deleted_at=datetime.utcnow())
+                )
+            else:
+                stmt = delete(self.model).where(self.model.id.in_(chunk))
+            deleted += db.execute(
+                stmt, execution_options={CACHE_IDS_OPTION: chunk}
+            ).rowcount
+        db.commit()
+        return deleted
@@ -0,0 +1,379 @@
+from collections import OrderedDict
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal
+from itertools import chain
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Type
+import hashlib
+import logging
+import time
+
+import orjson
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.db.base_class import Base
+
+logger = logging.getLogger(__name__)
+
+# 本事务内需要在提交后失效的缓存：{ModelCache: 主键集合或 None（整个模型）}
+PENDING_KEY = "model_cache_pending"
+
+# UPDATE/DELETE 语句的执行选项：声明语句只影响这些主键，只失效对应条目
+CACHE_IDS_OPTION = "model_cache_ids"
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    进程内 LRU 缓存，条目带过期时间，线程安全。
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def _create_redis_tier() -> Any:
+    if not settings.MODEL_CACHE_REDIS_URL:
+        return None
+    import redis
+
+    return redis.Redis.from_url(
+        settings.MODEL_CACHE_REDIS_URL,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        socket_timeout=0.5,
+    )
+
+
+# 可选的共享二级缓存；CRUD 层是同步代码，这里使用同步 Redis 客户端
+redis_tier = _create_redis_tier()
+
+_caches: Dict[Type[Base], "ModelCache"] = {}
+
+# Redis 中按 JSON 存储列值；orjson 原生输出 datetime/date/time 的 ISO 格式，
+# 读取时按列类型还原，Decimal 以字符串保存
+_DECODERS: Dict[type, Callable[[Any], Any]] = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time_of_day: time_of_day.fromisoformat,
+    Decimal: Decimal,
+}
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not cacheable: {type(value).__name__}")
+
+
+def _column_decoders(mapper: Any) -> Dict[str, Callable[[Any], Any]]:
+    decoders = {}
+    for key, column in mapper.columns.items():
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            continue
+        decoder = _DECODERS.get(python_type)
+        if decoder is not None:
+            decoders[key] = decoder
+    return decoders
+
+
+class ModelCache:
+    """
+    单个模型的读穿透缓存，按列值 dict 存储，命中时重建为会话内的持久化对象。
+
+    键中带有列结构版本和两个代数：实体代数（批量 UPDATE/DELETE 后整体失效）
+    和列表代数（任意写入后失效 get_multi 结果）。启用 Redis 二级缓存时，
+    本地条目和代数只保留 MODEL_CACHE_LOCAL_TTL_SECONDS 秒，其他进程的写入
+    最多在这段时间后可见。
+    """
+
+    def __init__(
+        self,
+        model: Type[Base],
+        *,
+        ttl: Optional[int] = None,
+        maxsize: Optional[int] = None,
+    ) -> None:
+        self.model = model
+        self.name = model.__tablename__
+        self.ttl = ttl or settings.MODEL_CACHE_TTL_SECONDS
+        self.redis = redis_tier
+        local_ttl = self.ttl
+        if self.redis is not None:
+            local_ttl = min(local_ttl, settings.MODEL_CACHE_LOCAL_TTL_SECONDS)
+        self.local = LRUCache(maxsize or settings.MODEL_CACHE_MAX_ENTRIES, local_ttl)
+
+        self.mapper = inspect(model)
+        self.columns = list(self.mapper.columns.keys())
+        self.decoders = _column_decoders(self.mapper)
+        # 列结构或存储格式变化（迁移后部署）时自动换用新键，不会读到旧的缓存
+        self.version = hashlib.sha1(
+            ("json:" + ",".join(self.columns)).encode()
+        ).hexdigest()[:8]
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        _caches[model] = self
+
+    # 代数
+
+    def _generation_key(self, kind: str) -> str:
+        return f"cache:{self.name}:gen:{kind}"
+
+    def _generation(self, kind: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._generations.get(kind)
+            if cached is not None and (self.redis is None or cached[1] > now):
+                return cached[0]
+        value = 0
+        if self.redis is not None:
+            value = int(self._redis_call("get", self._generation_key(kind)) or 0)
+        with self._lock:
+            self._generations[kind] = (value, now + self.local.ttl)
+        return value
+
+    def _bump(self, kind: str) -> None:
+        if self.redis is not None:
+            value = self._redis_call("incr", self._generation_key(kind))
+            if value is not None:
+                with self._lock:
+                    self._generations[kind] = (int(value), time.monotonic() + self.local.ttl)
+                return
+        with self._lock:
+            value = self._generations.get(kind, (0, 0.0))[0] + 1
+            self._generations[kind] = (value, float("inf"))
+
+    def _prefix(self) -> str:
+        return f"cache:{self.name}:{self.version}:{self._generation('e')}"
+
+    def _entity_key(self, id: Any) -> str:
+        return f"{self._prefix()}:id:{id}"
+
+    def _list_key(self, skip: int, limit: int) -> str:
+        return f"{self._prefix()}.{self._generation('l')}:list:{skip}:{limit}"
+
+    # 两级读写
+
+    def _redis_call(self, method: str, *args: Any) -> Any:
+        # Redis 不可用时退化为只用本地缓存，不影响请求
+        try:
+            return getattr(self.redis, method)(*args)
+        except Exception as exc:
+            logger.warning(f"Model cache redis {method} failed: {exc}")
+            return None
+
+    def _load(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is _MISSING and self.redis is not None:
+            raw = self._redis_call("get", key)
+            if raw is not None:
+                try:
+                    value = self.decode(raw)
+                except ValueError as exc:
+                    logger.warning(f"Model cache entry {key} is unreadable: {exc}")
+                else:
+                    self.local.set(key, value)
+        if value is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _store(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.redis is not None:
+            self._redis_call("setex", key, self.ttl, self.encode(value))
+
+    def get(self, id: Any) -> Optional[Dict[str, Any]]:
+        return self._load(self._entity_key(id))
+
+    def set(self, id: Any, values: Dict[str, Any]) -> None:
+        self._store(self._entity_key(id), values)
+
+    def get_list(self, skip: int, limit: int) -> Optional[List[Dict[str, Any]]]:
+        return self._load(self._list_key(skip, limit))
+
+    def set_list(self, skip: int, limit: int, rows: List[Dict[str, Any]]) -> None:
+        self._store(self._list_key(skip, limit), rows)
+
+    def invalidate(self, ids: Optional[Set[Any]] = None) -> None:
+        """
+        写入提交后调用：失效指定主键的条目；ids 为 None 时失效整个模型。
+        """
+        self.invalidations += 1
+        if ids is None:
+            self._bump("e")
+        elif ids:
+            keys = [self._entity_key(id) for id in ids]
+            self.local.delete(*keys)
+            if self.redis is not None:
+                self._redis_call("delete", *keys)
+        self._bump("l")
+
+    # Redis 中的存储格式
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, default=_encode_default)
+
+    def decode(self, raw: bytes) -> Any:
+        """
+        还原 encode 的结果：一行为列值 dict，get_multi 的结果为 dict 列表。
+        """
+        value = orjson.loads(raw)
+        for row in value if isinstance(value, list) else [value]:
+            for column, decoder in self.decoders.items():
+                if row.get(column) is not None:
+                    row[column] = decoder(row[column])
+        return value
+
+    # ORM 对象与列值互转
+
+    def dump(self, obj: Base) -> Optional[Dict[str, Any]]:
+        state = inspect(obj)
+        if state.expired_attributes or not state.has_identity:
+            return None
+        loaded = state.dict
+        if any(column not in loaded for column in self.columns):
+            return None
+        return {column: loaded[column] for column in self.columns}
+
+    def attach(self, db: Session, values: Dict[str, Any]) -> Base:
+        """
+        把缓存的列值还原为 db 中的持久化对象，不发出 SQL；
+        会话里已有同一主键的对象时直接返回它。
+        """
+        identity = self.mapper.identity_key_from_primary_key(
+            [values[column.key] for column in self.mapper.primary_key]
+        )
+        existing = db.identity_map.get(identity)
+        if existing is not None:
+            return existing
+        obj = self.mapper.class_manager.new_instance()
+        for column, value in values.items():
+            set_committed_value(obj, column, value)
+        make_transient_to_detached(obj)
+        db.add(obj)
+        return obj
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+            "local_entries": len(self.local),
+        }
+
+
+def model_cache(model: Type[Base]) -> ModelCache:
+    """
+    每个模型只有一个缓存实例，多个 CRUD 对象共用，保证写入时都能失效。
+    """
+    return _caches.get(model) or ModelCache(model)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {cache.name: cache.stats() for cache in _caches.values()}
+
+
+def _pending(session: Session) -> Dict[ModelCache, Optional[Set[Any]]]:
+    return session.info.setdefault(PENDING_KEY, {})
+
+
+def _mark(session: Session, cache: ModelCache, id: Any = None, whole: bool = False) -> None:
+    pending = _pending(session)
+    if whole:
+        pending[cache] = None
+        return
+    ids = pending.setdefault(cache, set())
+    if ids is not None and id is not None:
+        ids.add(id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed(session: Session, flush_context: Any) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        cache = _caches.get(type(obj))
+        if cache is not None:
+            identity = inspect(obj).identity
+            _mark(session, cache, identity[0] if identity else None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statements(orm_execute_state: Any) -> None:
+    # INSERT 只影响列表；UPDATE/DELETE 语句除非通过 CACHE_IDS_OPTION 声明了主键，
+    # 否则无法确定影响范围，整个模型失效
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    cache = _caches.get(mapper.class_) if mapper is not None else None
+    if cache is None:
+        return
+    session = orm_execute_state.session
+    if orm_execute_state.is_insert:
+        _mark(session, cache)
+        return
+    ids = orm_execute_state.execution_options.get(CACHE_IDS_OPTION)
+    if ids is None:
+        _mark(session, cache, whole=True)
+        return
+    _mark(session, cache)
+    for id in ids:
+        _mark(session, cache, id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        for cache, ids in pending.items():
+            cache.invalidate(ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
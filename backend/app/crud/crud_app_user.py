@@ -1,7 +1,9 @@
-from typing import Any, Dict, Optional, Union, List
-from sqlalchemy.orm import Session
-from fastapi.encoders import jsonable_encoder
+from datetime import datetime
+from typing import Any, Optional, List, Sequence, Tuple
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Query, Session
 
+from app.core.pagination import CountMode
 from app.crud.base import CRUDBase
 from app.models.app_user import AppUser
 from app.schemas.app_user import AppUserCreate, AppUserUpdate
@@ -10,50 +12,84 @@ class CRUDAppUser(CRUDBase[AppUser, AppUserCreate, AppUserUpdate]):
     def get_by_phone(self, db: Session, *, phone: str) -> Optional[AppUser]:
         return db.query(AppUser).filter(AppUser.phone == phone).first()
 
-    def get_multi(
+    def upsert_by_phone(
+        self, db: Session, *, phone: str, nickname: Optional[str] = None
+    ) -> AppUser:
+        """
+        登录时获取或创建用户并更新 last_login，一条 INSERT ... ON CONFLICT 语句完成，
+        并发的首次登录也不会产生重复用户或唯一约束错误。
+        """
+        dialect = db.get_bind().dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        now = datetime.utcnow()
+        stmt = insert(AppUser).values(
+            phone=phone,
+            nickname=nickname,
+            is_active=True,
+            created_at=now,
+            updated_at=now,
+            last_login=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AppUser.phone],
+            set_={
+                "last_login": stmt.excluded.last_login,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ).returning(AppUser)
+        db_obj = db.scalars(
+            stmt, execution_options={"populate_existing": True}
+        ).one()
+        # RETURNING 已带回所有列，脱离会话以免 commit 过期属性后再次 SELECT
+        db.expunge(db_obj)
+        db.commit()
+        return db_obj
+
+    def query_filtered(
         self,
         db: Session,
         *,
-        skip: int = 0,
-        limit: int = 100,
         phone: Optional[str] = None,
         is_active: Optional[bool] = None
-    ) -> List[AppUser]:
+    ) -> Query:
         query = db.query(self.model)
         
         if phone:
             query = query.filter(self.model.phone.contains(phone))
         if is_active is not None:
             query = query.filter(self.model.is_active == is_active)
-            
-        return query.offset(skip).limit(limit).all()
+        return query
 
-    def create(self, db: Session, *, obj_in: AppUserCreate) -> AppUser:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+    def get_multi(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        phone: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> List[AppUser]:
+        query = self.query_filtered(db, phone=phone, is_active=is_active)
+        return query.offset(skip).limit(limit).all()
 
-    def update(
+    def get_page(
         self,
         db: Session,
         *,
-        db_obj: AppUser,
-        obj_in: Union[AppUserUpdate, Dict[str, Any]]
-    ) -> AppUser:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        phone: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        fields: Optional[Sequence[str]] = None,
+        count: Optional[CountMode] = None
+    ) -> Tuple[List[Any], Optional[str], Optional[int]]:
+        return super().get_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            query=self.query_filtered(db, phone=phone, is_active=is_active),
+            fields=fields,
+            count=count,
+        )
 
 app_user = CRUDAppUser(AppUser)
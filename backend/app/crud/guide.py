@@ -1,46 +1,120 @@
-from typing import List, Optional, Dict, Union, Any
+from typing import List, Optional, Dict, Sequence, Tuple, Union, Any
 
-from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, String, Text, cast, column, delete, func, select, update, values
+from sqlalchemy.orm import Query, Session, joinedload
 
-from app.crud.base import CRUDBase
+from app.core.pagination import CountMode
+from app.crud.base import CRUDBase, apply_update, column_keys, dump_create, dump_update
+from app.crud.guide_snapshot import mark_snapshot
+from app.crud.search import guide_search, mark_guide
 from app.models.guide import Guide, GuideStep
-from app.schemas.guide import GuideCreate, GuideUpdate, GuideStepCreate, GuideStepUpdate
+from app.schemas.guide import GuideCreate, GuideUpdate, GuideStepCreate, GuideStepPatch, GuideStepUpdate
+
+STEP_COLUMNS = column_keys(GuideStep)
+# 批量编辑步骤时可修改的列
+STEP_PATCH_COLUMNS = ("title", "description", "content", "order")
+
+
+class InvalidStepBatch(ValueError):
+    pass
 
 
 class CRUDGuide(CRUDBase[Guide, GuideCreate, GuideUpdate]):
     def create_with_creator(
         self, db: Session, *, obj_in: GuideCreate, creator_id: int
     ) -> Guide:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data, creator_id=creator_id)
+        obj_in_data = dump_create(obj_in)
+        db_obj = self.model(**obj_in_data, author_id=creator_id)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(
+        self,
+        db: Session,
+        *,
+        objs_in: Sequence[Union[GuideCreate, Dict[str, Any]]],
+        extra_fields: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None
+    ) -> List[Guide]:
+        """
+        批量插入不经过 flush，插入后登记已发布的指南，再提交一次生成快照。
+        """
+        db_objs = super().create_many(
+            db, objs_in=objs_in, extra_fields=extra_fields, chunk_size=chunk_size
+        )
+        published = [db_obj.id for db_obj in db_objs if db_obj.is_published]
+        if published:
+            for id in published:
+                mark_snapshot(db, id)
+            db.commit()
+        return db_objs
+
+    def query_published(self, db: Session) -> Query:
+        return db.query(self.model).filter(self.model.is_published == True)
+
     def get_published(
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> List[Guide]:
         return (
-            db.query(self.model)
-            .filter(self.model.is_published == True)
+            self.query_published(db)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_published_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        count: Optional[CountMode] = None
+    ) -> Tuple[List[Any], Optional[str], Optional[int]]:
+        return self.get_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            query=self.query_published(db),
+            fields=fields,
+            count=count,
+        )
+
     def get_by_creator(
         self, db: Session, *, creator_id: int, skip: int = 0, limit: int = 100
     ) -> List[Guide]:
         return (
             db.query(self.model)
-            .filter(self.model.creator_id == creator_id)
+            .filter(self.model.author_id == creator_id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_with_steps(self, db: Session, *, id: Any) -> Optional[Guide]:
+        """
+        指南连同全部步骤，一条 LEFT OUTER JOIN 查询取出，序列化 steps 时不再懒加载。
+        """
+        return (
+            db.query(self.model)
+            .options(joinedload(Guide.steps))
+            .filter(self.model.id == id)
+            .first()
+        )
+
+    def content_version(self, db: Session, *, guide: Guide) -> Tuple[Any, ...]:
+        """
+        指南内容的版本，用于生成 ETag：指南本身的 updated_at 加上步骤的数量、
+        最后修改时间和 id 之和（增删改步骤都会改变），只做一次聚合查询，不读取步骤内容。
+        """
+        steps = db.execute(
+            select(func.count(), func.max(GuideStep.updated_at), func.sum(GuideStep.id))
+            .where(GuideStep.guide_id == guide.id)
+        ).one()
+        return (guide.id, guide.updated_at, guide.is_published, *steps)
+
     def get_step(
         self, db: Session, *, id: int
     ) -> Optional[GuideStep]:
@@ -49,7 +123,7 @@ class CRUDGuide(CRUDBase[Guide, GuideCreate, GuideUpdate]):
     def create_step(
         self, db: Session, *, obj_in: GuideStepCreate, guide_id: int
     ) -> GuideStep:
-        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data = dump_create(obj_in)
         db_obj = GuideStep(**obj_in_data, guide_id=guide_id)
         db.add(db_obj)
         db.commit()
@@ -59,26 +133,118 @@ class CRUDGuide(CRUDBase[Guide, GuideCreate, GuideUpdate]):
     def update_step(
         self, db: Session, *, db_obj: GuideStep, obj_in: Union[GuideStepUpdate, Dict[str, Any]]
     ) -> GuideStep:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        apply_update(db_obj, dump_update(obj_in), STEP_COLUMNS)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def update_steps(
+        self,
+        db: Session,
+        *,
+        guide_id: int,
+        order: Optional[Sequence[int]] = None,
+        patches: Sequence[Union[GuideStepPatch, Dict[str, Any]]] = ()
+    ) -> List[GuideStep]:
+        """
+        批量修改一个指南的步骤，整体一个事务：order 为全部步骤 id 的新顺序（从 1 开始编号），
+        patches 为各步骤要修改的字段。PostgreSQL 上用一条 UPDATE ... FROM (VALUES ...) 写入，
+        (guide_id, order) 唯一约束延迟到提交时检查，交换顺序不会在中途冲突；
+        其他数据库按主键 executemany。参数不合法时抛出 InvalidStepBatch，不做任何修改。
+        """
+        current = dict(
+            db.execute(
+                select(GuideStep.id, GuideStep.order).where(GuideStep.guide_id == guide_id)
+            ).all()
+        )
+        rows: Dict[int, Dict[str, Any]] = {}
+        for patch in patches:
+            data = dict(dump_update(patch))
+            id = data.pop("id", None)
+            if id not in current:
+                raise InvalidStepBatch(f"Step {id} does not belong to this guide")
+            if id in rows:
+                raise InvalidStepBatch(f"Step {id} is patched more than once")
+            rows[id] = {
+                key: data[key] for key in STEP_PATCH_COLUMNS if data.get(key) is not None
+            }
+        if order is not None:
+            if len(order) != len(current) or set(order) != set(current):
+                raise InvalidStepBatch("order must list every step of the guide exactly once")
+            if any("order" in row for row in rows.values()):
+                raise InvalidStepBatch("order cannot be combined with per-step order changes")
+            for position, id in enumerate(order, start=1):
+                rows.setdefault(id, {})["order"] = position
+
+        # 提前检查最终顺序，SQLite 上没有唯一约束兜底
+        final = dict(current)
+        final.update((id, row["order"]) for id, row in rows.items() if "order" in row)
+        orders = [value for value in final.values() if value is not None]
+        if len(orders) != len(set(orders)):
+            raise InvalidStepBatch("Step orders must be unique within a guide")
+
+        rows = {id: row for id, row in rows.items() if row}
+        if rows:
+            if db.get_bind().dialect.name == "postgresql":
+                patch_table = values(
+                    column("id", Integer),
+                    column("title", String),
+                    column("description", Text),
+                    column("content", Text),
+                    column("order", Integer),
+                    name="patch",
+                ).data([
+                    (id, *(row.get(key) for key in STEP_PATCH_COLUMNS))
+                    for id, row in rows.items()
+                ])
+                # 未修改的字段在 VALUES 中为 NULL，保留原值
+                db.execute(
+                    update(GuideStep)
+                    .where(GuideStep.id == patch_table.c.id)
+                    .values({
+                        key: func.coalesce(
+                            cast(patch_table.c[key], GuideStep.__table__.c[key].type),
+                            getattr(GuideStep, key),
+                        )
+                        for key in STEP_PATCH_COLUMNS
+                    })
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                db.execute(update(GuideStep), [{"id": id, **row} for id, row in rows.items()])
+            # 语句绕过了 ORM 单元操作，手动登记搜索文档和快照的重建
+            mark_guide(db, guide_id)
+            mark_snapshot(db, guide_id)
+        db.commit()
+        return (
+            db.query(GuideStep)
+            .filter(GuideStep.guide_id == guide_id)
+            .order_by(GuideStep.order)
+            .all()
+        )
+
     def remove_step(
         self, db: Session, *, id: int
-    ) -> GuideStep:
-        obj = db.query(GuideStep).get(id)
-        db.delete(obj)
+    ) -> Optional[GuideStep]:
+        obj = db.scalars(
+            delete(GuideStep).where(GuideStep.id == id).returning(GuideStep),
+            execution_options={"populate_existing": True},
+        ).first()
+        if obj is not None:
+            mark_guide(db, obj.guide_id)
+            mark_snapshot(db, obj.guide_id)
+            if obj in db:
+                db.expunge(obj)
         db.commit()
         return obj
 
+    def search(
+        self, db: Session, *, text: str, published_only: bool = True, limit: int = 20, offset: int = 0
+    ) -> List[Tuple[Guide, float]]:
+        return guide_search.search(
+            db, text, published_only=published_only, limit=limit, offset=offset
+        )
+
 
-guide = CRUDGuide(Guide)
+guide = CRUDGuide(Guide, cache=True)
@@ -0,0 +1,367 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import logging
+
+import anyio
+from sqlalchemy import bindparam, func, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CRUDBase, _chunks
+from app.models.guide import GuideProgress, GuideStep, GuideStepStats, GuideStepView
+from app.schemas.guide import GuideProgress as GuideProgressSchema
+
+logger = logging.getLogger(__name__)
+
+# 写入失败（如数据库不可用）的记录最多重试的周期数，超过后丢弃
+MAX_FLUSH_ATTEMPTS = 5
+
+
+@dataclass
+class PendingView:
+    user_id: int
+    guide_id: int
+    step_id: int
+    count: int
+    first_viewed_at: datetime
+    last_viewed_at: datetime
+    # 已失败的写入次数
+    attempts: int = 0
+
+
+class ProgressBuffer:
+    """
+    进程内合并步骤查看记录：同一用户同一步骤在一个写入周期内只保留一条，次数累加。
+    由 run() 每 GUIDE_PROGRESS_FLUSH_SECONDS 秒批量写入一次；积压超过 max_pending
+    条时唤醒 run() 提前写入，请求线程本身不写数据库。进程异常退出时最多丢失一个周期的查看记录。
+    数据本身无法写入（违反约束等）的记录逐条隔离后丢弃，其他错误重试
+    MAX_FLUSH_ATTEMPTS 个周期，缓冲区不会因为个别记录一直积压。
+    """
+
+    def __init__(self, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, int], PendingView] = {}
+        self._lock = Lock()
+        # run() 所在的事件循环和唤醒它的事件，run() 未运行时为 None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(
+        self, *, user_id: int, guide_id: int, step_id: int, viewed_at: Optional[datetime] = None
+    ) -> bool:
+        """
+        记录一次查看，返回是否已积压到需要立即写入；此时唤醒 run() 提前写入。
+        可以在任意线程调用。
+        """
+        viewed_at = viewed_at or datetime.utcnow()
+        with self._lock:
+            view = self._pending.get((user_id, step_id))
+            if view is None:
+                self._pending[(user_id, step_id)] = PendingView(
+                    user_id, guide_id, step_id, 1, viewed_at, viewed_at
+                )
+            else:
+                view.count += 1
+                view.last_viewed_at = max(view.last_viewed_at, viewed_at)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake()
+        return full
+
+    def _wake(self) -> None:
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None:
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            # 事件循环已关闭，剩余记录由 run() 退出时写入
+            pass
+
+    def restore(self, views: Sequence[PendingView]) -> None:
+        """
+        写入失败时把取出的记录合并回缓冲区，下个周期重试。
+        """
+        with self._lock:
+            for pending in views:
+                view = self._pending.get((pending.user_id, pending.step_id))
+                if view is None:
+                    self._pending[(pending.user_id, pending.step_id)] = pending
+                else:
+                    view.count += pending.count
+                    view.first_viewed_at = min(view.first_viewed_at, pending.first_viewed_at)
+                    view.last_viewed_at = max(view.last_viewed_at, pending.last_viewed_at)
+                    view.attempts = max(view.attempts, pending.attempts)
+
+    def flush(self, session_factory: Callable[[], Session]) -> int:
+        """
+        取出全部缓冲的记录，在 session_factory 创建的会话中批量写入，返回写入的条数。
+        """
+        with self._lock:
+            views = list(self._pending.values())
+            self._pending.clear()
+        if not views:
+            return 0
+        written, failed = self._write(session_factory, views)
+        if failed:
+            retry = []
+            for view in failed:
+                view.attempts += 1
+                if view.attempts < MAX_FLUSH_ATTEMPTS:
+                    retry.append(view)
+            if len(retry) < len(failed):
+                logger.warning(
+                    f"Dropped {len(failed) - len(retry)} guide step views "
+                    f"after {MAX_FLUSH_ATTEMPTS} failed flushes"
+                )
+            self.restore(retry)
+        return written
+
+    def _write(
+        self, session_factory: Callable[[], Session], views: Sequence[PendingView]
+    ) -> Tuple[int, List[PendingView]]:
+        """
+        写入一批记录，返回 (写入的条数, 需要重试的记录)。违反约束或数据错误时
+        二分重试，找出并丢弃写不进去的记录，其余照常写入。
+        """
+        try:
+            with session_factory() as db:
+                guide_progress.write_views(db, views=views)
+            return len(views), []
+        except (IntegrityError, DataError) as exc:
+            if len(views) == 1:
+                view = views[0]
+                logger.warning(
+                    f"Dropping guide step view (user {view.user_id}, step {view.step_id}): {exc}"
+                )
+                return 0, []
+            middle = len(views) // 2
+            first, first_failed = self._write(session_factory, views[:middle])
+            second, second_failed = self._write(session_factory, views[middle:])
+            return first + second, first_failed + second_failed
+        except Exception as exc:
+            logger.warning(f"Flushing {len(views)} guide step views failed: {exc}")
+            return 0, list(views)
+
+    async def run(self, session_factory: Callable[[], Session], interval: float) -> None:
+        """
+        后台任务：每 interval 秒或被 record() 唤醒时写入，直到被取消；取消时写入剩余记录。
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = wakeup = asyncio.Event()
+        flushing: Optional[asyncio.Future] = None
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+                # 取消不会中断线程里的写入，shield 保证 finally 能等到它结束
+                flushing = asyncio.ensure_future(
+                    anyio.to_thread.run_sync(self.flush, session_factory)
+                )
+                await asyncio.shield(flushing)
+        finally:
+            self._loop = self._wakeup = None
+            if flushing is not None:
+                await asyncio.wait([flushing])
+            await anyio.to_thread.run_sync(self.flush, session_factory)
+
+
+class CRUDGuideProgress(CRUDBase[GuideProgress, GuideProgressSchema, GuideProgressSchema]):
+    def write_views(self, db: Session, *, views: Sequence[PendingView]) -> None:
+        """
+        把合并后的查看记录写入一个事务，语句数与记录条数无关：
+        新的 (用户, 步骤) 用 INSERT ... ON CONFLICT DO NOTHING RETURNING 识别，
+        已有的累加次数；步骤统计和用户进度用 upsert 累加，最后标记读完的用户。
+        已删除的步骤直接丢弃。
+        """
+        valid_steps = set(
+            db.execute(
+                select(GuideStep.id, GuideStep.guide_id)
+                .where(GuideStep.id.in_({view.step_id for view in views}))
+            ).all()
+        )
+        views = [view for view in views if (view.step_id, view.guide_id) in valid_steps]
+        if not views:
+            return
+
+        dialect = db.get_bind().dialect.name
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+
+        created = set()
+        for chunk in _chunks(views, self.bulk_chunk_size):
+            created.update(
+                db.execute(
+                    insert(GuideStepView)
+                    .values([
+                        {
+                            "user_id": view.user_id,
+                            "guide_id": view.guide_id,
+                            "step_id": view.step_id,
+                            "view_count": view.count,
+                            "first_viewed_at": view.first_viewed_at,
+                            "last_viewed_at": view.last_viewed_at,
+                        }
+                        for view in chunk
+                    ])
+                    .on_conflict_do_nothing(
+                        index_elements=[GuideStepView.user_id, GuideStepView.step_id]
+                    )
+                    .returning(GuideStepView.user_id, GuideStepView.step_id)
+                ).all()
+            )
+
+        existing = [view for view in views if (view.user_id, view.step_id) not in created]
+        if existing:
+            table = GuideStepView.__table__
+            db.connection().execute(
+                update(table)
+                .where(table.c.user_id == bindparam("b_user_id"), table.c.step_id == bindparam("b_step_id"))
+                .values(
+                    view_count=table.c.view_count + bindparam("b_count"),
+                    last_viewed_at=func.max(table.c.last_viewed_at, bindparam("b_last_viewed_at"))
+                    if dialect == "sqlite"
+                    else func.greatest(table.c.last_viewed_at, bindparam("b_last_viewed_at")),
+                ),
+                [
+                    {
+                        "b_user_id": view.user_id,
+                        "b_step_id": view.step_id,
+                        "b_count": view.count,
+                        "b_last_viewed_at": view.last_viewed_at,
+                    }
+                    for view in existing
+                ],
+            )
+
+        # 步骤统计：新增的查看人数和查看次数
+        step_totals: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        progress: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for view in views:
+            totals = step_totals[view.step_id]
+            totals[0] += (view.user_id, view.step_id) in created
+            totals[1] += view.count
+            row = progress.setdefault(
+                (view.user_id, view.guide_id),
+                {"user_id": view.user_id, "guide_id": view.guide_id, "steps_viewed": 0,
+                 "last_step_id": view.step_id, "last_viewed_at": view.last_viewed_at},
+            )
+            row["steps_viewed"] += (view.user_id, view.step_id) in created
+            if view.last_viewed_at > row["last_viewed_at"]:
+                row.update(last_step_id=view.step_id, last_viewed_at=view.last_viewed_at)
+
+        step_guides = dict(valid_steps)
+        stats = [
+            {"step_id": step_id, "guide_id": step_guides[step_id], "viewers": viewers, "views": count}
+            for step_id, (viewers, count) in step_totals.items()
+        ]
+        for chunk in _chunks(stats, self.bulk_chunk_size):
+            stmt = insert(GuideStepStats).values(list(chunk))
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[GuideStepStats.step_id],
+                set_={
+                    "viewers": GuideStepStats.viewers + stmt.excluded.viewers,
+                    "views": GuideStepStats.views + stmt.excluded.views,
+                },
+            ))
+
+        for chunk in _chunks(list(progress.values()), self.bulk_chunk_size):
+            stmt = insert(GuideProgress).values(list(chunk))
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[GuideProgress.user_id, GuideProgress.guide_id],
+                set_={
+                    "steps_viewed": GuideProgress.steps_viewed + stmt.excluded.steps_viewed,
+                    "last_step_id": stmt.excluded.last_step_id,
+                    "last_viewed_at": stmt.excluded.last_viewed_at,
+                },
+            ))
+
+        # 看过的步骤数达到指南当前的步骤总数即为读完
+        advanced = [key for key, row in progress.items() if row["steps_viewed"]]
+        if advanced:
+            step_count = (
+                select(func.count())
+                .where(GuideStep.guide_id == GuideProgress.guide_id)
+                .scalar_subquery()
+            )
+            db.execute(
+                update(GuideProgress)
+                .where(
+                    tuple_(GuideProgress.user_id, GuideProgress.guide_id).in_(advanced),
+                    GuideProgress.completed_at.is_(None),
+                    GuideProgress.steps_viewed >= step_count,
+                )
+                .values(completed_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+    def get_progress(self, db: Session, *, user_id: int, guide_id: int) -> Dict[str, Any]:
+        """
+        用户在一个指南上的进度和看过的步骤 id；还没有记录时返回空进度。
+        """
+        progress = (
+            db.query(GuideProgress)
+            .filter(GuideProgress.user_id == user_id, GuideProgress.guide_id == guide_id)
+            .first()
+        )
+        step_ids = [
+            id for id, in db.query(GuideStepView.step_id)
+            .filter(GuideStepView.user_id == user_id, GuideStepView.guide_id == guide_id)
+        ]
+        result: Dict[str, Any] = {"guide_id": guide_id, "viewed_step_ids": sorted(step_ids)}
+        if progress is not None:
+            result.update(
+                steps_viewed=progress.steps_viewed,
+                last_step_id=progress.last_step_id,
+                last_viewed_at=progress.last_viewed_at,
+                completed_at=progress.completed_at,
+            )
+        return result
+
+    def get_funnel(self, db: Session, *, guide_id: int) -> Dict[str, Any]:
+        """
+        指南的完成漏斗：开始和读完的人数（guide_progress 上按索引计数），
+        以及每个步骤的累计查看人数和次数（读 guide_step_stats，不扫描查看记录）。
+        """
+        started, completed = db.execute(
+            select(func.count(), func.count(GuideProgress.completed_at))
+            .where(GuideProgress.guide_id == guide_id)
+        ).one()
+        steps = db.execute(
+            select(
+                GuideStep.id,
+                GuideStep.order,
+                GuideStep.title,
+                func.coalesce(GuideStepStats.viewers, 0),
+                func.coalesce(GuideStepStats.views, 0),
+            )
+            .outerjoin(GuideStepStats, GuideStepStats.step_id == GuideStep.id)
+            .where(GuideStep.guide_id == guide_id)
+            .order_by(GuideStep.order, GuideStep.id)
+        ).all()
+        return {
+            "guide_id": guide_id,
+            "started": started,
+            "completed": completed,
+            "steps": [
+                {"step_id": id, "order": order, "title": title, "viewers": viewers, "views": views}
+                for id, order, title, viewers, views in steps
+            ],
+        }
+
+
+guide_progress = CRUDGuideProgress(GuideProgress)
+
+progress_buffer = ProgressBuffer(settings.GUIDE_PROGRESS_MAX_PENDING)
@@ -0,0 +1,263 @@
+from itertools import chain
+from typing import Any, Dict, Iterable, Optional
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, joinedload
+import orjson
+
+from app.core.config import settings
+from app.crud.cache import CACHE_IDS_OPTION
+from app.models.guide import Guide, GuideStep
+from app.schemas.guide import GuideDetail
+
+logger = logging.getLogger(__name__)
+
+# 本事务内需要重新发布快照的指南 id
+PENDING_KEY = "guide_snapshot_pending"
+# 提交前渲染好、提交后写入磁盘的快照：{指南 id: JSON 或 None（删除快照）}
+RENDERED_KEY = "guide_snapshot_rendered"
+
+# 快照文件名中的版本号：未压缩 JSON 的 sha1 前 20 位
+VERSION_LENGTH = 20
+CURRENT_NAME = "current"
+# current.json 旁的版本文件："版本号 文件大小 修改时间(ns)"，读取时不必重新计算 sha1
+VERSION_NAME = CURRENT_NAME + ".version"
+# 带版本号的快照按 immutable 缓存的时间（秒）；被替换后保留这么久再删除
+VERSION_MAX_AGE = 365 * 24 * 3600
+
+_brotli = None
+
+
+def _compress_brotli(body: bytes) -> Optional[bytes]:
+    # brotli 是可选依赖，未安装时只生成 gzip
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            return None
+        _brotli = brotli
+    return _brotli.compress(body, quality=11)
+
+
+def snapshot_version(body: bytes) -> str:
+    return hashlib.sha1(body).hexdigest()[:VERSION_LENGTH]
+
+
+def read_current_version(path: str, stat_result: Optional[os.stat_result] = None) -> str:
+    """
+    current.json 的版本号。版本文件记录的大小和修改时间与 current.json 一致时直接使用，
+    否则（正在替换、旧目录没有版本文件）读取文件重新计算。文件不存在时抛出 FileNotFoundError。
+    """
+    if stat_result is None:
+        stat_result = os.stat(path)
+    try:
+        with open(os.path.join(os.path.dirname(path), VERSION_NAME)) as file:
+            version, size, mtime_ns = file.read().split()
+        if (int(size), int(mtime_ns)) == (stat_result.st_size, stat_result.st_mtime_ns):
+            return version
+    except (OSError, ValueError):
+        pass
+    with open(path, "rb") as file:
+        return snapshot_version(file.read())
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    # 先写临时文件再改名，读者不会读到写了一半的快照
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            tmp.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class GuideSnapshots:
+    """
+    已发布指南的静态快照，供 CDN 或静态存储直接提供，读取时不经过鉴权和数据库。
+    每个指南一个目录：{版本}.json 内容不变，可长期缓存；current.json 总是最新版本，
+    版本号记在 current.version 中，响应的 Content-Location 指向对应的版本文件。
+    旧版本在被替换 VERSION_MAX_AGE 秒后才删除。
+    每个文件都预先生成 .gz（以及安装 brotli 时的 .br）压缩版本。
+    指南发布状态、内容或步骤变化时在同一事务内渲染，提交后写入；未发布或已删除的指南删除目录。
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def guide_dir(self, guide_id: int) -> str:
+        return os.path.join(self.directory, str(guide_id))
+
+    def render(self, db: Session, guide_ids: Iterable[int]) -> Dict[int, Optional[bytes]]:
+        """
+        渲染这些指南的快照 JSON（与 GET /guides/{id} 的响应相同）；未发布或不存在的为 None。
+        渲染失败的指南记录日志后跳过，保留原有快照，不影响所在事务的提交。
+        """
+        rendered: Dict[int, Optional[bytes]] = {id: None for id in guide_ids}
+        if not rendered:
+            return rendered
+        guides = (
+            db.query(Guide)
+            .options(joinedload(Guide.steps))
+            .filter(Guide.id.in_(list(rendered)), Guide.is_published == True)
+            # 步骤可能被批量 UPDATE 修改过，重新读取会话里已有的对象
+            .populate_existing()
+            .all()
+        )
+        for guide in guides:
+            try:
+                rendered[guide.id] = orjson.dumps(GuideDetail.model_validate(guide).model_dump())
+            except Exception:
+                logger.exception(f"Rendering guide snapshot {guide.id} failed")
+                del rendered[guide.id]
+        return rendered
+
+    def write(self, guide_id: int, body: Optional[bytes]) -> Optional[str]:
+        """
+        写入一个指南的快照，返回版本号；body 为 None 时删除该指南的全部快照。
+        """
+        guide_dir = self.guide_dir(guide_id)
+        if body is None:
+            shutil.rmtree(guide_dir, ignore_errors=True)
+            return None
+
+        os.makedirs(guide_dir, exist_ok=True)
+        version = snapshot_version(body)
+        previous = self.current_version(guide_id)
+        if previous is not None and previous != version:
+            # 旧版本的文件修改时间记为被替换的时间，之后客户端不会再拿到它的地址
+            for entry in os.listdir(guide_dir):
+                if entry.split(".", 1)[0] == previous:
+                    os.utime(os.path.join(guide_dir, entry))
+        variants = {".json": body, ".json.gz": gzip.compress(body, mtime=0)}
+        compressed = _compress_brotli(body)
+        if compressed is not None:
+            variants[".json.br"] = compressed
+        for name in (version, CURRENT_NAME):
+            for suffix, content in variants.items():
+                _write_atomic(os.path.join(guide_dir, name + suffix), content)
+        stat_result = os.stat(os.path.join(guide_dir, CURRENT_NAME + ".json"))
+        _write_atomic(
+            os.path.join(guide_dir, VERSION_NAME),
+            f"{version} {stat_result.st_size} {stat_result.st_mtime_ns}".encode(),
+        )
+
+        # 被替换超过 VERSION_MAX_AGE 的旧版本已不在任何缓存中
+        expired = time.time() - VERSION_MAX_AGE
+        for entry in os.listdir(guide_dir):
+            name = entry.split(".", 1)[0]
+            if name in (version, CURRENT_NAME) or entry.startswith(".tmp-"):
+                continue
+            path = os.path.join(guide_dir, entry)
+            if os.stat(path).st_mtime < expired:
+                os.unlink(path)
+        return version
+
+    def current_version(self, guide_id: int) -> Optional[str]:
+        try:
+            return read_current_version(os.path.join(self.guide_dir(guide_id), CURRENT_NAME + ".json"))
+        except FileNotFoundError:
+            return None
+
+    def publish(self, db: Session, guide_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        立即重新生成快照；guide_ids 为 None 时重建全部已发布的指南。
+        """
+        if guide_ids is None:
+            guide_ids = [id for id, in db.query(Guide.id).filter(Guide.is_published == True)]
+            if os.path.isdir(self.directory):
+                # 目录里不再发布的指南一并删除
+                guide_ids.extend(
+                    int(entry) for entry in os.listdir(self.directory) if entry.isdigit()
+                )
+        for id, body in self.render(db, set(guide_ids)).items():
+            self.write(id, body)
+
+
+guide_snapshots = GuideSnapshots(settings.GUIDE_SNAPSHOT_DIR)
+
+
+def mark_snapshot(session: Session, guide_id: Any) -> None:
+    """
+    绕过 ORM 单元操作修改指南或步骤时，手动登记要重新发布快照的指南。
+    """
+    if guide_id is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(guide_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_guides(session: Session, flush_context: Any) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Guide):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            mark_snapshot(session, obj.id)
+        elif isinstance(obj, GuideStep):
+            mark_snapshot(session, obj.guide_id)
+            # 步骤移到其他指南时，原指南也要重新发布
+            for old_guide_id in inspect(obj).attrs.guide_id.history.deleted:
+                mark_snapshot(session, old_guide_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_statements(orm_execute_state: Any) -> None:
+    # CRUDBase.remove / update_many / remove_many 是 UPDATE/DELETE 语句，不经过 flush，
+    # 按它们通过 CACHE_IDS_OPTION 声明的主键重新发布
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ is not Guide:
+        return
+    for id in orm_execute_state.execution_options.get(CACHE_IDS_OPTION, ()):
+        mark_snapshot(orm_execute_state.session, id)
+
+
+@event.listens_for(Session, "before_commit")
+def _render_guides(session: Session) -> None:
+    # 在事务内渲染，读到的是本次提交的内容；文件在提交成功后才写入。
+    # 只有指南或步骤有未 flush 的改动时才需要提前 flush
+    if any(
+        isinstance(obj, (Guide, GuideStep))
+        for obj in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.flush()
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        rendered = session.info.setdefault(RENDERED_KEY, {})
+        rendered.update(guide_snapshots.render(session, pending))
+
+
+@event.listens_for(Session, "after_commit")
+def _write_committed(session: Session) -> None:
+    rendered = session.info.pop(RENDERED_KEY, None)
+    if not rendered:
+        return
+    for id, body in rendered.items():
+        # 写入失败不影响已提交的请求，下次修改或全量重建时会补上
+        try:
+            guide_snapshots.write(id, body)
+        except OSError as exc:
+            logger.warning(f"Writing guide snapshot {id} failed: {exc}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(RENDERED_KEY, None)
+
+
+if __name__ == "__main__":
+    # 重建全部快照（首次部署或修改快照格式之后）
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        guide_snapshots.publish(db)
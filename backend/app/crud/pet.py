@@ -1,6 +1,7 @@
-from typing import List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
+from app.core.pagination import CountMode
 from app.crud.base import CRUDBase
 from app.models.pet import Pet, PetInteraction
 from app.schemas.pet import PetCreate, PetUpdate, PetInteractionCreate
@@ -17,17 +18,38 @@ class CRUDPet(CRUDBase[Pet, PetCreate, PetUpdate]):
         db.refresh(db_obj)
         return db_obj
 
+    def query_by_owner(self, db: Session, *, owner_id: int) -> Query:
+        return db.query(self.model).filter(Pet.owner_id == owner_id)
+
     def get_multi_by_owner(
         self, db: Session, *, owner_id: int, skip: int = 0, limit: int = 100
     ) -> List[Pet]:
         return (
-            db.query(self.model)
-            .filter(Pet.owner_id == owner_id)
+            self.query_by_owner(db, owner_id=owner_id)
             .offset(skip)
             .limit(limit)
             .all()
         )
 
+    def get_page_by_owner(
+        self,
+        db: Session,
+        *,
+        owner_id: int,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        count: Optional[CountMode] = None
+    ) -> Tuple[List[Any], Optional[str], Optional[int]]:
+        return self.get_page(
+            db,
+            cursor=cursor,
+            limit=limit,
+            query=self.query_by_owner(db, owner_id=owner_id),
+            fields=fields,
+            count=count,
+        )
+
     def get_pet_with_interactions(
         self, db: Session, *, pet_id: int
     ) -> Optional[Pet]:
@@ -64,4 +86,4 @@ class CRUDPet(CRUDBase[Pet, PetCreate, PetUpdate]):
         return db_obj
 
 
-pet = CRUDPet(Pet)
+pet = CRUDPet(Pet, cache=True)
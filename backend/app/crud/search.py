@@ -0,0 +1,249 @@
+from collections import defaultdict
+from itertools import chain
+from threading import Lock
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import math
+
+from sqlalchemy import bindparam, event, func, inspect, literal_column, select, update
+from sqlalchemy.orm import Session
+
+from app.models.guide import Guide, GuideStep
+from app.utils.text_search import to_document, tokenize
+
+# 本事务内需要重建搜索文档的指南 id
+PENDING_KEY = "guide_search_pending"
+# 提交后要写入进程内倒排索引的文档（非 PostgreSQL）
+INDEXED_KEY = "guide_search_indexed"
+
+# 标题、简介、步骤内容的权重，对应 tsvector 的 A/B/C 级
+WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+
+GUIDE_TEXT_ATTRS = ("title", "description")
+STEP_TEXT_ATTRS = ("title", "description", "content", "guide_id")
+
+Document = Tuple[str, str, str]
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+class InvertedIndex:
+    """
+    进程内倒排索引，在 SQLite（开发、测试）上代替 tsvector + GIN。
+    与 PostgreSQL 的查询语义一致：所有词都出现才算命中，按加权词频和 idf 排序。
+    """
+
+    def __init__(self) -> None:
+        self.built = False
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._terms: Dict[int, Set[str]] = {}
+        self._lock = Lock()
+
+    def replace(self, doc_id: int, document: Optional[Document]) -> None:
+        with self._lock:
+            for term in self._terms.pop(doc_id, ()):
+                self._postings[term].pop(doc_id, None)
+            if document is None:
+                return
+            weights: Dict[str, float] = defaultdict(float)
+            for text, weight in zip(document, WEIGHTS.values()):
+                for term in text.split():
+                    weights[term] += weight
+            for term, weight in weights.items():
+                self._postings[term][doc_id] = weight
+            self._terms[doc_id] = set(weights)
+
+    def search(self, terms: List[str]) -> List[Tuple[int, float]]:
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in set(terms)]
+            if not postings or not all(postings):
+                return []
+            total = len(self._terms)
+            matched = set.intersection(*(set(posting) for posting in postings))
+            scores = {
+                doc_id: sum(
+                    posting[doc_id] * math.log(1 + total / len(posting)) for posting in postings
+                )
+                for doc_id in matched
+            }
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class GuideSearch:
+    """
+    指南全文搜索。PostgreSQL 上 guides.search_vector（GIN 索引）在写入指南或步骤的
+    同一事务内重建，查询用 ts_rank_cd 排序；其他数据库使用进程内倒排索引。
+    中文在应用内分词（见 app.utils.text_search），数据库统一使用 simple 配置。
+    """
+
+    def __init__(self) -> None:
+        self.fallback = InvertedIndex()
+
+    def documents(self, db: Session, guide_ids: Optional[Iterable[int]] = None) -> Dict[int, Document]:
+        """
+        指南的分词文档 (标题, 简介, 步骤文本)；guide_ids 为 None 时取全部未删除的指南。
+        """
+        guides = select(Guide.id, Guide.title, Guide.description)
+        steps = select(
+            GuideStep.guide_id, GuideStep.title, GuideStep.description, GuideStep.content
+        ).order_by(GuideStep.guide_id, GuideStep.order)
+        if guide_ids is not None:
+            guide_ids = list(guide_ids)
+            guides = guides.where(Guide.id.in_(guide_ids))
+            steps = steps.where(GuideStep.guide_id.in_(guide_ids))
+
+        step_texts: Dict[int, List[str]] = defaultdict(list)
+        for guide_id, *texts in db.execute(steps):
+            step_texts[guide_id].extend(text for text in texts if text)
+        return {
+            id: (
+                to_document(title or ""),
+                to_document(description or ""),
+                to_document(" ".join(step_texts[id])),
+            )
+            for id, title, description in db.execute(guides)
+        }
+
+    def refresh(self, db: Session, guide_ids: Optional[Iterable[int]] = None) -> Dict[int, Document]:
+        """
+        重建这些指南的搜索文档。PostgreSQL 上直接写入 search_vector；
+        其他数据库返回文档，由调用方在提交后写入进程内索引。
+        """
+        documents = self.documents(db, guide_ids)
+        if documents and _is_postgres(db):
+            vector = (
+                func.setweight(func.to_tsvector("simple", bindparam("doc_title")), literal_column("'A'"))
+                .op("||")(func.setweight(func.to_tsvector("simple", bindparam("doc_description")), literal_column("'B'")))
+                .op("||")(func.setweight(func.to_tsvector("simple", bindparam("doc_steps")), literal_column("'C'")))
+            )
+            db.connection().execute(
+                update(Guide.__table__)
+                .where(Guide.__table__.c.id == bindparam("doc_id"))
+                # 只更新搜索列，不触发 updated_at 的 onupdate
+                .values(search_vector=vector, updated_at=Guide.__table__.c.updated_at),
+                [
+                    {"doc_id": id, "doc_title": title, "doc_description": description, "doc_steps": steps}
+                    for id, (title, description, steps) in documents.items()
+                ],
+            )
+        if guide_ids is not None:
+            # 已删除（物理删除）的指南不在 documents 里，从索引中移除
+            for id in guide_ids:
+                documents.setdefault(id, None)
+        return documents
+
+    def _ensure_fallback(self, db: Session) -> None:
+        if not self.fallback.built:
+            for id, document in self.documents(db).items():
+                self.fallback.replace(id, document)
+            self.fallback.built = True
+
+    def search(
+        self, db: Session, text: str, *, published_only: bool = True, limit: int = 20, offset: int = 0
+    ) -> List[Tuple[Guide, float]]:
+        """
+        按相关度返回 (指南, 得分)；所有搜索词都出现才算命中。
+        """
+        terms = tokenize(text)
+        if not terms:
+            return []
+        query = db.query(Guide)
+        if published_only:
+            query = query.filter(Guide.is_published == True)
+
+        if _is_postgres(db):
+            tsquery = func.plainto_tsquery("simple", " ".join(terms))
+            rank = func.ts_rank_cd(Guide.search_vector, tsquery).label("rank")
+            rows = (
+                query.add_columns(rank)
+                .filter(Guide.search_vector.op("@@")(tsquery))
+                .order_by(rank.desc(), Guide.id)
+                .offset(offset)
+                .limit(limit)
+                .all()
+            )
+            return [(guide, float(score)) for guide, score in rows]
+
+        self._ensure_fallback(db)
+        hits = self.fallback.search(terms)
+        # 索引里可能有已删除或未发布的指南，按库中可见的过滤
+        guides = {guide.id: guide for guide in query.filter(Guide.id.in_([id for id, _ in hits]))}
+        ranked = [(guides[id], score) for id, score in hits if id in guides]
+        return ranked[offset:offset + limit]
+
+
+guide_search = GuideSearch()
+
+
+def mark_guide(session: Session, guide_id: Any) -> None:
+    """
+    绕过 ORM 单元操作（如 DELETE ... RETURNING）修改步骤时，手动登记要重建的指南。
+    """
+    if guide_id is not None:
+        session.info.setdefault(PENDING_KEY, set()).add(guide_id)
+
+
+def _text_changed(obj: Any, attrs: Tuple[str, ...]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_guides(session: Session, flush_context: Any) -> None:
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Guide):
+            if obj in session.dirty and not _text_changed(obj, GUIDE_TEXT_ATTRS):
+                continue
+            mark_guide(session, obj.id)
+        elif isinstance(obj, GuideStep):
+            if obj in session.dirty and not _text_changed(obj, STEP_TEXT_ATTRS):
+                continue
+            mark_guide(session, obj.guide_id)
+            # 步骤移到其他指南时，原指南也要重建
+            for old_guide_id in inspect(obj).attrs.guide_id.history.deleted:
+                mark_guide(session, old_guide_id)
+
+
+def _has_unflushed_guides(session: Session) -> bool:
+    return any(
+        isinstance(obj, (Guide, GuideStep))
+        for obj in chain(session.new, session.dirty, session.deleted)
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_guides(session: Session) -> None:
+    # before_commit 在提交前的最后一次 flush 之前触发；有未 flush 的指南或步骤时
+    # 先 flush 收集全部改动，其余事务不必提前 flush
+    if _has_unflushed_guides(session):
+        session.flush()
+    pending = session.info.pop(PENDING_KEY, None)
+    if not pending:
+        return
+    documents = guide_search.refresh(session, pending)
+    if not _is_postgres(session):
+        session.info[INDEXED_KEY] = documents
+
+
+@event.listens_for(Session, "after_commit")
+def _index_committed(session: Session) -> None:
+    documents = session.info.pop(INDEXED_KEY, None)
+    if documents and guide_search.fallback.built:
+        for id, document in documents.items():
+            guide_search.fallback.replace(id, document)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(INDEXED_KEY, None)
+
+
+if __name__ == "__main__":
+    # 重建全部指南的搜索文档（首次部署、离线执行添加 search_vector 的迁移之后或修改 SEARCH_TOKENIZER 之后）
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        guide_search.refresh(db)
+        db.commit()
@@ -5,8 +5,8 @@ from app.db.base_class import Base  # noqa
 # Import all models here to ensure they are registered with SQLAlchemy
 from app.models.health_record import HealthRecord  # noqa
 from app.models.pet import Pet, PetInteraction  # noqa
-from app.models.activity import Activity, ActivityParticipant  # noqa
-from app.models.guide import Guide, GuideStep  # noqa
+from app.models.activity import Activity, ActivityParticipant, ActivitySeries  # noqa
+from app.models.guide import Guide, GuideProgress, GuideStep, GuideStepStats, GuideStepView  # noqa
 from app.models.user import User  # noqa
 from app.models.app_user import AppUser  # noqa
 
@@ -18,8 +18,12 @@ __all__ = [
     "PetInteraction",
     "Activity",
     "ActivityParticipant",
+    "ActivitySeries",
     "Guide",
     "GuideStep",
+    "GuideProgress",
+    "GuideStepView",
+    "GuideStepStats",
     "User",
     "AppUser",
 ]
@@ -1,7 +1,8 @@
 from typing import Any
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime
+from sqlalchemy import Column, Integer, DateTime, event
+from sqlalchemy.orm import Session, with_loader_criteria
 
 @as_declarative()
 class Base:
@@ -16,3 +17,26 @@ class Base:
     @declared_attr
     def __tablename__(cls) -> str:
         return cls.__name__.lower()
+
+class SoftDeleteMixin:
+    """
+    软删除：删除时只写 deleted_at，查询默认过滤掉已删除的行。
+    需要包含已删除行时，在查询上设置 execution_options(include_deleted=True)。
+    """
+    deleted_at = Column(DateTime, nullable=True, index=True)
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_soft_deleted(execute_state) -> None:
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                SoftDeleteMixin,
+                lambda cls: cls.deleted_at.is_(None),
+                include_aliases=True,
+            )
+        )
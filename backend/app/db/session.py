@@ -1,5 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from contextvars import ContextVar
+from threading import Lock
+from typing import Generator, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 from app.core.config import settings
@@ -19,11 +24,129 @@ except Exception as e:
     logger.error(f"Error creating database engine: {str(e)}")
     raise
 
+# Session 只有在第一次执行查询时才会从连接池取出连接（惰性 checkout）
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# 数据库依赖项
-def get_db():
+
+class RequestDBStats:
+    """
+    单个请求内的会话数与连接使用：checkouts 为从连接池取出连接的总次数
+    （commit 后再 refresh 会重新取出一次），connections 为同时持有的连接数，
+    max_connections 为其峰值。
+    """
+    __slots__ = ("sessions", "checkouts", "connections", "max_connections")
+
+    def __init__(self) -> None:
+        self.sessions = 0
+        self.checkouts = 0
+        self.connections = 0
+        self.max_connections = 0
+
+
+class SessionMetrics:
+    """
+    全局会话指标：请求数、会话数、连接 checkout 次数，以及单请求的会话数和同时持有连接数的最大值。
+    """
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.sessions = 0
+            self.checkouts = 0
+            self.max_sessions_per_request = 0
+            self.max_connections_per_request = 0
+            self.requests_without_checkout = 0
+
+    def record(self, stats: RequestDBStats) -> None:
+        with self._lock:
+            self.requests += 1
+            self.sessions += stats.sessions
+            self.checkouts += stats.checkouts
+            self.max_sessions_per_request = max(
+                self.max_sessions_per_request, stats.sessions
+            )
+            self.max_connections_per_request = max(
+                self.max_connections_per_request, stats.max_connections
+            )
+            if stats.checkouts == 0:
+                self.requests_without_checkout += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests = self.requests or 1
+            return {
+                "requests": self.requests,
+                "sessions": self.sessions,
+                "checkouts": self.checkouts,
+                "sessions_per_request": self.sessions / requests,
+                "checkouts_per_request": self.checkouts / requests,
+                "max_sessions_per_request": self.max_sessions_per_request,
+                "max_connections_per_request": self.max_connections_per_request,
+                "requests_without_checkout": self.requests_without_checkout,
+                "pool": engine.pool.status(),
+            }
+
+
+session_metrics = SessionMetrics()
+
+_request_stats: ContextVar[Optional[RequestDBStats]] = ContextVar(
+    "request_db_stats", default=None
+)
+
+# 连接记录上保存取出它的请求，归还时即使不在同一上下文中也能计数
+_STATS_KEY = "request_db_stats"
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.checkouts += 1
+        stats.connections += 1
+        stats.max_connections = max(stats.max_connections, stats.connections)
+        connection_record.info[_STATS_KEY] = stats
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    stats = connection_record.info.pop(_STATS_KEY, None)
+    if stats is not None:
+        stats.connections -= 1
+
+
+def begin_request_stats() -> RequestDBStats:
+    stats = RequestDBStats()
+    _request_stats.set(stats)
+    return stats
+
+
+def end_request_stats(stats: RequestDBStats) -> None:
+    session_metrics.record(stats)
+    # 顺序取出多次连接（如 commit 后 refresh）是正常的，只有多个会话或同时持有多个连接才告警
+    if stats.sessions > 1 or stats.max_connections > 1:
+        logger.warning(
+            f"Request used {stats.sessions} sessions / "
+            f"{stats.max_connections} concurrent connections"
+        )
+    _request_stats.set(None)
+
+
+# 数据库依赖项：每个请求只创建一个 Session，并缓存在 request.state 上，
+# 同一请求内的所有依赖（包括 get_current_user）都复用它
+def get_db(request: Request) -> Generator[Session, None, None]:
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        yield db
+        return
+
     db = SessionLocal()
+    request.state.db = db
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.sessions += 1
     try:
         logger.debug("Creating new database session")
         yield db
@@ -32,4 +155,5 @@ def get_db():
         raise
     finally:
         logger.debug("Closing database session")
+        request.state.db = None
         db.close()
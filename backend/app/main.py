@@ -1,12 +1,20 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import logging
 import uvicorn
 import os
 
+from app.api import deps
+from app.api.responses import SnapshotFiles, invalid_cursor_handler
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.pagination import InvalidCursor
+from app.core.redis import close_redis
+from app.crud.cache import cache_stats
+from app.crud.guide_progress import progress_buffer
+from app.db.session import SessionLocal, begin_request_stats, end_request_stats, session_metrics
 
 # 配置日志
 logging.basicConfig(
@@ -29,18 +37,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 统计每个请求使用的数据库会话与连接数
+@app.middleware("http")
+async def db_session_metrics(request: Request, call_next):
+    stats = begin_request_stats()
+    try:
+        return await call_next(request)
+    finally:
+        end_request_stats(stats)
+
+# 无效或被篡改的分页游标
+app.add_exception_handler(InvalidCursor, invalid_cursor_handler)
+
 # 创建上传目录
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 
 # 静态文件服务
 app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
+# 已发布指南的静态快照，不经过鉴权和数据库；生产环境可由 CDN 或对象存储直接提供
+os.makedirs(settings.GUIDE_SNAPSHOT_DIR, exist_ok=True)
+app.mount(
+    "/static/guides",
+    SnapshotFiles(directory=settings.GUIDE_SNAPSHOT_DIR, max_age=settings.GUIDE_SNAPSHOT_MAX_AGE),
+    name="guide_snapshots",
+)
+
 # API 路由
 app.include_router(api_router, prefix="/api/v1")
 
+@app.on_event("startup")
+async def startup():
+    # 定期批量写入合并后的指南查看记录
+    app.state.progress_flusher = asyncio.create_task(
+        progress_buffer.run(SessionLocal, settings.GUIDE_PROGRESS_FLUSH_SECONDS)
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    # 取消时写入剩余的查看记录
+    app.state.progress_flusher.cancel()
+    try:
+        await app.state.progress_flusher
+    except asyncio.CancelledError:
+        pass
+    await close_redis()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Silver Companion API"}
 
+# 运行指标只对超级管理员开放
+@app.get("/metrics/db", dependencies=[Depends(deps.get_current_active_superuser)])
+async def db_metrics():
+    return session_metrics.snapshot()
+
+@app.get("/metrics/cache", dependencies=[Depends(deps.get_current_active_superuser)])
+async def model_cache_metrics():
+    return cache_stats()
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
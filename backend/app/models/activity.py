@@ -1,9 +1,11 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Boolean, Text, Enum, Index, UniqueConstraint, event, func, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
 import enum
 
-from app.db.base_class import Base
+from app.db.base_class import Base, SoftDeleteMixin
+from app.utils.geo import GEOHASH_PRECISION, encode_geohash
 
 class ActivityType(enum.Enum):
     EXERCISE = "exercise"
@@ -19,37 +21,127 @@ class ActivityStatus(enum.Enum):
     CANCELLED = "cancelled"
     COMPLETED = "completed"
 
-class Activity(Base):
+class Activity(SoftDeleteMixin, Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        # 可报名活动列表：status='scheduled' 且未删除，按 start_time 排序
+        Index(
+            "ix_activities_scheduled_start_time",
+            "start_time",
+            postgresql_where=text("status = 'scheduled' AND deleted_at IS NULL"),
+            sqlite_where=text("status = 'scheduled' AND deleted_at IS NULL"),
+        ),
+        # 同一周期活动的同一次只物化一行
+        UniqueConstraint("series_id", "occurrence_start", name="uq_activities_series_occurrence"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(Text)
     location = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # 由经纬度自动生成，附近活动查询按前缀区间走 B-tree 索引
+    geohash = Column(String(GEOHASH_PRECISION), nullable=True, index=True)
     start_time = Column(DateTime)
     end_time = Column(DateTime)
     max_participants = Column(Integer, nullable=True)
+    # 未取消的报名人数，报名/取消时原子地增减
+    participant_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # 候补队列序号发号器，只增不减
+    waitlist_seq = Column(Integer, nullable=False, default=0, server_default="0")
     is_online = Column(Boolean, default=False)
     category = Column(String)
     status = Column(String, default="scheduled")  # scheduled, ongoing, completed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # 由周期活动物化出的某一次：所属周期和按规则计算的原定开始时间
+    series_id = Column(Integer, ForeignKey("activity_series.id"), nullable=True)
+    occurrence_start = Column(DateTime, nullable=True)
+
     # Foreign keys
     organizer_id = Column(Integer, ForeignKey("users.id"))
 
     # Relationships
     organizer = relationship("User", back_populates="activities")
     participants = relationship("ActivityParticipant", back_populates="activity")
+    series = relationship("ActivitySeries", back_populates="occurrences")
+
+class ActivitySeries(SoftDeleteMixin, Base):
+    """
+    周期活动：规则只存一行，查询时按时间窗口展开为各次活动，
+    有人报名某一次时才物化为 Activity 行。
+    """
+    __tablename__ = "activity_series"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String)
+    description = Column(Text)
+    location = Column(String, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    max_participants = Column(Integer, nullable=True)
+    is_online = Column(Boolean, default=False)
+    category = Column(String)
+    # 第一次的开始时间和每次的时长
+    dtstart = Column(DateTime, nullable=False)
+    duration_minutes = Column(Integer, nullable=False)
+    rrule = Column(String, nullable=False)  # 如 FREQ=WEEKLY;BYDAY=TU,TH
+    # 创建时 dtstart 的 UTC 偏移（分钟），规则按这个偏移下的本地日期展开
+    utc_offset_minutes = Column(Integer, nullable=False, default=0, server_default="0")
+    # 最后一次的开始时间，无限重复时为空；用于查询时排除已结束的周期
+    until = Column(DateTime, nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    organizer_id = Column(Integer, ForeignKey("users.id"))
+
+    occurrences = relationship("Activity", back_populates="series")
+
+def activity_geohash(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """
+    活动坐标对应的 geohash，坐标不完整时为空。批量 INSERT/UPDATE 不触发下面的
+    mapper 事件，需要调用方用它补上 geohash 列。
+    """
+    if latitude is None or longitude is None:
+        return None
+    return encode_geohash(latitude, longitude)
+
+@event.listens_for(Activity, "before_insert")
+@event.listens_for(Activity, "before_update")
+def _set_geohash(mapper, connection, target: Activity) -> None:
+    target.geohash = activity_geohash(target.latitude, target.longitude)
+
+# 活动占用的时间区间 [start_time, end_time)，日历查询用 && 判断与时间窗口重叠。
+# end_time 早于 start_time 的数据按空区间处理，不会让建索引或查询报错
+TIME_RANGE = func.tsrange(
+    Activity.start_time, func.greatest(Activity.start_time, Activity.end_time)
+)
+
+# 只在 PostgreSQL 上创建
+Index(
+    "ix_activities_time_range",
+    TIME_RANGE,
+    postgresql_using="gist",
+    postgresql_where=Activity.deleted_at.is_(None),
+).ddl_if(dialect="postgresql")
 
 class ActivityParticipant(Base):
     __tablename__ = "activity_participants"
+    __table_args__ = (
+        UniqueConstraint("activity_id", "user_id", name="uq_activity_participants_activity_user"),
+        Index("ix_activity_participants_activity_position", "activity_id", "position"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     activity_id = Column(Integer, ForeignKey("activities.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
-    status = Column(String, default="registered")  # registered, attended, cancelled
+    status = Column(String, default="registered")  # registered, waitlisted, attended, cancelled
+    # 候补队列中的先后顺序（FIFO），仅候补记录有值
+    position = Column(Integer, nullable=True)
     joined_at = Column(DateTime, default=datetime.utcnow)
+    checked_in_at = Column(DateTime, nullable=True)
     
     # Relationships
     activity = relationship("Activity", back_populates="participants")
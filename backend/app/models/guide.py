@@ -1,11 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
-from app.db.base_class import Base
+from app.db.base_class import Base, SoftDeleteMixin
 
-class Guide(Base):
+class Guide(SoftDeleteMixin, Base):
     __tablename__ = "guides"
+    __table_args__ = (
+        Index("ix_guides_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -13,6 +17,8 @@ class Guide(Base):
     category = Column(String, index=True)
     difficulty = Column(String, default="beginner")  # beginner, intermediate, advanced
     is_published = Column(Boolean, default=False)
+    # 标题、简介和全部步骤的分词结果，由 app.crud.search 在写入时维护
+    search_vector = Column(TSVECTOR().with_variant(Text(), "sqlite"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -25,6 +31,13 @@ class Guide(Base):
 
 class GuideStep(Base):
     __tablename__ = "guide_steps"
+    __table_args__ = (
+        # 提交时才检查，批量调整顺序的单条 UPDATE 中间状态允许重复；SQLite 不支持可延迟的唯一约束
+        UniqueConstraint(
+            "guide_id", "order", name="uq_guide_steps_guide_order",
+            deferrable=True, initially="DEFERRED",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -35,7 +48,55 @@ class GuideStep(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Foreign keys
-    guide_id = Column(Integer, ForeignKey("guides.id"))
+    guide_id = Column(Integer, ForeignKey("guides.id"), index=True)
 
     # Relationships
     guide = relationship("Guide", back_populates="steps")
+
+class GuideProgress(Base):
+    """
+    用户阅读一个指南的进度，由 app.crud.guide_progress 批量合并写入。
+    """
+    __tablename__ = "guide_progress"
+    __table_args__ = (
+        UniqueConstraint("user_id", "guide_id", name="uq_guide_progress_user_guide"),
+        Index("ix_guide_progress_guide_completed", "guide_id", "completed_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    guide_id = Column(Integer, ForeignKey("guides.id"), nullable=False)
+    # 看过的不同步骤数，达到步骤总数时记录 completed_at
+    steps_viewed = Column(Integer, nullable=False, default=0)
+    last_step_id = Column(Integer, ForeignKey("guide_steps.id", ondelete="SET NULL"), nullable=True)
+    last_viewed_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+class GuideStepView(Base):
+    """
+    用户看过的步骤，每个 (用户, 步骤) 一行，多次查看只累加次数。
+    """
+    __tablename__ = "guide_step_views"
+    __table_args__ = (
+        UniqueConstraint("user_id", "step_id", name="uq_guide_step_views_user_step"),
+        Index("ix_guide_step_views_user_guide", "user_id", "guide_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    guide_id = Column(Integer, ForeignKey("guides.id"), nullable=False)
+    step_id = Column(Integer, ForeignKey("guide_steps.id", ondelete="CASCADE"), nullable=False)
+    view_count = Column(Integer, nullable=False, default=1)
+    first_viewed_at = Column(DateTime, nullable=False)
+    last_viewed_at = Column(DateTime, nullable=False)
+
+class GuideStepStats(Base):
+    """
+    每个步骤的累计查看人数和次数，写入进度时同步累加，作者查看漏斗时直接读取。
+    """
+    __tablename__ = "guide_step_stats"
+
+    step_id = Column(Integer, ForeignKey("guide_steps.id", ondelete="CASCADE"), primary_key=True)
+    guide_id = Column(Integer, ForeignKey("guides.id"), nullable=False, index=True)
+    viewers = Column(Integer, nullable=False, default=0)
+    views = Column(Integer, nullable=False, default=0)
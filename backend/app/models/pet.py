@@ -3,7 +3,7 @@ from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 
-from app.db.base_class import Base
+from app.db.base_class import Base, SoftDeleteMixin
 
 class PetType(enum.Enum):
     CAT = "cat"
@@ -12,7 +12,7 @@ class PetType(enum.Enum):
     RABBIT = "rabbit"
     OTHER = "other"
 
-class Pet(Base):
+class Pet(SoftDeleteMixin, Base):
     __tablename__ = "pets"
 
     id = Column(Integer, primary_key=True, index=True)
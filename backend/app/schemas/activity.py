@@ -1,12 +1,16 @@
 from typing import Optional, List
-from datetime import datetime
-from pydantic import BaseModel
+from datetime import date, datetime
+from pydantic import BaseModel, Field, field_validator
+
+from app.utils.recurrence import parse_rrule
 
 # Shared properties
 class ActivityBase(BaseModel):
     title: str
     description: str
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_time: datetime
     end_time: datetime
     max_participants: Optional[int] = None
@@ -23,6 +27,8 @@ class ActivityUpdate(ActivityBase):
     title: Optional[str] = None
     description: Optional[str] = None
     location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     max_participants: Optional[int] = None
@@ -49,18 +55,100 @@ class Activity(ActivityInDBBase):
 class ActivityInDB(ActivityInDBBase):
     pass
 
+# Lightweight list item: only the columns list views need, without description.
+# Every field except id is optional so the list endpoint can project a subset.
+# Occurrences of a recurring series that nobody has joined yet are not stored,
+# so they have no id and are identified by series_id + occurrence_start.
+class ActivitySummary(BaseModel):
+    id: Optional[int] = None
+    series_id: Optional[int] = None
+    occurrence_start: Optional[datetime] = None
+    title: Optional[str] = None
+    location: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    max_participants: Optional[int] = None
+    is_online: Optional[bool] = None
+    category: Optional[str] = None
+    status: Optional[str] = None
+    participant_count: Optional[int] = None
+    is_participant: Optional[bool] = None
+
+    class Config:
+        from_attributes = True
+
+# Nearby search result, with the distance from the searched point in kilometres
+class ActivityNearby(ActivitySummary):
+    distance_km: float
+
+# Calendar view: the activities overlapping one (local) day of the requested window
+class ActivityCalendarDay(BaseModel):
+    day: date
+    activities: List[ActivitySummary]
+
+# Recurring activity: the rule is stored once and expanded per requested window
+class ActivitySeriesBase(BaseModel):
+    title: str
+    description: str
+    location: Optional[str] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    max_participants: Optional[int] = None
+    is_online: bool = False
+    category: str
+    dtstart: datetime
+    duration_minutes: int = Field(..., gt=0, le=24 * 60)
+    rrule: str  # RRULE subset, e.g. FREQ=WEEKLY;BYDAY=TU,TH or FREQ=MONTHLY;BYDAY=1WE;COUNT=12
+
+    @field_validator("rrule")
+    @classmethod
+    def check_rrule(cls, value: str) -> str:
+        parse_rrule(value)
+        return value
+
+class ActivitySeriesCreate(ActivitySeriesBase):
+    pass
+
+class ActivitySeries(ActivitySeriesBase):
+    id: int
+    organizer_id: Optional[int] = None
+    utc_offset_minutes: int = 0
+    until: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
 # Activity participant schema
 class ActivityParticipantBase(BaseModel):
     activity_id: int
     user_id: int
-    status: str = "registered"  # registered, attended, cancelled
+    status: str = "registered"  # registered, waitlisted, attended, cancelled
 
 class ActivityParticipantCreate(ActivityParticipantBase):
     pass
 
 class ActivityParticipant(ActivityParticipantBase):
     id: int
+    position: Optional[int] = None
+    checked_in_at: Optional[datetime] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+# Bulk check-in: user ids entered by staff and/or scanned check-in codes
+class CheckInRequest(BaseModel):
+    user_ids: List[int] = Field(default_factory=list, max_length=1000)
+    codes: List[str] = Field(default_factory=list, max_length=1000)
+
+class CheckInResult(BaseModel):
+    checked_in: List[int]
+    already_checked_in: List[int]
+    not_registered: List[int]
+    invalid_codes: List[str]
+
+class CheckInCode(BaseModel):
+    code: str
@@ -3,7 +3,7 @@ from typing import Optional
 from pydantic import BaseModel, EmailStr, constr
 
 class AppUserBase(BaseModel):
-    phone: constr(regex=r'^\d{11}$')
+    phone: constr(pattern=r'^\d{11}$')
     nickname: Optional[str] = None
     avatar: Optional[str] = None
     gender: Optional[str] = None
@@ -33,3 +33,18 @@ class AppUser(AppUserInDBBase):
 
 class AppUserInDB(AppUserInDBBase):
     pass
+
+# Lightweight list item; fields other than id are optional so the list
+# endpoint can project a subset.
+class AppUserSummary(BaseModel):
+    id: int
+    phone: Optional[str] = None
+    nickname: Optional[str] = None
+    avatar: Optional[str] = None
+    gender: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    last_login: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -4,6 +4,7 @@ from .app_user import AppUser
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
     user: AppUser
 
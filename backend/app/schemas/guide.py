@@ -1,6 +1,6 @@
 from typing import Optional, List
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 
 # Guide step schemas
 class GuideStepBase(BaseModel):
@@ -18,6 +18,16 @@ class GuideStepUpdate(GuideStepBase):
     content: Optional[str] = None
     order: Optional[int] = None
 
+# One entry of a batch step edit: the step id plus the fields to change
+class GuideStepPatch(GuideStepUpdate):
+    id: int
+
+# Batch step edit: `order` is the complete new ordering as a list of step ids,
+# `steps` are per-step patches; both are applied in one transaction
+class GuideStepBatch(BaseModel):
+    order: Optional[List[int]] = None
+    steps: List[GuideStepPatch] = []
+
 class GuideStepInDBBase(GuideStepBase):
     id: int
     guide_id: int
@@ -50,7 +60,8 @@ class GuideUpdate(GuideBase):
 
 class GuideInDBBase(GuideBase):
     id: int
-    creator_id: int
+    # the model column is author_id; the API keeps exposing it as creator_id
+    creator_id: int = Field(validation_alias=AliasChoices("creator_id", "author_id"))
     created_at: datetime
     updated_at: datetime
 
@@ -60,5 +71,65 @@ class GuideInDBBase(GuideBase):
 class Guide(GuideInDBBase):
     pass
 
+# Lightweight list item without description; fields other than id are optional
+# so the list endpoint can project a subset.
+class GuideSummary(BaseModel):
+    id: int
+    title: Optional[str] = None
+    category: Optional[str] = None
+    difficulty: Optional[str] = None
+    is_published: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Search result: the guide summary with its relevance score
+class GuideSearchHit(GuideSummary):
+    rank: float
+
 class GuideWithSteps(Guide):
     steps: List[GuideStep] = []
+
+# Compact read model for guide detail: steps without per-step bookkeeping fields
+class GuideStepItem(BaseModel):
+    id: int
+    title: str
+    description: str
+    content: Optional[str] = None
+    order: int
+
+    class Config:
+        from_attributes = True
+
+class GuideDetail(Guide):
+    steps: List[GuideStepItem] = []
+
+# Reading progress of the current user; recorded views are written in batches,
+# so this may lag a few seconds behind
+class GuideProgress(BaseModel):
+    guide_id: int
+    steps_viewed: int = 0
+    last_step_id: Optional[int] = None
+    last_viewed_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    viewed_step_ids: List[int] = []
+
+    class Config:
+        from_attributes = True
+
+class GuideFunnelStep(BaseModel):
+    step_id: int
+    order: Optional[int] = None
+    title: Optional[str] = None
+    viewers: int = 0
+    views: int = 0
+
+# Completion funnel for guide authors: readers who started and finished the guide,
+# and how many of them reached each step
+class GuideFunnel(BaseModel):
+    guide_id: int
+    started: int
+    completed: int
+    steps: List[GuideFunnelStep] = []
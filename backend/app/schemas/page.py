@@ -0,0 +1,11 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# 列表接口统一的响应结构：next_cursor 为空表示没有下一页，
+# total 仅在请求了 count 时返回
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
@@ -48,6 +48,22 @@ class Pet(PetInDBBase):
 class PetInDB(PetInDBBase):
     pass
 
+# Lightweight list item without description; fields other than id are optional
+# so the list endpoint can project a subset.
+class PetSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    type: Optional[str] = None
+    breed: Optional[str] = None
+    age: Optional[int] = None
+    health: Optional[int] = None
+    happiness: Optional[int] = None
+    level: Optional[int] = None
+    experience: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 # Pet interaction base schema
 class PetInteractionBase(BaseModel):
     type: str
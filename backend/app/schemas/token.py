@@ -3,7 +3,11 @@ from pydantic import BaseModel
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
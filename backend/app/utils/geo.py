@@ -0,0 +1,98 @@
+import math
+from typing import List, Optional, Tuple
+
+# 地球平均半径（千米）
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+GEOHASH_PRECISION = 12
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    geohash 编码：前缀相同的点落在同一个网格内，前缀越长网格越小，
+    用普通 B-tree 索引上的前缀区间查询即可找出某个网格里的点。
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """
+    指定精度下一个网格的 (纬度跨度, 经度跨度)，单位为度。
+    """
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    覆盖以 (latitude, longitude) 为圆心、radius_km 为半径的圆的 geohash 网格：
+    选网格宽高都不小于半径的最高精度，取圆心所在网格及其周围 8 个网格。
+    """
+    # 经度方向按圆内离赤道最远处计算，网格在那里最窄
+    farthest = min(abs(latitude) + radius_km / KM_PER_DEGREE, 89.0)
+    lon_km_per_degree = KM_PER_DEGREE * math.cos(math.radians(farthest))
+    precision = 1
+    while precision < GEOHASH_PRECISION:
+        lat_span, lon_span = cell_size(precision + 1)
+        if lat_span * KM_PER_DEGREE < radius_km or lon_span * lon_km_per_degree < radius_km:
+            break
+        precision += 1
+
+    lat_span, lon_span = cell_size(precision)
+    cells = []
+    for dlat in (-1, 0, 1):
+        lat = latitude + dlat * lat_span
+        if not -90 <= lat <= 90:
+            continue
+        for dlon in (-1, 0, 1):
+            lon = (longitude + dlon * lon_span + 180) % 360 - 180
+            cell = encode_geohash(lat, lon, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    以 prefix 开头的 geohash 的上界（不含），即按 base32 字母表递增最后一位；
+    配合 geohash >= prefix 构成 B-tree 可用的区间条件。prefix 全是 z 时没有上界。
+    """
+    prefix = prefix.rstrip(_BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + _BASE32[_BASE32.index(prefix[-1]) + 1]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    两点间的球面距离（千米）。
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
@@ -0,0 +1,33 @@
+import logging
+from typing import Any, Dict
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WAITLIST_PROMOTED = "activity.waitlist_promoted"
+
+
+async def publish_event(event_type: str, payload: Dict[str, Any]) -> None:
+    """
+    发布通知事件（站内信、推送等）：配置了 NOTIFICATION_WEBHOOK_URL 时以 JSON
+    {"type", "payload"} POST 给推送服务，否则只写日志。通知在请求提交后的后台任务中发送，
+    失败只记录日志，不影响已完成的操作。
+    """
+    if not settings.NOTIFICATION_WEBHOOK_URL:
+        logger.info(f"Notification webhook not configured, event {event_type} not delivered: {payload}")
+        return
+    try:
+        async with httpx.AsyncClient(timeout=settings.NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS) as client:
+            response = await client.post(
+                settings.NOTIFICATION_WEBHOOK_URL, json={"type": event_type, "payload": payload}
+            )
+            response.raise_for_status()
+    except httpx.HTTPError as exc:
+        logger.warning(f"Publishing notification event {event_type} failed: {exc}")
+
+
+async def notify_waitlist_promoted(user_id: int, activity_id: int) -> None:
+    await publish_event(WAITLIST_PROMOTED, {"user_id": user_id, "activity_id": activity_id})
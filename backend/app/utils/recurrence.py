@@ -0,0 +1,180 @@
+import calendar
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+# 支持 RFC 5545 RRULE 的一个子集：
+#   FREQ=DAILY|WEEKLY|MONTHLY;INTERVAL=n;COUNT=n;UNTIL=YYYYMMDDTHHMMSSZ
+#   WEEKLY 的 BYDAY=MO,WE；MONTHLY 的 BYDAY=1TU（第一个周二）、-1FR（最后一个周五）
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# 单次展开最多生成的日期数，防止异常规则拖垮请求
+MAX_OCCURRENCES = 1000
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    freq: str
+    interval: int = 1
+    count: Optional[int] = None
+    until: Optional[datetime] = None
+    # (序号, 星期几)，序号为 0 表示每周的这一天
+    byday: Tuple[Tuple[int, int], ...] = ()
+
+
+def parse_rrule(value: str) -> RecurrenceRule:
+    """
+    解析 RRULE 字符串，不支持的写法抛出 ValueError。UNTIL 按 UTC 解析为不带时区的时间。
+    """
+    parts = {}
+    for part in value.strip().removeprefix("RRULE:").split(";"):
+        if not part:
+            continue
+        name, sep, val = part.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid RRULE part: {part}")
+        parts[name.upper()] = val.upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    interval = int(parts.pop("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError("INTERVAL must be positive")
+    count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+    if count is not None and not 1 <= count <= MAX_OCCURRENCES:
+        raise ValueError(f"COUNT must be between 1 and {MAX_OCCURRENCES}")
+    until = None
+    if "UNTIL" in parts:
+        raw = parts.pop("UNTIL").rstrip("Z")
+        until = datetime.strptime(raw, "%Y%m%dT%H%M%S" if "T" in raw else "%Y%m%d")
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL cannot both be set")
+
+    byday = []
+    for item in filter(None, parts.pop("BYDAY", "").split(",")):
+        ordinal, day = item[:-2], item[-2:]
+        if day not in WEEKDAYS:
+            raise ValueError(f"Invalid BYDAY value: {item}")
+        ordinal = int(ordinal) if ordinal not in ("", "+") else 0
+        if freq == "DAILY" or (freq == "WEEKLY" and ordinal) or not -5 <= ordinal <= 5:
+            raise ValueError(f"Unsupported BYDAY value for {freq}: {item}")
+        byday.append((ordinal, WEEKDAYS.index(day)))
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}")
+    return RecurrenceRule(freq, interval, count, until, tuple(byday))
+
+
+def _add_months(value: datetime, months: int) -> Tuple[int, int]:
+    index = value.year * 12 + value.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _month_days(rule: RecurrenceRule, dtstart: datetime, year: int, month: int) -> List[int]:
+    last = calendar.monthrange(year, month)[1]
+    if not rule.byday:
+        # 没有 BYDAY 时取 dtstart 的日期，当月没有这一天（如 31 日）则跳过
+        return [dtstart.day] if dtstart.day <= last else []
+    days = set()
+    for ordinal, weekday in rule.byday:
+        matches = [
+            day for day in range(1, last + 1) if calendar.weekday(year, month, day) == weekday
+        ]
+        if ordinal == 0:
+            days.update(matches)
+        elif abs(ordinal) <= len(matches):
+            days.add(matches[ordinal - 1 if ordinal > 0 else ordinal])
+    return sorted(days)
+
+
+def _candidates(rule: RecurrenceRule, dtstart: datetime, first_period: int) -> Iterator[datetime]:
+    period = first_period
+    week_start = dtstart - timedelta(days=dtstart.weekday())
+    weekdays = sorted({weekday for _, weekday in rule.byday}) or [dtstart.weekday()]
+    while True:
+        step = period * rule.interval
+        if rule.freq == "DAILY":
+            dates = [dtstart + timedelta(days=step)]
+        elif rule.freq == "WEEKLY":
+            base = week_start + timedelta(weeks=step)
+            dates = [base + timedelta(days=weekday) for weekday in weekdays]
+        else:
+            year, month = _add_months(dtstart, step)
+            dates = [
+                dtstart.replace(year=year, month=month, day=day)
+                for day in _month_days(rule, dtstart, year, month)
+            ]
+        for value in dates:
+            if value >= dtstart:
+                yield value
+        period += 1
+
+
+def _skip_periods(rule: RecurrenceRule, dtstart: datetime, start: datetime) -> int:
+    # 没有 COUNT 时可以直接跳到窗口附近，不必从 dtstart 逐个展开
+    if rule.count is not None or start <= dtstart:
+        return 0
+    if rule.freq == "DAILY":
+        periods = (start - dtstart).days // rule.interval
+    elif rule.freq == "WEEKLY":
+        week_start = dtstart - timedelta(days=dtstart.weekday())
+        periods = (start - week_start).days // (7 * rule.interval)
+    else:
+        months = (start.year - dtstart.year) * 12 + start.month - dtstart.month
+        periods = months // rule.interval
+    return max(periods - 1, 0)
+
+
+def _to_local(rule: RecurrenceRule, offset: timedelta) -> RecurrenceRule:
+    # UNTIL 是 UTC 时间，展开在本地时间进行
+    if rule.until is None or not offset:
+        return rule
+    return replace(rule, until=rule.until + offset)
+
+
+def occurrences(
+    rule: RecurrenceRule,
+    dtstart: datetime,
+    start: datetime,
+    end: datetime,
+    offset: timedelta = timedelta(0),
+) -> List[datetime]:
+    """
+    规则在 [start, end) 内的各次开始时间，按时间排序；只展开这个窗口，不生成整条序列。
+    参数和结果都是不带时区的 UTC 时间；offset 为组织者的 UTC 偏移，
+    BYDAY、每月第几天等按这个偏移下的本地日期计算。
+    """
+    rule, dtstart = _to_local(rule, offset), dtstart + offset
+    start, end = start + offset, end + offset
+    results: List[datetime] = []
+    generated = 0
+    for value in _candidates(rule, dtstart, _skip_periods(rule, dtstart, start)):
+        generated += 1
+        if rule.count is not None and generated > rule.count:
+            break
+        if (rule.until is not None and value > rule.until) or value >= end:
+            break
+        if generated > MAX_OCCURRENCES:
+            break
+        if value >= start:
+            results.append(value - offset)
+    return results
+
+
+def last_occurrence(
+    rule: RecurrenceRule, dtstart: datetime, offset: timedelta = timedelta(0)
+) -> Optional[datetime]:
+    """
+    最后一次的开始时间（UTC）；没有 COUNT 和 UNTIL 的无限规则返回 None。
+    """
+    if rule.count is None and rule.until is None:
+        return None
+    if rule.count is not None:
+        last = None
+        for index, value in enumerate(_candidates(rule, dtstart + offset, 0)):
+            if index >= rule.count:
+                break
+            last = value - offset
+        return last
+    return rule.until
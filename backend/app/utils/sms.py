@@ -0,0 +1,60 @@
+from typing import Optional
+import logging
+import secrets
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CODE_LENGTH = 6
+PHONE_LENGTH = 11
+
+
+def generate_verification_code(length: int = CODE_LENGTH) -> str:
+    """
+    生成指定位数的数字验证码。
+    """
+    return "".join(secrets.choice("0123456789") for _ in range(length))
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    规范化手机号：去掉空格、连字符和 +86 前缀；不是 11 位数字时返回 None。
+    """
+    if not phone:
+        return None
+    phone = phone.strip().replace(" ", "").replace("-", "")
+    if phone.startswith("+86"):
+        phone = phone[3:]
+    if not phone.isdigit() or len(phone) != PHONE_LENGTH:
+        return None
+    return phone
+
+
+def _mask(phone: str) -> str:
+    return f"{phone[:3]}****{phone[-4:]}"
+
+
+async def send_verification_code(phone: str, code: str) -> None:
+    """
+    发送短信验证码：配置了 SMS_GATEWAY_URL 时以 JSON {"phone", "code"} POST 给短信网关，
+    失败时抛出异常。未配置网关时，development 环境把验证码写入日志便于本地调试，
+    其他环境抛出 RuntimeError，不会假装已发送。
+    """
+    if settings.SMS_GATEWAY_URL:
+        headers = {}
+        if settings.SMS_GATEWAY_TOKEN:
+            headers["Authorization"] = f"Bearer {settings.SMS_GATEWAY_TOKEN}"
+        async with httpx.AsyncClient(timeout=settings.SMS_GATEWAY_TIMEOUT_SECONDS) as client:
+            response = await client.post(
+                settings.SMS_GATEWAY_URL, json={"phone": phone, "code": code}, headers=headers
+            )
+            response.raise_for_status()
+        logger.info(f"Verification code sent to {_mask(phone)}")
+        return
+    if settings.ENVIRONMENT == "development":
+        logger.info(f"SMS gateway not configured, verification code for {_mask(phone)}: {code}")
+        return
+    raise RuntimeError("SMS gateway is not configured (set SMS_GATEWAY_URL)")
@@ -0,0 +1,53 @@
+import re
+from typing import List
+
+from app.core.config import settings
+
+# 连续的汉字，或连续的字母数字
+_TOKEN_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[0-9a-z]+")
+_CJK_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]")
+
+_jieba = None
+
+
+def _cut_jieba(text: str) -> List[str]:
+    global _jieba
+    if _jieba is None:
+        import jieba
+
+        _jieba = jieba
+    return [word for word in _jieba.cut_for_search(text) if word.strip()]
+
+
+def _cut_bigram(text: str) -> List[str]:
+    if len(text) == 1:
+        return [text]
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+def tokenize(text: str, *, index: bool = False) -> List[str]:
+    """
+    搜索分词：英文和数字按词切分并转小写，中文按 SEARCH_TOKENIZER 切分。
+    建索引和查询必须使用同一种切分方式；建索引时（index=True）中文另外按单字切分，
+    只有一个字的查询（切分结果就是这个字）也能命中。
+    """
+    tokens: List[str] = []
+    for run in _TOKEN_RE.findall((text or "").lower()):
+        if not _CJK_RE.match(run):
+            tokens.append(run)
+            continue
+        if settings.SEARCH_TOKENIZER == "jieba":
+            words = _cut_jieba(run)
+        else:
+            words = _cut_bigram(run)
+        tokens.extend(words)
+        if index:
+            tokens.extend(char for char in run if char not in words)
+    return tokens
+
+
+def to_document(text: str) -> str:
+    """
+    建索引用的分词结果，用空格连接，交给 PostgreSQL 的 simple 配置生成 tsvector。
+    """
+    return " ".join(tokenize(text, index=True))
@@ -0,0 +1,122 @@
+"""
+CRUDBase.update 每次更新的开销：旧实现（jsonable_encoder 序列化整个 ORM 对象）
+与当前实现（mapper 列集合 + model_dump(exclude_unset=True)）对比。
+
+"apply" 只统计把更新内容写到对象上的耗时，"full" 包含 commit + refresh（SQLite 内存库）。
+
+在 backend 目录下运行：
+    python -m benchmarks.bench_crud_update
+"""
+from datetime import date, datetime
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase, apply_update, dump_update
+from app.db.base_class import Base
+from app.models.activity import Activity
+from app.models.app_user import AppUser
+from app.models.guide import Guide, GuideStep
+from app.models.pet import Pet
+from app.models.user import User
+from app.schemas.activity import ActivityUpdate
+from app.schemas.app_user import AppUserUpdate
+from app.schemas.guide import GuideStepUpdate, GuideUpdate
+from app.schemas.pet import PetUpdate
+from app.schemas.user import UserUpdate
+
+ROUNDS = 2000
+
+NOW = datetime(2025, 1, 1, 9, 0)
+
+CASES = [
+    (
+        User,
+        dict(email="bench@example.com", full_name="Bench", hashed_password="x"),
+        UserUpdate(full_name="Bench 2"),
+    ),
+    (
+        Pet,
+        dict(name="Mimi", type="cat", description="x" * 2000, owner_id=1),
+        PetUpdate(happiness=90),
+    ),
+    (
+        Activity,
+        dict(
+            title="Tai chi", description="x" * 2000, start_time=NOW,
+            end_time=NOW, category="exercise", organizer_id=1,
+        ),
+        ActivityUpdate(title="Morning tai chi"),
+    ),
+    (
+        Guide,
+        dict(title="Video calls", description="x" * 2000, category="technology", author_id=1),
+        GuideUpdate(is_published=True),
+    ),
+    (
+        GuideStep,
+        dict(title="Open the app", description="x", content="x" * 4000, order=1, guide_id=1),
+        GuideStepUpdate(order=2),
+    ),
+    (
+        AppUser,
+        dict(phone="13800000000", nickname="Bench", birth_date=date(1950, 1, 1)),
+        AppUserUpdate(nickname="Bench 2"),
+    ),
+]
+
+
+def legacy_apply(db_obj, obj_in) -> None:
+    obj_data = jsonable_encoder(db_obj)
+    update_data = obj_in.model_dump(exclude_unset=True)
+    for field in obj_data:
+        if field in update_data:
+            setattr(db_obj, field, update_data[field])
+
+
+def legacy_update(db: Session, db_obj, obj_in):
+    legacy_apply(db_obj, obj_in)
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def per_call(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[model.__table__ for model, _, _ in CASES]
+    )
+    db = Session(engine)
+
+    print(f"{'model':<12}{'apply old':>12}{'apply new':>12}{'full old':>12}{'full new':>12}  (us/update)")
+    for model, values, obj_in in CASES:
+        crud = CRUDBase(model)
+        db_obj = model(**values)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+
+        apply_old = per_call(lambda: legacy_apply(db_obj, obj_in))
+        apply_new = per_call(
+            lambda: apply_update(db_obj, dump_update(obj_in), crud.columns)
+        )
+        full_old = per_call(lambda: legacy_update(db, db_obj, obj_in), ROUNDS // 4)
+        full_new = per_call(lambda: crud.update(db, db_obj=db_obj, obj_in=obj_in), ROUNDS // 4)
+        print(
+            f"{model.__name__:<12}{apply_old:>12.1f}{apply_new:>12.1f}"
+            f"{full_old:>12.1f}{full_new:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+列表接口的列投影：加载完整 ORM 实体并按完整 schema 序列化，与只 SELECT
+列表需要的列（按行返回 dict）并按摘要 schema 序列化的对比。
+
+在 backend 目录下运行：
+    python -m benchmarks.bench_list_projection
+"""
+from datetime import datetime, timedelta
+import json
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity as crud_activity
+from app.db.base_class import Base
+from app.models.activity import Activity
+from app.models.user import User
+from app.schemas.activity import ActivitySummary
+
+ROWS = 1000
+ROUNDS = 20
+
+START = datetime(2025, 1, 1, 9, 0)
+
+FULL_FIELDS = [
+    "id", "title", "description", "location", "start_time", "end_time",
+    "max_participants", "is_online", "category", "status", "organizer_id",
+    "created_at", "updated_at",
+]
+
+
+def full_page(db: Session) -> str:
+    items, _, _ = crud_activity.get_page(db, limit=ROWS)
+    rows = [{field: getattr(item, field) for field in FULL_FIELDS} for item in items]
+    db.expunge_all()
+    return json.dumps(rows, default=str)
+
+
+def projected_page(db: Session, fields) -> str:
+    items, _, _ = crud_activity.get_page(db, limit=ROWS, fields=fields)
+    rows = [
+        ActivitySummary.model_validate(item).model_dump(mode="json", exclude_unset=True)
+        for item in items
+    ]
+    return json.dumps(rows)
+
+
+def per_call(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, Activity.__table__])
+    db = Session(engine)
+    db.execute(insert(Activity), [
+        dict(
+            title=f"Activity {i}", description="x" * 2000, location="Community hall",
+            start_time=START + timedelta(hours=i), end_time=START + timedelta(hours=i + 1),
+            category="exercise", organizer_id=1,
+        )
+        for i in range(ROWS)
+    ])
+    db.commit()
+
+    cases = [
+        ("full entity", lambda: full_page(db)),
+        ("summary", lambda: projected_page(db, list(ActivitySummary.model_fields))),
+        ("title+start", lambda: projected_page(db, ["title", "start_time"])),
+    ]
+    print(f"{ROWS} activities per page")
+    print(f"{'':<14}{'ms/page':>10}{'bytes':>12}")
+    for name, fn in cases:
+        print(f"{name:<14}{per_call(fn):>10.2f}{len(fn()):>12}")
+
+
+if __name__ == "__main__":
+    main()
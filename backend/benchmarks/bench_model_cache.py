@@ -0,0 +1,54 @@
+"""
+CRUDBase.get 的读穿透缓存：每次都查询数据库与命中进程内缓存（重建为会话内对象）对比。
+SQLite 内存库没有网络往返，Postgres 上未命中的代价还要再加一次 RTT。
+
+在 backend 目录下运行：
+    python -m benchmarks.bench_model_cache
+"""
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.db.base_class import Base
+from app.models.guide import Guide, GuideStep
+from app.models.user import User
+
+ROWS = 200
+ROUNDS = 20
+
+
+def per_get(crud: CRUDBase, engine) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        # 每轮一个新会话，模拟每个请求各自的 Session
+        with Session(engine) as db:
+            for id in range(1, ROWS + 1):
+                crud.get(db, id)
+    return (time.perf_counter() - start) / (ROUNDS * ROWS) * 1e6
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine, tables=[User.__table__, Guide.__table__, GuideStep.__table__]
+    )
+    with Session(engine) as db:
+        db.execute(insert(Guide), [
+            dict(title=f"Guide {i}", description="x" * 2000, category="technology", author_id=1)
+            for i in range(ROWS)
+        ])
+        db.commit()
+
+    uncached = CRUDBase(Guide)
+    cached = CRUDBase(Guide, cache=True)
+    per_get(cached, engine)  # 预热
+
+    print(f"{'uncached':>10}{'cached':>10}  (us/get)")
+    print(f"{per_get(uncached, engine):>10.1f}{per_get(cached, engine):>10.1f}")
+    print(cached.cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+列表分页的开销：OFFSET/LIMIT 与键集（游标）分页在浅页和深页上的对比。
+
+OFFSET 需要扫描并丢弃前面所有行，越往后翻越慢；键集分页直接从
+(start_time, id) 索引上的游标位置开始读取，每页耗时基本不变。
+
+在 backend 目录下运行：
+    python -m benchmarks.bench_pagination
+"""
+from datetime import datetime, timedelta
+import time
+
+from sqlalchemy import Index, create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity as crud_activity
+from app.db.base_class import Base
+from app.models.activity import Activity
+from app.models.user import User
+
+ROWS = 100_000
+PAGE_SIZE = 100
+PAGES = (1, 10, 100, 1000)
+ROUNDS = 20
+
+# 放在未来，保证都能被“可报名活动”查询选中
+START = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+
+
+def seed(db: Session) -> None:
+    rows = [
+        dict(
+            title=f"Activity {i}",
+            description="x" * 200,
+            start_time=START + timedelta(minutes=i % 5000),
+            end_time=START + timedelta(minutes=i % 5000 + 60),
+            category="exercise",
+            organizer_id=1,
+        )
+        for i in range(ROWS)
+    ]
+    db.execute(insert(Activity), rows)
+    db.commit()
+
+
+def offset_page(db: Session, page: int) -> list:
+    return (
+        crud_activity.query_available(db)
+        .order_by(Activity.start_time, Activity.id)
+        .offset((page - 1) * PAGE_SIZE)
+        .limit(PAGE_SIZE)
+        .all()
+    )
+
+
+def cursor_for(db: Session, page: int):
+    cursor = None
+    for _ in range(page - 1):
+        _, cursor, _ = crud_activity.get_available_page(db, cursor=cursor, limit=PAGE_SIZE)
+    return cursor
+
+
+def per_call(fn, rounds: int = ROUNDS) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+def main() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[User.__table__, Activity.__table__])
+    Index("ix_bench_activity_start_id", Activity.start_time, Activity.id).create(engine)
+    db = Session(engine)
+    seed(db)
+
+    print(f"{ROWS} rows, {PAGE_SIZE} per page")
+    print(f"{'page':>6}{'offset':>12}{'keyset':>12}  (ms/page)")
+    for page in PAGES:
+        cursor = cursor_for(db, page)
+        assert [a.id for a in offset_page(db, page)] == [
+            a.id for a in crud_activity.get_available_page(db, cursor=cursor, limit=PAGE_SIZE)[0]
+        ]
+        offset_ms = per_call(lambda: offset_page(db, page))
+        keyset_ms = per_call(
+            lambda: crud_activity.get_available_page(db, cursor=cursor, limit=PAGE_SIZE)
+        )
+        print(f"{page:>6}{offset_ms:>12.2f}{keyset_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
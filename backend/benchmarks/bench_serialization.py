@@ -0,0 +1,90 @@
+"""
+列表响应的序列化开销：FastAPI 默认路径（按 response_model 校验 -> dump_python(mode="json")
+-> JSONResponse 里 json.dumps）、校验一次后 model_dump_json，以及 page_response 采用的
+校验一次后 orjson 编码 model_dump() 三者对比。
+
+在 backend 目录下运行：
+    python -m benchmarks.bench_serialization
+"""
+from datetime import datetime, timedelta
+import asyncio
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.responses import page_response
+# 经 app.db.base 导入，注册 Activity 关系映射所需的全部模型
+from app.db.base import Activity
+from app.schemas.activity import ActivitySummary
+from app.schemas.page import Page
+
+SIZES = (100, 1000, 10000)
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+def make_rows(count: int) -> list:
+    return [
+        Activity(
+            id=i, title=f"社区太极 {i}", description="x" * 500, location="社区活动中心",
+            start_time=START + timedelta(hours=i), end_time=START + timedelta(hours=i + 1),
+            max_participants=20, is_online=False, category="exercise", status="scheduled",
+        )
+        for i in range(count)
+    ]
+
+
+def timed(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1e3
+
+
+async def fastapi_default(field, content) -> bytes:
+    data = await serialize_response(
+        field=field, response_content=content, exclude_unset=True
+    )
+    return JSONResponse(data).body
+
+
+def main() -> None:
+    field = create_response_field(
+        name="Response_read_activities", type_=Page[ActivitySummary], mode="serialization"
+    )
+    loop = asyncio.new_event_loop()
+
+    fields = list(ActivitySummary.model_fields)
+    header = f"{'rows':>7}{'input':>10}{'default':>12}{'dump_json':>12}{'orjson':>12}"
+    print(header + "  (ms/response)")
+    for size in SIZES:
+        entities = make_rows(size)
+        # get_page(fields=...) 返回的投影 dict
+        projected = [{name: getattr(row, name) for name in fields} for row in entities]
+        rounds = max(3, 20000 // size)
+        for kind, rows in (("entity", entities), ("dict", projected)):
+            content = {"items": rows, "next_cursor": None}
+            default_ms = timed(
+                lambda: loop.run_until_complete(fastapi_default(field, content)), rounds
+            )
+            dump_json_ms = timed(
+                lambda: Page[ActivitySummary]
+                .model_validate(content, from_attributes=True)
+                .model_dump_json(exclude_unset=True),
+                rounds,
+            )
+            orjson_ms = timed(
+                lambda: page_response(ActivitySummary, rows, None, exclude_unset=True).body,
+                rounds,
+            )
+            print(
+                f"{size:>7}{kind:>10}{default_ms:>12.2f}"
+                f"{dump_json_ms:>12.2f}{orjson_ms:>12.2f}"
+            )
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
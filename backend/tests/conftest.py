@@ -0,0 +1,83 @@
+"""
+测试在 SQLite 内存库上运行，不需要 PostgreSQL 和 Redis。
+
+在 backend 目录下运行：
+    python -m pytest -q
+"""
+from typing import Generator
+import os
+import sys
+import types
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# app.crud 的 __init__ 会导入 crud.health，而 models/health.py 与 models/health_record.py
+# 重复定义了 health_records 表，两者不能同时导入。这里只注册包路径，不执行 __init__，
+# 测试直接导入需要的 crud 子模块。
+if "app.crud" not in sys.modules:
+    _crud = types.ModuleType("app.crud")
+    _crud.__path__ = [os.path.join(os.path.dirname(os.path.dirname(__file__)), "app", "crud")]
+    sys.modules["app.crud"] = _crud
+
+import app.db.base  # 注册全部模型
+from app.crud.cache import _caches
+from app.crud.guide_snapshot import guide_snapshots
+from app.db.base_class import Base
+from app.models.user import User
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch) -> str:
+    # 指南快照在提交后写入磁盘，测试中写到临时目录
+    directory = str(tmp_path / "guides")
+    monkeypatch.setattr(guide_snapshots, "directory", directory)
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def clear_model_caches() -> None:
+    # 每个测试使用新的数据库，主键会重复，不能读到上一个测试缓存的行
+    for cache in _caches.values():
+        cache.local.clear()
+        cache._generations.clear()
+
+
+@pytest.fixture
+def engine() -> Generator[Engine, None, None]:
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+    @event.listens_for(engine, "connect")
+    def _enable_foreign_keys(dbapi_connection, connection_record) -> None:
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine: Engine) -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory: sessionmaker) -> Generator[Session, None, None]:
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(db: Session):
+    def make_user(email: str) -> User:
+        user = User(email=email, full_name=email.split("@")[0], hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user
+
+    return make_user
@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta
+import csv
+import io
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+import pytest
+
+from app.api import deps
+from app.api.v1.endpoints import activities
+from app.core.check_in import create_check_in_code
+from app.crud.activity import activity as crud_activity
+from app.models.activity import Activity
+from app.models.app_user import AppUser
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+@pytest.fixture
+def organizer(make_user):
+    return make_user("organizer@example.com")
+
+
+@pytest.fixture
+def activity(db: Session, organizer) -> Activity:
+    activity = Activity(
+        title="Tai chi",
+        description="",
+        category="exercise",
+        start_time=START,
+        end_time=START + timedelta(hours=1),
+        max_participants=2,
+        organizer_id=organizer.id,
+    )
+    db.add(activity)
+    db.commit()
+    return activity
+
+
+@pytest.fixture
+def client(db: Session, session_factory, organizer, monkeypatch) -> TestClient:
+    app = FastAPI()
+    app.include_router(activities.router, prefix="/activities")
+    app.dependency_overrides[deps.get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_active_user] = lambda: organizer
+    # 导出在独立的 Session 中流式读取
+    monkeypatch.setattr(activities, "SessionLocal", session_factory)
+    return TestClient(app)
+
+
+def join(db: Session, activity: Activity, *users, waitlist: bool = False) -> None:
+    for user in users:
+        crud_activity.add_participant(
+            db, activity_id=activity.id, user_id=user.id, waitlist=waitlist
+        )
+
+
+def test_check_in_reports_each_outcome(db, client, activity, make_user):
+    first, second, waitlisted, stranger = [
+        make_user(f"{name}@example.com") for name in ("first", "second", "waitlisted", "stranger")
+    ]
+    join(db, activity, first, second)
+    join(db, activity, waitlisted, waitlist=True)
+    url = f"/activities/{activity.id}/check-in"
+
+    response = client.post(url, json={"user_ids": [first.id], "codes": []})
+    assert response.json()["checked_in"] == [first.id]
+
+    response = client.post(url, json={
+        "user_ids": [first.id, stranger.id],
+        "codes": [
+            create_check_in_code(activity.id, second.id).lower(),
+            create_check_in_code(activity.id, waitlisted.id),
+            create_check_in_code(activity.id + 1, second.id),
+            f"{activity.id}-{second.id}-FORGED",
+            "garbage",
+        ],
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["checked_in"] == [second.id]
+    assert body["already_checked_in"] == [first.id]
+    assert body["not_registered"] == sorted([waitlisted.id, stranger.id])
+    assert body["invalid_codes"] == [
+        create_check_in_code(activity.id + 1, second.id),
+        f"{activity.id}-{second.id}-FORGED",
+        "garbage",
+    ]
+
+
+def test_only_the_organizer_checks_in(db, client, activity, make_user):
+    other = make_user("other@example.com")
+    client.app.dependency_overrides[deps.get_current_active_user] = lambda: other
+
+    response = client.post(
+        f"/activities/{activity.id}/check-in", json={"user_ids": [other.id], "codes": []}
+    )
+
+    assert response.status_code == 400
+
+
+def test_export_lists_participants_then_waitlist(db, client, activity, make_user):
+    registered, waitlisted, cancelled, third = [
+        make_user(f"{name}@example.com") for name in ("registered", "waitlisted", "cancelled", "third")
+    ]
+    registered.phone = "13800000001"
+    db.add(AppUser(phone="13800000001", nickname="Grandma", birth_date=date(1950, 5, 1)))
+    db.commit()
+    join(db, activity, registered, cancelled)
+    join(db, activity, waitlisted, third, waitlist=True)
+    crud_activity.remove_participant(db, activity_id=activity.id, user_id=cancelled.id)
+    crud_activity.check_in(db, activity_id=activity.id, user_ids=[registered.id])
+
+    response = client.get(f"/activities/{activity.id}/participants/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.text.startswith("\ufeff")
+    rows = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+    assert list(rows[0]) == activities.EXPORT_COLUMNS
+    # 取消的名额由候补第一位递补
+    assert [(row["email"], row["status"], row["waitlist_position"]) for row in rows] == [
+        ("registered@example.com", "attended", ""),
+        ("waitlisted@example.com", "registered", ""),
+        ("third@example.com", "waitlisted", "2"),
+    ]
+    assert rows[0]["nickname"] == "Grandma"
+    assert rows[0]["birth_date"] == "1950-05-01"
+    assert rows[0]["checked_in_at"] != ""
+    assert rows[1]["nickname"] == ""
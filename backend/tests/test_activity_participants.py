@@ -0,0 +1,228 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.activity import ActivityFull, AlreadyJoined, activity as crud_activity
+from app.models.activity import Activity, ActivityParticipant
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+@pytest.fixture
+def make_activity(db: Session):
+    def make_activity(max_participants=None) -> Activity:
+        activity = Activity(
+            title="Tai chi",
+            description="Morning tai chi",
+            category="exercise",
+            start_time=START,
+            end_time=START + timedelta(hours=1),
+            max_participants=max_participants,
+        )
+        db.add(activity)
+        db.commit()
+        return activity
+
+    return make_activity
+
+
+def participant_count(db: Session, activity_id: int) -> int:
+    return db.scalar(select(Activity.participant_count).where(Activity.id == activity_id))
+
+
+def statuses(db: Session, activity_id: int):
+    return dict(
+        db.execute(
+            select(ActivityParticipant.user_id, ActivityParticipant.status)
+            .where(ActivityParticipant.activity_id == activity_id)
+        ).all()
+    )
+
+
+def test_add_participant_takes_a_seat(db, make_user, make_activity):
+    activity = make_activity(max_participants=2)
+    user = make_user("a@example.com")
+
+    participant = crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+    assert participant.status == "registered"
+    assert participant.position is None
+    assert participant_count(db, activity.id) == 1
+
+
+def test_add_participant_raises_when_full(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    first, second = make_user("a@example.com"), make_user("b@example.com")
+    crud_activity.add_participant(db, activity_id=activity.id, user_id=first.id)
+
+    with pytest.raises(ActivityFull):
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=second.id)
+
+    # 整体回滚：没有留下报名记录，名额不变
+    assert statuses(db, activity.id) == {first.id: "registered"}
+    assert participant_count(db, activity.id) == 1
+
+
+def test_add_participant_without_limit(db, make_user, make_activity):
+    activity = make_activity()
+    for index in range(5):
+        user = make_user(f"user{index}@example.com")
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+    assert participant_count(db, activity.id) == 5
+
+
+def test_add_participant_twice_raises_already_joined(db, make_user, make_activity):
+    activity = make_activity(max_participants=5)
+    user = make_user("a@example.com")
+    crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+    with pytest.raises(AlreadyJoined):
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+    assert participant_count(db, activity.id) == 1
+
+
+def test_add_participant_after_cancelling_registers_again(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    user = make_user("a@example.com")
+    crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+    crud_activity.remove_participant(db, activity_id=activity.id, user_id=user.id)
+    assert participant_count(db, activity.id) == 0
+
+    participant = crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+    assert participant.status == "registered"
+    assert participant_count(db, activity.id) == 1
+
+
+def test_add_participant_to_deleted_activity_raises_full(db, make_user, make_activity):
+    activity = make_activity(max_participants=5)
+    user = make_user("a@example.com")
+    crud_activity.remove(db, id=activity.id)
+
+    with pytest.raises(ActivityFull):
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id)
+
+
+def test_full_activity_queues_on_waitlist(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    users = [make_user(f"user{index}@example.com") for index in range(3)]
+
+    joined = [
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id, waitlist=True)
+        for user in users
+    ]
+
+    assert [participant.status for participant in joined] == ["registered", "waitlisted", "waitlisted"]
+    assert joined[1].position < joined[2].position
+    assert participant_count(db, activity.id) == 1
+
+
+def test_waitlisted_user_cannot_join_twice(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    first, second = make_user("a@example.com"), make_user("b@example.com")
+    crud_activity.add_participant(db, activity_id=activity.id, user_id=first.id)
+    crud_activity.add_participant(db, activity_id=activity.id, user_id=second.id, waitlist=True)
+
+    with pytest.raises(AlreadyJoined):
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=second.id, waitlist=True)
+
+
+def test_cancelling_promotes_waitlist_in_order(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    users = [make_user(f"user{index}@example.com") for index in range(4)]
+    for user in users:
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id, waitlist=True)
+
+    promoted_ids = []
+    for user in users[:3]:
+        cancelled, promoted = crud_activity.remove_participant(
+            db, activity_id=activity.id, user_id=user.id
+        )
+        assert cancelled.status == "cancelled"
+        assert promoted.status == "registered"
+        assert promoted.position is None
+        promoted_ids.append(promoted.user_id)
+
+    assert promoted_ids == [user.id for user in users[1:]]
+    assert statuses(db, activity.id)[users[3].id] == "registered"
+    assert participant_count(db, activity.id) == 1
+
+
+def test_leaving_waitlist_does_not_promote(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    users = [make_user(f"user{index}@example.com") for index in range(3)]
+    for user in users:
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id, waitlist=True)
+
+    cancelled, promoted = crud_activity.remove_participant(
+        db, activity_id=activity.id, user_id=users[1].id
+    )
+
+    assert cancelled.status == "cancelled"
+    assert promoted is None
+    assert statuses(db, activity.id) == {
+        users[0].id: "registered", users[1].id: "cancelled", users[2].id: "waitlisted"
+    }
+    assert participant_count(db, activity.id) == 1
+
+    # 候补队列中跳过已退出的人
+    _, promoted = crud_activity.remove_participant(db, activity_id=activity.id, user_id=users[0].id)
+    assert promoted.user_id == users[2].id
+
+
+def test_promotion_waits_for_a_free_seat(db, make_user, make_activity):
+    activity = make_activity(max_participants=2)
+    users = [make_user(f"user{index}@example.com") for index in range(3)]
+    for user in users:
+        crud_activity.add_participant(db, activity_id=activity.id, user_id=user.id, waitlist=True)
+    # 组织者把名额调小后，空出的一个名额仍然超员，不递补
+    db.execute(Activity.__table__.update().values(max_participants=1))
+    db.commit()
+
+    _, promoted = crud_activity.remove_participant(db, activity_id=activity.id, user_id=users[0].id)
+
+    assert promoted is None
+    assert statuses(db, activity.id)[users[2].id] == "waitlisted"
+    assert participant_count(db, activity.id) == 1
+
+
+def test_remove_participant_without_registration(db, make_user, make_activity):
+    activity = make_activity(max_participants=1)
+    user = make_user("a@example.com")
+
+    assert crud_activity.remove_participant(db, activity_id=activity.id, user_id=user.id) == (None, None)
+
+
+def test_is_participant_in_list_and_detail(db, make_user, make_activity):
+    joined, other = make_activity(max_participants=1), make_activity()
+    registered, waitlisted, cancelled, stranger = [
+        make_user(f"{name}@example.com")
+        for name in ("registered", "waitlisted", "cancelled", "stranger")
+    ]
+    crud_activity.add_participant(db, activity_id=joined.id, user_id=registered.id)
+    crud_activity.add_participant(db, activity_id=joined.id, user_id=waitlisted.id, waitlist=True)
+    crud_activity.add_participant(db, activity_id=other.id, user_id=cancelled.id)
+    crud_activity.add_participant(db, activity_id=joined.id, user_id=cancelled.id, waitlist=True)
+    crud_activity.remove_participant(db, activity_id=joined.id, user_id=cancelled.id)
+
+    def flags(user_id):
+        items, _, _ = crud_activity.get_page(db, user_id=user_id, fields=["is_participant"])
+        return {item["id"]: item["is_participant"] for item in items}
+
+    assert flags(registered.id) == {joined.id: True, other.id: False}
+    # 候补不算已报名
+    assert flags(waitlisted.id) == {joined.id: False, other.id: False}
+    assert flags(cancelled.id) == {joined.id: False, other.id: True}
+    assert flags(stranger.id) == {joined.id: False, other.id: False}
+    # 没有用户时不计算该字段
+    items, _, _ = crud_activity.get_page(db, fields=["title", "is_participant"])
+    assert "is_participant" not in items[0]
+
+    db.expunge_all()
+    assert crud_activity.get_with_participation(db, id=joined.id, user_id=registered.id).is_participant
+    db.expunge_all()
+    assert not crud_activity.get_with_participation(db, id=joined.id, user_id=stranger.id).is_participant
@@ -0,0 +1,120 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.crud.activity import activity as crud_activity
+from app.models.activity import Activity
+
+# 本地时间 UTC+8
+UTC_OFFSET = timedelta(hours=8)
+
+
+@pytest.fixture
+def make_activity(db: Session):
+    def make_activity(title: str, start_time: datetime, hours: float = 1, **values) -> Activity:
+        activity = Activity(
+            title=title,
+            description="",
+            category="exercise",
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=hours),
+            **values,
+        )
+        db.add(activity)
+        db.commit()
+        return activity
+
+    return make_activity
+
+
+def calendar_titles(db: Session, start: datetime, end: datetime):
+    days = crud_activity.get_calendar(
+        db, start=start, end=end, utc_offset=UTC_OFFSET, fields=["title"]
+    )
+    return {day["day"]: [row["title"] for row in day["activities"]] for day in days}
+
+
+def test_calendar_groups_by_local_day(db, make_activity):
+    # 以下均为 UTC 时间；本地 3 月 1 日 0 点是 UTC 2 月 28 日 16 点
+    make_activity("Early morning", datetime(2026, 2, 28, 23, 0))
+    make_activity("Across midnight", datetime(2026, 3, 1, 15, 0), hours=2)
+    make_activity("After midnight", datetime(2026, 3, 1, 16, 30))
+    make_activity("Ends at midnight", datetime(2026, 3, 1, 14, 0), hours=2)
+    make_activity("Before the window", datetime(2026, 2, 28, 14, 0))
+
+    titles = calendar_titles(db, datetime(2026, 2, 28, 16, 0), datetime(2026, 3, 2, 16, 0))
+
+    assert titles == {
+        date(2026, 3, 1): ["Early morning", "Ends at midnight", "Across midnight"],
+        date(2026, 3, 2): ["Across midnight", "After midnight"],
+    }
+
+
+def test_calendar_clips_long_activities_to_the_window(db, make_activity):
+    make_activity("Retreat", datetime(2026, 2, 26, 2, 0), hours=24 * 7)
+
+    titles = calendar_titles(db, datetime(2026, 2, 28, 16, 0), datetime(2026, 3, 2, 16, 0))
+
+    assert titles == {date(2026, 3, 1): ["Retreat"], date(2026, 3, 2): ["Retreat"]}
+
+
+def test_nearby_crosses_geohash_cells_and_sorts_by_distance(db, make_activity):
+    # (0, 0) 是最高一级 geohash 网格的交点，四周的活动落在前缀完全不同的格子里
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+    for title, latitude, longitude in [
+        ("South-west", -0.001, -0.001),
+        ("North-west", 0.002, -0.002),
+        ("South-east", -0.003, 0.001),
+        ("Same cell", 0.001, 0.0015),
+        ("Edge of radius", 0.0095, 0.001),
+        ("Outside radius", 0.011, 0.001),
+        ("Far away", 0.5, 0.5),
+    ]:
+        make_activity(title, tomorrow, latitude=latitude, longitude=longitude)
+    make_activity("Already started", tomorrow - timedelta(days=2), latitude=0.001, longitude=0.001)
+    make_activity("Cancelled", tomorrow, latitude=0.001, longitude=0.001, status="cancelled")
+
+    results = crud_activity.get_nearby(
+        db, latitude=0.001, longitude=0.001, radius_km=1, fields=["title"]
+    )
+
+    assert [row["title"] for row in results] == [
+        "Same cell", "South-west", "North-west", "South-east", "Edge of radius"
+    ]
+    distances = [row["distance_km"] for row in results]
+    assert distances == sorted(distances)
+    assert distances[-1] <= 1
+
+
+def test_nearby_limit_keeps_the_nearest(db, make_activity):
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+    for index in range(5):
+        make_activity(f"Activity {index}", tomorrow, latitude=0.001 * (5 - index), longitude=0.0)
+
+    results = crud_activity.get_nearby(
+        db, latitude=0.0, longitude=0.0, radius_km=1, fields=["title"], limit=2
+    )
+
+    assert [row["title"] for row in results] == ["Activity 4", "Activity 3"]
+
+
+def test_bulk_written_activities_are_found_nearby(db):
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+    created = crud_activity.create_many(
+        db,
+        objs_in=[
+            {"title": title, "description": "", "category": "exercise", "start_time": tomorrow,
+             "end_time": tomorrow + timedelta(hours=1), "latitude": 31.2304, "longitude": longitude}
+            for title, longitude in (("Moved", 121.4737), ("Stays", 121.4740))
+        ],
+    )
+    crud_activity.update_many(
+        db, objs_in={created[0].id: {"latitude": 39.9042, "longitude": 116.4074}}
+    )
+
+    results = crud_activity.get_nearby(
+        db, latitude=31.2304, longitude=121.4737, radius_km=1, fields=["title"]
+    )
+
+    assert [row["title"] for row in results] == ["Stays"]
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.crud.activity_series import NotAnOccurrence, activity_series as crud_activity_series
+from app.models.activity import Activity
+from app.schemas.activity import ActivitySeriesCreate
+
+# 2026-03-02 是周一
+DTSTART = datetime(2026, 3, 2, 9, 0)
+
+
+@pytest.fixture
+def series(db, make_user):
+    organizer = make_user("organizer@example.com")
+    series_in = ActivitySeriesCreate(
+        title="Tai chi",
+        description="Weekly tai chi",
+        category="exercise",
+        dtstart=DTSTART,
+        duration_minutes=60,
+        rrule="FREQ=WEEKLY;BYDAY=MO,WE",
+        max_participants=10,
+        latitude=31.23,
+        longitude=121.47,
+    )
+    return crud_activity_series.create_with_organizer(
+        db, obj_in=series_in, organizer_id=organizer.id
+    )
+
+
+def activity_count(db) -> int:
+    return db.scalar(select(func.count()).select_from(Activity))
+
+
+def test_materialize_creates_the_occurrence(db, series):
+    occurrence_start = datetime(2026, 3, 4, 9, 0)
+
+    activity = crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start)
+
+    assert activity.series_id == series.id
+    assert activity.occurrence_start == occurrence_start
+    assert activity.start_time == occurrence_start
+    assert activity.end_time == occurrence_start + timedelta(hours=1)
+    assert activity.max_participants == 10
+    assert activity.geohash is not None
+
+
+def test_materialize_is_idempotent(db, series):
+    occurrence_start = datetime(2026, 3, 9, 9, 0)
+
+    first = crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start)
+    second = crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start)
+
+    assert first.id == second.id
+    assert activity_count(db) == 1
+
+
+@pytest.mark.parametrize("occurrence_start", [
+    datetime(2026, 3, 3, 9, 0),   # 周二
+    datetime(2026, 3, 4, 10, 0),  # 时间不对
+    datetime(2026, 2, 23, 9, 0),  # 早于 dtstart
+])
+def test_materialize_rejects_other_times(db, series, occurrence_start):
+    with pytest.raises(NotAnOccurrence):
+        crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start)
+    assert activity_count(db) == 0
+
+
+def test_materialize_cancelled_occurrence_returns_none(db, series):
+    occurrence_start = datetime(2026, 3, 4, 9, 0)
+    activity = crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start)
+    db.execute(
+        Activity.__table__.update()
+        .where(Activity.id == activity.id)
+        .values(deleted_at=datetime.utcnow())
+    )
+    db.commit()
+
+    assert crud_activity_series.materialize(db, series=series, occurrence_start=occurrence_start) is None
+    assert db.scalar(
+        select(func.count()).select_from(Activity).execution_options(include_deleted=True)
+    ) == 1
+
+
+def test_expand_skips_materialized_occurrences(db, series):
+    crud_activity_series.materialize(db, series=series, occurrence_start=datetime(2026, 3, 4, 9, 0))
+
+    expanded = crud_activity_series.expand(
+        db, start=DTSTART, end=DTSTART + timedelta(weeks=1), fields=["title"]
+    )
+
+    assert [item["occurrence_start"] for item in expanded] == [DTSTART]
+    assert expanded[0]["id"] is None
+    assert expanded[0]["series_id"] == series.id
+    assert expanded[0]["title"] == "Tai chi"
+
+
+def test_series_with_offset_materializes_its_dtstart(db, make_user):
+    # 本地时间（UTC+8）周二 07:00 即 UTC 周一 23:00
+    organizer = make_user("organizer@example.com")
+    dtstart = datetime(2026, 3, 2, 23, 0)
+    series_in = ActivitySeriesCreate(
+        title="Tai chi",
+        description="Weekly tai chi",
+        category="exercise",
+        dtstart=dtstart,
+        duration_minutes=60,
+        rrule="FREQ=WEEKLY;BYDAY=TU;COUNT=2",
+    )
+    series = crud_activity_series.create_with_organizer(
+        db, obj_in=series_in, organizer_id=organizer.id, utc_offset=timedelta(hours=8)
+    )
+
+    assert series.utc_offset_minutes == 480
+    assert series.until == dtstart + timedelta(weeks=1)
+    activity = crud_activity_series.materialize(db, series=series, occurrence_start=dtstart)
+    assert activity.occurrence_start == dtstart
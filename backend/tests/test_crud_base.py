@@ -0,0 +1,158 @@
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import pytest
+
+from app.crud.base import dump_create, dump_update
+from app.crud.guide import guide as crud_guide
+from app.crud.user import user as crud_user
+from app.models.guide import Guide
+from app.schemas.activity import ActivityUpdate
+from app.schemas.guide import GuideUpdate
+
+
+@pytest.fixture
+def make_guide(db: Session):
+    def make_guide(title: str, **values) -> Guide:
+        guide = Guide(title=title, description="", category="phone", **values)
+        db.add(guide)
+        db.commit()
+        return guide
+
+    return make_guide
+
+
+def test_soft_deleted_rows_are_hidden(db, make_guide):
+    kept, removed = make_guide("Kept"), make_guide("Removed")
+    removed_id = removed.id
+
+    assert crud_guide.remove(db, id=removed_id).deleted_at is not None
+
+    assert crud_guide.get(db, id=removed_id) is None
+    assert [guide.id for guide in crud_guide.get_multi(db)] == [kept.id]
+    items, next_cursor, _ = crud_guide.get_page(db)
+    assert [guide.id for guide in items] == [kept.id]
+    assert next_cursor is None
+
+
+def test_include_deleted_returns_soft_deleted_rows(db, make_guide):
+    kept, removed = make_guide("Kept"), make_guide("Removed")
+    crud_guide.remove(db, db_obj=removed)
+
+    ids = db.scalars(
+        select(Guide.id).order_by(Guide.id).execution_options(include_deleted=True)
+    ).all()
+
+    assert ids == [kept.id, removed.id]
+    # 已删除的行不会被再次删除
+    assert crud_guide.remove(db, id=removed.id) is None
+
+
+def test_hard_delete_runs_orm_cascades(db, make_user, make_guide):
+    # users 有一对多关系，删除时由 ORM 把 guides.author_id 置空，DELETE 语句会违反外键
+    assert crud_user.orm_delete and not crud_guide.orm_delete
+    author = make_user("author@example.com")
+    guide = make_guide("Owned", author_id=author.id)
+
+    removed = crud_user.remove(db, id=author.id)
+
+    assert removed.email == "author@example.com"
+    assert crud_user.get(db, id=author.id) is None
+    db.refresh(guide)
+    assert guide.author_id is None
+
+
+def test_remove_many_runs_orm_cascades(db, make_user, make_guide):
+    authors = [make_user(f"{name}@example.com") for name in "ab"]
+    guides = [make_guide(author.email, author_id=author.id) for author in authors]
+
+    assert crud_user.remove_many(db, ids=[author.id for author in authors] + [10_000]) == 2
+
+    for guide in guides:
+        db.refresh(guide)
+        assert guide.author_id is None
+
+
+def test_create_many_returns_rows_in_input_order_across_chunks(db, make_user):
+    author = make_user("author@example.com")
+    titles = ["E", "B", "D", "A", "C"]
+
+    guides = crud_guide.create_many(
+        db,
+        objs_in=[{"title": title, "description": "", "category": "phone", "bogus": 1}
+                 for title in titles],
+        extra_fields={"author_id": author.id},
+        chunk_size=2,
+    )
+
+    assert [guide.title for guide in guides] == titles
+    assert [guide.id for guide in guides] == sorted(guide.id for guide in guides)
+    assert {guide.author_id for guide in guides} == {author.id}
+    # RETURNING 带回了全部列，脱离会话后仍可读取
+    assert all(guide.created_at is not None for guide in guides)
+
+
+def test_update_many_writes_only_the_given_columns(db, make_guide):
+    guides = [make_guide(title, difficulty="advanced") for title in "ABC"]
+
+    crud_guide.update_many(
+        db,
+        objs_in={
+            guides[0].id: GuideUpdate(title="A2"),
+            guides[2].id: {"title": "C2", "difficulty": "beginner", "bogus": 1},
+        },
+        chunk_size=1,
+    )
+
+    rows = db.execute(select(Guide.title, Guide.difficulty).order_by(Guide.id)).all()
+    assert rows == [("A2", "advanced"), ("B", "advanced"), ("C2", "beginner")]
+
+
+def test_remove_many_soft_deletes_in_chunks(db, make_guide):
+    guides = [make_guide(title) for title in "ABCDE"]
+    crud_guide.remove(db, db_obj=guides[0])
+
+    assert crud_guide.remove_many(db, ids=[guide.id for guide in guides], chunk_size=2) == 4
+
+    assert crud_guide.get_multi(db) == []
+
+
+def test_bulk_statements_invalidate_cached_rows(db, session_factory, make_guide):
+    guide = make_guide("Before")
+    cached = crud_guide.get(db, id=guide.id)
+    assert crud_guide.cache.get(guide.id)["title"] == "Before"
+    assert crud_guide.get_multi(db) == [cached]
+
+    crud_guide.update_many(db, objs_in={guide.id: {"title": "After"}})
+
+    assert crud_guide.cache.get(guide.id) is None
+    with session_factory() as other:
+        assert crud_guide.get(other, id=guide.id).title == "After"
+        assert [row.title for row in crud_guide.get_multi(other)] == ["After"]
+
+    crud_guide.remove_many(db, ids=[guide.id])
+
+    with session_factory() as other:
+        assert crud_guide.get(other, id=guide.id) is None
+        assert crud_guide.get_multi(other) == []
+
+
+def test_dump_update_keeps_only_set_fields_and_native_types():
+    when = datetime(2026, 3, 2, 9, 30)
+    update = ActivityUpdate(title="Tai chi", start_time=when, max_participants=None)
+
+    assert dump_update(update) == {
+        "title": "Tai chi", "start_time": when, "max_participants": None
+    }
+    assert dump_update({"title": "x"}) == {"title": "x"}
+    assert dump_create({"title": "x"}) == {"title": "x"}
+
+
+def test_update_applies_only_set_columns(db, make_guide):
+    guide = make_guide("Before", difficulty="advanced")
+
+    crud_guide.update(db, db_obj=guide, obj_in=GuideUpdate(title="After"))
+    crud_guide.update(db, db_obj=guide, obj_in={"category": "video", "bogus": 1})
+
+    assert (guide.title, guide.difficulty, guide.category) == ("After", "advanced", "video")
@@ -0,0 +1,83 @@
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+import pytest
+
+from app.db import session as db_session
+from app.models.user import User
+
+
+@pytest.fixture
+def stats_app(engine, session_factory, monkeypatch):
+    monkeypatch.setattr(db_session, "SessionLocal", session_factory)
+    event.listen(engine, "checkout", db_session._on_checkout)
+    event.listen(engine, "checkin", db_session._on_checkin)
+    db_session.session_metrics.reset()
+
+    app = FastAPI()
+    recorded = []
+
+    @app.middleware("http")
+    async def db_session_metrics(request: Request, call_next):
+        stats = db_session.begin_request_stats()
+        try:
+            return await call_next(request)
+        finally:
+            db_session.end_request_stats(stats)
+            recorded.append(stats)
+
+    def current_user(db: Session = Depends(db_session.get_db)) -> Session:
+        return db
+
+    @app.post("/users")
+    def create_user(
+        db: Session = Depends(db_session.get_db), user_db: Session = Depends(current_user)
+    ):
+        assert db is user_db
+        user = User(email="a@example.com", full_name="A", hashed_password="x")
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        return {"id": user.id}
+
+    @app.get("/ping")
+    def ping():
+        return {}
+
+    yield TestClient(app), recorded
+    event.remove(engine, "checkout", db_session._on_checkout)
+    event.remove(engine, "checkin", db_session._on_checkin)
+
+
+def test_one_session_per_request(stats_app):
+    client, recorded = stats_app
+
+    assert client.post("/users").status_code == 200
+
+    stats, = recorded
+    assert stats.sessions == 1
+    # commit 后 refresh 再取出一次连接，但同一时间只持有一个
+    assert stats.checkouts == 2
+    assert stats.max_connections == 1
+    assert stats.connections == 0
+
+
+def test_request_without_database(stats_app):
+    client, recorded = stats_app
+
+    assert client.get("/ping").status_code == 200
+
+    assert recorded[0].sessions == 0
+    snapshot = db_session.session_metrics.snapshot()
+    assert snapshot["requests_without_checkout"] == 1
+
+
+def test_metrics_track_concurrent_connections(stats_app):
+    client, _ = stats_app
+    client.post("/users")
+
+    snapshot = db_session.session_metrics.snapshot()
+    assert snapshot["max_sessions_per_request"] == 1
+    assert snapshot["max_connections_per_request"] == 1
+    assert snapshot["checkouts_per_request"] == 2
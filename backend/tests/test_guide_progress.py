@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud.guide_progress import ProgressBuffer, guide_progress as crud_guide_progress
+from app.models.guide import Guide, GuideStep, GuideStepView
+
+VIEWED_AT = datetime(2026, 3, 2, 9, 0)
+
+
+@pytest.fixture
+def guide(db: Session) -> Guide:
+    guide = Guide(title="Video calls", description="", category="phone", is_published=True)
+    guide.steps = [
+        GuideStep(title=f"Step {order}", description="", content="", order=order)
+        for order in (1, 2, 3)
+    ]
+    db.add(guide)
+    db.commit()
+    return guide
+
+
+def view_counts(db: Session):
+    return dict(db.execute(select(GuideStepView.step_id, GuideStepView.view_count)).all())
+
+
+def test_views_of_the_same_step_are_coalesced(db, session_factory, guide, make_user):
+    user = make_user("a@example.com")
+    buffer = ProgressBuffer(max_pending=100)
+    first, second, _ = guide.steps
+    for minutes in (0, 5, 1):
+        buffer.record(
+            user_id=user.id, guide_id=guide.id, step_id=first.id,
+            viewed_at=VIEWED_AT + timedelta(minutes=minutes),
+        )
+    buffer.record(user_id=user.id, guide_id=guide.id, step_id=second.id, viewed_at=VIEWED_AT)
+
+    assert len(buffer) == 2
+    assert buffer.flush(session_factory) == 2
+    assert len(buffer) == 0
+    assert view_counts(db) == {first.id: 3, second.id: 1}
+    view = db.scalars(select(GuideStepView).where(GuideStepView.step_id == first.id)).one()
+    assert view.first_viewed_at == VIEWED_AT
+    assert view.last_viewed_at == VIEWED_AT + timedelta(minutes=5)
+
+
+def test_failing_views_are_isolated_and_dropped(db, session_factory, guide, make_user):
+    users = [make_user(f"{name}@example.com") for name in "abc"]
+    buffer = ProgressBuffer(max_pending=100)
+    step = guide.steps[0]
+    for user in users:
+        buffer.record(user_id=user.id, guide_id=guide.id, step_id=step.id)
+    # 不存在的用户违反外键约束，只丢弃这一条
+    buffer.record(user_id=10_000, guide_id=guide.id, step_id=step.id)
+
+    assert buffer.flush(session_factory) == 3
+    assert len(buffer) == 0
+    assert set(db.scalars(select(GuideStepView.user_id))) == {user.id for user in users}
+
+
+def test_progress_and_funnel(db, session_factory, guide, make_user):
+    reader, finisher = make_user("a@example.com"), make_user("b@example.com")
+    first, second, third = guide.steps
+    buffer = ProgressBuffer(max_pending=100)
+    buffer.record(user_id=reader.id, guide_id=guide.id, step_id=first.id, viewed_at=VIEWED_AT)
+    for minutes, step in enumerate(guide.steps):
+        buffer.record(
+            user_id=finisher.id, guide_id=guide.id, step_id=step.id,
+            viewed_at=VIEWED_AT + timedelta(minutes=minutes),
+        )
+    buffer.flush(session_factory)
+    # 第二个周期再看一次第一步，只增加次数
+    buffer.record(user_id=reader.id, guide_id=guide.id, step_id=first.id, viewed_at=VIEWED_AT)
+    buffer.flush(session_factory)
+
+    progress = crud_guide_progress.get_progress(db, user_id=reader.id, guide_id=guide.id)
+    assert progress["steps_viewed"] == 1
+    assert progress["viewed_step_ids"] == [first.id]
+    assert progress["completed_at"] is None
+
+    progress = crud_guide_progress.get_progress(db, user_id=finisher.id, guide_id=guide.id)
+    assert progress["steps_viewed"] == 3
+    assert progress["last_step_id"] == third.id
+    assert progress["completed_at"] is not None
+
+    assert crud_guide_progress.get_progress(db, user_id=10_000, guide_id=guide.id) == {
+        "guide_id": guide.id, "viewed_step_ids": []
+    }
+
+    funnel = crud_guide_progress.get_funnel(db, guide_id=guide.id)
+    assert (funnel["started"], funnel["completed"]) == (2, 1)
+    assert [(step["step_id"], step["viewers"], step["views"]) for step in funnel["steps"]] == [
+        (first.id, 2, 3), (second.id, 1, 1), (third.id, 1, 1)
+    ]
+
+
+def test_full_buffer_wakes_the_background_task(db, session_factory, guide, make_user):
+    user = make_user("a@example.com")
+    buffer = ProgressBuffer(max_pending=2)
+    first, second, _ = guide.steps
+
+    async def scenario():
+        task = asyncio.create_task(buffer.run(session_factory, interval=3600))
+        await asyncio.sleep(0)
+        assert not buffer.record(user_id=user.id, guide_id=guide.id, step_id=first.id)
+        assert buffer.record(user_id=user.id, guide_id=guide.id, step_id=second.id)
+        for _ in range(200):
+            if not len(buffer):
+                break
+            await asyncio.sleep(0.01)
+        # 远未到写入周期，缓冲区已被取走
+        assert not len(buffer)
+        # 取消时等待进行中的写入完成
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert view_counts(db) == {first.id: 1, second.id: 1}
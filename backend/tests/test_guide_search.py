@@ -0,0 +1,116 @@
+from sqlalchemy.orm import Session
+import pytest
+
+from app.crud.search import InvertedIndex, _refresh_guides, guide_search
+from app.models.guide import Guide, GuideStep
+from app.utils.text_search import to_document, tokenize
+
+
+@pytest.fixture(autouse=True)
+def fallback(monkeypatch) -> InvertedIndex:
+    # 进程内索引是全局的，每个测试从空索引开始
+    index = InvertedIndex()
+    monkeypatch.setattr(guide_search, "fallback", index)
+    return index
+
+
+@pytest.fixture
+def make_guide(db: Session):
+    def make_guide(title: str, description: str = "", *steps: str, **values) -> Guide:
+        guide = Guide(
+            title=title, description=description, category="phone", is_published=True, **values
+        )
+        guide.steps = [
+            GuideStep(title=f"Step {order}", description="", content=content, order=order)
+            for order, content in enumerate(steps, start=1)
+        ]
+        db.add(guide)
+        db.commit()
+        return guide
+
+    return make_guide
+
+
+def titles(db: Session, text: str, **kwargs):
+    return [guide.title for guide, _ in guide_search.search(db, text, **kwargs)]
+
+
+def test_tokenize_splits_words_and_chinese_bigrams():
+    assert tokenize("WeChat 视频通话 v2") == ["wechat", "视频", "频通", "通话", "v2"]
+    assert tokenize("视") == ["视"]
+    assert tokenize("  ,.!") == []
+    # 建索引时另外按单字切分，一个字的查询也能命中
+    assert to_document("视频") == "视频 视 频"
+
+
+def test_all_terms_must_match(db, make_guide):
+    make_guide("微信视频通话", "和家人视频")
+    make_guide("微信转账", "给家人转账")
+
+    assert titles(db, "微信") == ["微信视频通话", "微信转账"]
+    assert titles(db, "微信 视频") == ["微信视频通话"]
+    assert titles(db, "微信 打车") == []
+    assert titles(db, "视") == ["微信视频通话"]
+
+
+def test_title_matches_rank_above_step_matches(db, make_guide):
+    make_guide("Paying bills", "", "Scan the QR code to pay")
+    make_guide("QR code basics", "", "Point the camera")
+    make_guide("Sharing photos", "Send a QR code to family")
+
+    assert titles(db, "qr code") == ["QR code basics", "Sharing photos", "Paying bills"]
+    scores = [score for _, score in guide_search.search(db, "qr code")]
+    assert scores == sorted(scores, reverse=True)
+    assert titles(db, "qr code", limit=1, offset=1) == ["Sharing photos"]
+
+
+def test_committed_changes_update_the_index(db, make_guide):
+    guide = make_guide("Video calls", "", "Open the camera")
+    assert titles(db, "camera") == ["Video calls"]
+
+    guide.steps[0].content = "Tap the green button"
+    db.commit()
+    assert titles(db, "camera") == []
+    assert titles(db, "green button") == ["Video calls"]
+
+    db.add(GuideStep(guide_id=guide.id, title="Hang up", description="", content="", order=2))
+    db.commit()
+    assert titles(db, "hang") == ["Video calls"]
+
+    guide.is_published = False
+    db.commit()
+    assert titles(db, "green") == []
+    assert titles(db, "green", published_only=False) == ["Video calls"]
+
+    db.delete(guide)
+    db.commit()
+    assert titles(db, "green", published_only=False) == []
+
+
+def test_rolled_back_changes_are_not_indexed(db, make_guide):
+    guide = make_guide("Video calls")
+    assert titles(db, "video") == ["Video calls"]
+
+    guide.title = "Voice calls"
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert titles(db, "voice") == []
+    assert titles(db, "video") == ["Video calls"]
+
+
+def test_only_guide_changes_are_flushed_before_commit(db, make_user, make_guide):
+    guide = make_guide("Video calls")
+    user = make_user("a@example.com")
+
+    # 没有指南改动时不提前 flush，交给提交本身
+    user.full_name = "Renamed"
+    _refresh_guides(db)
+    assert list(db.dirty) == [user]
+
+    guide.title = "Voice calls"
+    _refresh_guides(db)
+    assert not db.dirty
+    db.commit()
+    assert titles(db, "voice") == ["Voice calls"]
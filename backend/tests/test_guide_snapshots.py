@@ -0,0 +1,109 @@
+import os
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+import orjson
+import pytest
+
+from app.api.responses import SnapshotFiles
+from app.crud import guide_snapshot
+from app.crud.guide_snapshot import RENDERED_KEY, guide_snapshots, snapshot_version
+from app.models.guide import Guide, GuideStep
+
+
+@pytest.fixture
+def guide(db: Session, make_user) -> Guide:
+    author = make_user("author@example.com")
+    guide = Guide(
+        title="Video calls", description="Calling family", category="phone",
+        author_id=author.id, is_published=True,
+    )
+    guide.steps = [GuideStep(title="Open the app", description="", content="", order=1)]
+    db.add(guide)
+    db.commit()
+    return guide
+
+
+def current_path(guide: Guide) -> str:
+    return os.path.join(guide_snapshots.guide_dir(guide.id), "current.json")
+
+
+def read_current(guide: Guide):
+    with open(current_path(guide), "rb") as file:
+        return orjson.loads(file.read())
+
+
+def test_render_before_commit_and_write_after_commit(db, guide):
+    assert read_current(guide)["title"] == "Video calls"
+
+    guide.title = "Video calls with family"
+    db.flush()
+    db.dispatch.before_commit(db)
+    # 提交前已在事务内渲染好，文件还是旧内容
+    assert orjson.loads(db.info[RENDERED_KEY][guide.id])["title"] == "Video calls with family"
+    assert read_current(guide)["title"] == "Video calls"
+
+    db.commit()
+    assert RENDERED_KEY not in db.info
+    assert read_current(guide)["title"] == "Video calls with family"
+    assert [step["title"] for step in read_current(guide)["steps"]] == ["Open the app"]
+
+
+def test_rolled_back_changes_are_not_written(db, guide):
+    guide.title = "Renamed"
+    db.flush()
+    db.rollback()
+    db.commit()
+
+    assert read_current(guide)["title"] == "Video calls"
+
+
+def test_unpublished_guide_is_removed(db, guide):
+    guide.is_published = False
+    db.commit()
+
+    assert not os.path.exists(guide_snapshots.guide_dir(guide.id))
+
+
+def test_current_version_comes_from_the_version_file(db, guide, monkeypatch):
+    with open(current_path(guide), "rb") as file:
+        version = snapshot_version(file.read())
+    assert guide_snapshots.current_version(guide.id) == version
+
+    def rehash(body: bytes) -> str:
+        raise AssertionError("current.json was hashed again")
+
+    monkeypatch.setattr(guide_snapshot, "snapshot_version", rehash)
+    assert guide_snapshots.current_version(guide.id) == version
+
+    # current.json 与版本文件对不上时重新计算
+    monkeypatch.setattr(guide_snapshot, "snapshot_version", snapshot_version)
+    with open(current_path(guide), "wb") as file:
+        file.write(b'{"title": "edited by hand"}')
+    assert guide_snapshots.current_version(guide.id) == snapshot_version(
+        b'{"title": "edited by hand"}'
+    )
+
+
+def test_snapshot_files_serve_the_current_version(guide, snapshot_dir):
+    app = FastAPI()
+    app.mount("/static/guides", SnapshotFiles(directory=snapshot_dir, max_age=60))
+    client = TestClient(app)
+    version = guide_snapshots.current_version(guide.id)
+
+    response = client.get(f"/static/guides/{guide.id}/current.json")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Video calls"
+    assert response.headers["etag"] == f'"{version}-gzip"'
+    assert response.headers["content-location"] == f"{version}.json"
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    response = client.get(
+        f"/static/guides/{guide.id}/current.json",
+        headers={"Accept-Encoding": "identity", "If-None-Match": f'"{version}"'},
+    )
+    assert response.status_code == 304
+
+    response = client.get(f"/static/guides/{guide.id}/{version}.json")
+    assert response.headers["cache-control"].endswith("immutable")
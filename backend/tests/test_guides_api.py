@@ -0,0 +1,100 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.api.responses import invalid_cursor_handler
+from app.api.v1.endpoints import guides
+from app.core.pagination import InvalidCursor, encode_cursor
+from app.models.app_user import AppUser
+from app.models.guide import Guide, GuideStep
+
+
+@pytest.fixture
+def guide(db: Session, make_user) -> Guide:
+    author = make_user("author@example.com")
+    guide = Guide(
+        title="Video calls", description="Calling family", category="phone", author_id=author.id
+    )
+    guide.steps = [
+        GuideStep(title=f"Step {order}", description="", content="", order=order)
+        for order in (1, 2)
+    ]
+    db.add(guide)
+    db.commit()
+    return guide
+
+
+@pytest.fixture
+def client_as(db: Session):
+    app = FastAPI()
+    app.include_router(guides.router, prefix="/guides")
+    app.add_exception_handler(InvalidCursor, invalid_cursor_handler)
+    app.dependency_overrides[deps.get_db] = lambda: db
+
+    def client_as(user) -> TestClient:
+        app.dependency_overrides[deps.get_current_active_user] = lambda: user
+        app.dependency_overrides[deps.get_current_account] = lambda: user
+        return TestClient(app)
+
+    return client_as
+
+
+def test_non_author_cannot_edit_steps(db, guide, make_user, client_as):
+    other = make_user("other@example.com")
+    first, second = [step.id for step in guide.steps]
+
+    response = client_as(other).patch(f"/guides/{guide.id}/steps", json={"order": [second, first]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough permissions"
+
+
+def test_author_can_edit_steps(db, guide, client_as):
+    first, second = [step.id for step in guide.steps]
+
+    response = client_as(guide.author).patch(
+        f"/guides/{guide.id}/steps", json={"order": [second, first]}
+    )
+
+    assert response.status_code == 200
+    assert [step["id"] for step in response.json()] == [second, first]
+    assert [step["order"] for step in response.json()] == [1, 2]
+
+
+def test_unpublished_guide_is_visible_to_its_author_only(db, guide, make_user, client_as):
+    other = make_user("other@example.com")
+
+    assert client_as(other).get(f"/guides/{guide.id}").status_code == 400
+    response = client_as(guide.author).get(f"/guides/{guide.id}")
+    assert response.status_code == 200
+    assert response.json()["creator_id"] == guide.author_id
+
+
+def test_app_user_is_never_the_author(db, guide, client_as):
+    # App 用户与作者 id 相同也不能看到未发布的指南
+    app_user = AppUser(id=guide.author_id, phone="13800000000")
+    db.add(app_user)
+    db.commit()
+
+    assert client_as(app_user).get(f"/guides/{guide.id}").status_code == 400
+    guide.is_published = True
+    db.commit()
+    assert client_as(app_user).get(f"/guides/{guide.id}").status_code == 200
+
+
+def test_tampered_cursor_is_rejected(db, guide, client_as):
+    guide.is_published = True
+    db.commit()
+    client = client_as(guide.author)
+    response = client.get("/guides/", params={"limit": 1})
+    assert response.json()["next_cursor"] is None
+
+    # 把签名接到另一页的游标上
+    signature = encode_cursor("id", [guide.id], 1).split(".")[1]
+    forged = encode_cursor("id", [0], 0).split(".")[0] + "." + signature
+
+    response = client.get("/guides/", params={"cursor": forged})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
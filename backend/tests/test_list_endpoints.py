@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+import orjson
+import pytest
+
+from app.api import deps
+from app.api.responses import page_response
+from app.api.v1.endpoints import activities
+from app.crud.activity import activity as crud_activity
+from app.models.activity import Activity
+from app.schemas.activity import ActivitySummary
+from app.schemas.page import Page
+
+START = datetime(2026, 3, 2, 9, 0)
+
+
+@pytest.fixture
+def make_activities(db: Session):
+    def make_activities(count: int):
+        rows = [
+            Activity(
+                title=f"Tai chi {i}",
+                description="x" * 200,
+                category="exercise",
+                start_time=START + timedelta(days=i),
+                end_time=START + timedelta(days=i, hours=1),
+            )
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return rows
+
+    return make_activities
+
+
+@pytest.fixture
+def client(db: Session, make_user) -> TestClient:
+    user = make_user("member@example.com")
+    app = FastAPI()
+    app.include_router(activities.router, prefix="/activities")
+    app.dependency_overrides[deps.get_db] = lambda: db
+    app.dependency_overrides[deps.get_current_account] = lambda: user
+    return TestClient(app)
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get("/activities/", params={"fields": "title,description,bogus"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown fields: bogus, description"}
+
+
+def test_fields_narrow_the_response(client, make_activities):
+    make_activities(2)
+
+    response = client.get("/activities/", params={"fields": "title, start_time"})
+
+    assert response.status_code == 200
+    assert response.json()["items"][0] == {
+        "id": 1, "title": "Tai chi 0", "start_time": START.isoformat()
+    }
+
+
+def test_projected_rows_validate_as_summaries(db, make_activities):
+    make_activities(3)
+
+    items, _, _ = crud_activity.get_page(db, fields=["title", "participant_count"])
+
+    assert all(isinstance(item, dict) for item in items)
+    summaries = [ActivitySummary.model_validate(item) for item in items]
+    assert [summary.title for summary in summaries] == ["Tai chi 0", "Tai chi 1", "Tai chi 2"]
+    assert summaries[0].model_dump(exclude_unset=True) == {
+        "id": 1, "title": "Tai chi 0", "participant_count": 0
+    }
+
+
+def test_page_response_matches_the_response_model(db, make_activities):
+    make_activities(3)
+    for fields in (None, ["title", "start_time"]):
+        items, next_cursor, _ = crud_activity.get_page(db, limit=2, fields=fields)
+
+        response = page_response(ActivitySummary, items, next_cursor, exclude_unset=True)
+
+        expected = Page[ActivitySummary].model_validate(
+            {"items": items, "next_cursor": next_cursor}, from_attributes=True
+        ).model_dump(mode="json", exclude_unset=True)
+        assert response.media_type == "application/json"
+        assert orjson.loads(response.body) == expected
+
+
+def test_total_is_omitted_unless_counted(client, make_activities):
+    make_activities(3)
+
+    page = client.get("/activities/", params={"limit": 2}).json()
+    assert "total" not in page
+    assert page["next_cursor"] is not None
+
+    page = client.get("/activities/", params={"limit": 2, "count": "exact"}).json()
+    assert page["total"] == 3
+    # 之后的页在窗口计数上加上已翻过的行数，总数不变
+    page = client.get(
+        "/activities/", params={"cursor": page["next_cursor"], "count": "exact"}
+    ).json()
+    assert page["total"] == 3
+    assert len(page["items"]) == 1
+
+    # SQLite 无法估算，退回精确计数
+    page = client.get("/activities/", params={"count": "estimated"}).json()
+    assert page["total"] == 3
@@ -0,0 +1,199 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, Date, Integer, Numeric, event, inspect, update
+from sqlalchemy.orm import DeclarativeBase, Session
+import orjson
+import pytest
+
+from app.crud.activity import activity as crud_activity
+from app.crud.cache import _column_decoders, _encode_default
+from app.crud.guide import guide as crud_guide
+from app.models.guide import Guide, GuideStep
+
+
+class FakeRedis:
+    """
+    同步 Redis 客户端中模型缓存用到的命令，值按 bytes 保存。
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[str, bytes] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.data.get(key)
+
+    def setex(self, key: str, seconds: int, value: Any) -> None:
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+
+@pytest.fixture
+def statements(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def guide(db: Session) -> Guide:
+    guide = Guide(title="Video calls", description="Calling family", category="phone")
+    guide.steps = [GuideStep(title="Open the app", description="", content="", order=1)]
+    db.add(guide)
+    db.commit()
+    return guide
+
+
+def test_second_get_is_served_from_the_cache(session_factory, guide, statements):
+    cache = crud_guide.cache
+    with session_factory() as db:
+        crud_guide.get(db, id=guide.id)
+    hits = cache.hits
+
+    statements.clear()
+    with session_factory() as db:
+        cached = crud_guide.get(db, id=guide.id)
+        assert cached.title == "Video calls"
+        assert cached.created_at == guide.created_at
+    assert statements == []
+    assert cache.hits == hits + 1
+
+
+def test_cached_rows_are_reattached_as_persistent_objects(session_factory, guide, statements):
+    with session_factory() as db:
+        crud_guide.get(db, id=guide.id)
+
+    with session_factory() as db:
+        cached = crud_guide.get(db, id=guide.id)
+        state = inspect(cached)
+        assert state.persistent and not state.modified
+        # 会话里已有同一主键的对象时直接返回它
+        assert crud_guide.get(db, id=guide.id) is cached
+
+        # 未缓存的关系按需加载，修改照常写回
+        statements.clear()
+        assert [step.title for step in cached.steps] == ["Open the app"]
+        assert len(statements) == 1
+        cached.title = "Video calls with family"
+        db.commit()
+
+    with session_factory() as db:
+        assert crud_guide.get(db, id=guide.id).title == "Video calls with family"
+
+
+def test_flushed_changes_invalidate_after_commit(db, session_factory, guide):
+    crud_guide.get(db, id=guide.id)
+    guide.title = "Renamed"
+    db.flush()
+    # 提交前其他会话仍读到缓存里已提交的内容
+    assert crud_guide.cache.get(guide.id)["title"] == "Video calls"
+
+    db.commit()
+
+    assert crud_guide.cache.get(guide.id) is None
+    with session_factory() as other:
+        assert crud_guide.get(other, id=guide.id).title == "Renamed"
+
+
+def test_rolled_back_changes_keep_the_cache(db, guide):
+    crud_guide.get(db, id=guide.id)
+    guide.title = "Renamed"
+    db.flush()
+    db.rollback()
+
+    assert crud_guide.cache.get(guide.id)["title"] == "Video calls"
+
+
+def test_bulk_update_without_ids_invalidates_the_model(db, session_factory, guide):
+    with session_factory() as other:
+        crud_guide.get(other, id=guide.id)
+        crud_guide.get_multi(other)
+
+    db.execute(update(Guide).values(category="video"))
+    db.commit()
+
+    assert crud_guide.cache.get(guide.id) is None
+    assert crud_guide.cache.get_list(0, 100) is None
+    with session_factory() as other:
+        assert crud_guide.get(other, id=guide.id).category == "video"
+
+
+def test_redis_tier_stores_json(monkeypatch, session_factory, guide):
+    cache = crud_guide.cache
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis", redis)
+    with session_factory() as db:
+        crud_guide.get(db, id=guide.id)
+
+    raw = redis.get(cache._entity_key(guide.id))
+    assert orjson.loads(raw)["title"] == "Video calls"
+
+    # 本地条目过期后从 Redis 读取，datetime 按列类型还原
+    cache.local.clear()
+    with session_factory() as db:
+        cached = crud_guide.get(db, id=guide.id)
+        assert isinstance(cached.created_at, datetime)
+        assert cached.created_at == guide.created_at
+
+
+def test_encode_round_trips_rows_and_lists():
+    cache = crud_activity.cache
+    row = {
+        "id": 1,
+        "title": "Tai chi",
+        "start_time": datetime(2026, 3, 2, 9, 30, 15, 250),
+        "latitude": 31.2304,
+        "deleted_at": None,
+    }
+
+    assert cache.decode(cache.encode(row)) == row
+    assert cache.decode(cache.encode([row, row])) == [row, row]
+    with pytest.raises(TypeError):
+        cache.encode({"other": object()})
+
+
+class PriceBase(DeclarativeBase):
+    pass
+
+
+class Price(PriceBase):
+    __tablename__ = "prices"
+
+    id = Column(Integer, primary_key=True)
+    amount = Column(Numeric(10, 2))
+    valid_from = Column(Date)
+
+
+def test_numeric_and_date_columns_are_restored():
+    decoders = _column_decoders(inspect(Price))
+    row = {"id": 1, "amount": Decimal("9.90"), "valid_from": date(2026, 3, 2)}
+
+    raw = orjson.dumps(row, default=_encode_default)
+    assert orjson.loads(raw) == {"id": 1, "amount": "9.90", "valid_from": "2026-03-02"}
+    decoded = orjson.loads(raw)
+    for column, decoder in decoders.items():
+        decoded[column] = decoder(decoded[column])
+    assert decoded == row
+
+
+def test_unreadable_redis_entry_is_a_miss(monkeypatch, db):
+    cache = crud_activity.cache
+    redis = FakeRedis()
+    monkeypatch.setattr(cache, "redis", redis)
+    redis.data[cache._entity_key(1)] = b"\x80\x04not json"
+
+    assert crud_activity.get(db, id=1) is None
@@ -0,0 +1,110 @@
+from datetime import datetime
+import base64
+import json
+
+from sqlalchemy.orm import Session
+import pytest
+
+from app.core import pagination
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.crud.guide import guide as crud_guide
+from app.models.guide import Guide
+
+
+def test_cursor_round_trip():
+    values = ["Walking", datetime(2026, 3, 2, 9, 30), 7]
+
+    cursor = encode_cursor("title,created_at,id", values, 40)
+
+    assert decode_cursor(cursor, "title,created_at,id") == (values, 40)
+
+
+def test_tampered_signature_is_rejected():
+    payload, signature = encode_cursor("id", [5], 10).split(".")
+    other_payload = encode_cursor("id", [500], 10).split(".")[0]
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(f"{other_payload}.{signature}", "id")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(payload, "id")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor", "id")
+
+
+def test_cursor_for_another_ordering_is_rejected():
+    with pytest.raises(InvalidCursor, match="ordering"):
+        decode_cursor(encode_cursor("id", [5]), "title,id")
+
+
+def test_cursor_without_position_is_rejected():
+    payload = json.dumps(["id", [5]]).encode()
+    signature = pagination._sign(payload)
+    cursor = (
+        base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+        + "."
+        + base64.urlsafe_b64encode(signature).rstrip(b"=").decode()
+    )
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "id")
+
+
+@pytest.fixture
+def guides(db: Session):
+    # 标题大量重复，翻页靠 (title, id) 区分
+    guides = [
+        Guide(title=title, description="", category="phone")
+        for title in ["B", "A", "B", "A", "B", "C", "A"]
+    ]
+    db.add_all(guides)
+    db.commit()
+    return guides
+
+
+def test_pages_follow_order_by_then_id_across_ties(db, guides):
+    expected = [
+        guide.id for guide in sorted(guides, key=lambda guide: (guide.title, guide.id))
+    ]
+
+    seen, cursor = [], None
+    for _ in range(len(guides)):
+        items, cursor, _ = crud_guide.get_page(db, cursor=cursor, limit=2, order_by=Guide.title)
+        seen.extend(guide.id for guide in items)
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_descending_pages_with_count(db, guides):
+    items, cursor, total = crud_guide.get_page(
+        db, limit=3, order_by=Guide.title, descending=True, count="exact"
+    )
+    assert total == len(guides)
+    assert [guide.title for guide in items] == ["C", "B", "B"]
+
+    items, cursor, total = crud_guide.get_page(
+        db, cursor=cursor, limit=3, order_by=Guide.title, descending=True, count="exact"
+    )
+    assert total == len(guides)
+    assert [guide.title for guide in items] == ["B", "A", "A"]
+
+    items, cursor, _ = crud_guide.get_page(
+        db, cursor=cursor, limit=3, order_by=Guide.title, descending=True
+    )
+    assert [guide.title for guide in items] == ["A"]
+    assert cursor is None
+
+
+def test_last_full_page_has_no_next_cursor(db, guides):
+    items, cursor, _ = crud_guide.get_page(db, limit=len(guides))
+
+    assert len(items) == len(guides)
+    assert cursor is None
+
+
+def test_cursor_from_another_ordering_fails_in_get_page(db, guides):
+    _, cursor, _ = crud_guide.get_page(db, limit=2)
+
+    with pytest.raises(InvalidCursor):
+        crud_guide.get_page(db, cursor=cursor, limit=2, order_by=Guide.title)
@@ -0,0 +1,120 @@
+import asyncio
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+import pytest
+
+from app.core import rate_limit as rate_limit_module
+from app.core.rate_limit import LimitRule, MemoryRateLimiter, TOKEN_BUCKET_SCRIPT, rate_limit
+from app.utils.sms import normalize_phone
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def hit(limiter, buckets):
+    return asyncio.run(limiter.hit(buckets))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit_module.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = MemoryRateLimiter()
+    monkeypatch.setattr(rate_limit_module, "limiter", limiter)
+    return limiter
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    limiter = MemoryRateLimiter()
+    rule = LimitRule("ip", 3, 60)
+    buckets = [("ratelimit:test:ip", rule)]
+
+    assert [hit(limiter, buckets).allowed for _ in range(4)] == [True, True, True, False]
+    result = hit(limiter, buckets)
+    assert result.retry_after == pytest.approx(20)
+
+    # 每 20 秒回填一个令牌
+    clock.now += 20
+    assert hit(limiter, buckets).allowed
+    assert not hit(limiter, buckets).allowed
+
+
+def test_rules_are_checked_together(clock):
+    limiter = MemoryRateLimiter()
+    cooldown = ("ratelimit:test:cooldown", LimitRule("phone", 1, 60))
+    hourly = ("ratelimit:test:hourly", LimitRule("phone", 2, 3600))
+
+    assert hit(limiter, [cooldown, hourly]).allowed
+    # 冷却中被拒绝时不扣减小时桶
+    assert not hit(limiter, [cooldown, hourly]).allowed
+    clock.now += 60
+    assert hit(limiter, [cooldown, hourly]).allowed
+    clock.now += 60
+    result = hit(limiter, [cooldown, hourly])
+    assert not result.allowed
+    assert result.retry_after > 60
+
+
+def test_redis_script_uses_server_time():
+    assert "redis.call('TIME')" in TOKEN_BUCKET_SCRIPT
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("13800138000", "13800138000"),
+    (" 138-0013-8000 ", "13800138000"),
+    ("+8613800138000", "13800138000"),
+    ("1380013800", None),
+    ("1380013800a", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_phone(value, expected):
+    assert normalize_phone(value) == expected
+
+
+@pytest.fixture
+def client(limiter, clock):
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def client_address(request, call_next):
+        # TestClient 不提供客户端地址
+        request.scope["client"] = ("203.0.113.7", 50000)
+        return await call_next(request)
+
+    limit = rate_limit("send", LimitRule("phone", 1, 60), LimitRule("ip", 3, 60))
+
+    @app.post("/send", dependencies=[Depends(limit)])
+    def send(phone: str):
+        return {}
+
+    return TestClient(app)
+
+
+def test_dependency_returns_429_with_retry_after(client):
+    assert client.post("/send", params={"phone": "13800138000"}).status_code == 200
+
+    response = client.post("/send", params={"phone": "138 0013 8000"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+
+def test_malformed_phone_does_not_get_its_own_bucket(client, limiter):
+    for index in range(3):
+        client.post("/send", params={"phone": f"bad-{index}"})
+
+    assert all(":phone:" not in key for key in limiter._buckets)
+    # 仍受 IP 规则限制
+    assert client.post("/send", params={"phone": "bad-3"}).status_code == 429
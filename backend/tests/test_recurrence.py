@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.utils.recurrence import (
+    MAX_OCCURRENCES, RecurrenceRule, last_occurrence, occurrences, parse_rrule
+)
+
+# 2026-03-02 是周一
+DTSTART = datetime(2026, 3, 2, 9, 0)
+
+
+def test_parse_rrule():
+    rule = parse_rrule("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=TU,TH;COUNT=10")
+
+    assert rule == RecurrenceRule("WEEKLY", 2, 10, None, ((0, 1), (0, 3)))
+
+
+def test_parse_rrule_monthly_ordinals_and_until():
+    rule = parse_rrule("freq=monthly;byday=1we,-1fr;until=20261231T235959Z")
+
+    assert rule.byday == ((1, 2), (-1, 4))
+    assert rule.until == datetime(2026, 12, 31, 23, 59, 59)
+    assert parse_rrule("FREQ=DAILY;UNTIL=20261231").until == datetime(2026, 12, 31)
+
+
+@pytest.mark.parametrize("value", [
+    "",
+    "FREQ=YEARLY",
+    "FREQ=DAILY;INTERVAL=0",
+    "FREQ=DAILY;COUNT=0",
+    f"FREQ=DAILY;COUNT={MAX_OCCURRENCES + 1}",
+    "FREQ=DAILY;COUNT=3;UNTIL=20261231",
+    "FREQ=DAILY;BYDAY=MO",
+    "FREQ=WEEKLY;BYDAY=1MO",
+    "FREQ=WEEKLY;BYDAY=XX",
+    "FREQ=MONTHLY;BYDAY=6MO",
+    "FREQ=WEEKLY;BYMONTH=3",
+    "FREQ=WEEKLY;INTERVAL",
+])
+def test_parse_rrule_rejects(value):
+    with pytest.raises(ValueError):
+        parse_rrule(value)
+
+
+def test_weekly_byday():
+    rule = parse_rrule("FREQ=WEEKLY;BYDAY=MO,WE")
+
+    assert occurrences(rule, DTSTART, DTSTART, DTSTART + timedelta(weeks=2)) == [
+        datetime(2026, 3, 2, 9), datetime(2026, 3, 4, 9),
+        datetime(2026, 3, 9, 9), datetime(2026, 3, 11, 9),
+    ]
+
+
+def test_weekly_byday_skips_days_before_dtstart():
+    # dtstart 是周三，同一周的周一不算
+    dtstart = datetime(2026, 3, 4, 9, 0)
+    rule = parse_rrule("FREQ=WEEKLY;BYDAY=MO,WE")
+
+    assert occurrences(rule, dtstart, DTSTART, DTSTART + timedelta(weeks=2)) == [
+        datetime(2026, 3, 4, 9), datetime(2026, 3, 9, 9), datetime(2026, 3, 11, 9),
+    ]
+
+
+def test_interval():
+    rule = parse_rrule("FREQ=WEEKLY;INTERVAL=2")
+
+    assert occurrences(rule, DTSTART, DTSTART, datetime(2026, 4, 1)) == [
+        datetime(2026, 3, 2, 9), datetime(2026, 3, 16, 9), datetime(2026, 3, 30, 9),
+    ]
+
+
+def test_count_counts_from_dtstart():
+    rule = parse_rrule("FREQ=DAILY;COUNT=5")
+
+    # 窗口从第三次开始，COUNT 仍从 dtstart 算起
+    window = occurrences(rule, DTSTART, datetime(2026, 3, 4), datetime(2026, 4, 1))
+    assert window == [datetime(2026, 3, day, 9) for day in (4, 5, 6)]
+    assert last_occurrence(rule, DTSTART) == datetime(2026, 3, 6, 9)
+
+
+def test_until_is_inclusive():
+    rule = parse_rrule("FREQ=DAILY;UNTIL=20260304T090000Z")
+
+    assert occurrences(rule, DTSTART, DTSTART, datetime(2026, 4, 1)) == [
+        datetime(2026, 3, day, 9) for day in (2, 3, 4)
+    ]
+    assert last_occurrence(rule, DTSTART) == datetime(2026, 3, 4, 9)
+
+
+def test_infinite_rule_has_no_last_occurrence():
+    assert last_occurrence(parse_rrule("FREQ=DAILY"), DTSTART) is None
+
+
+def test_window_far_from_dtstart():
+    rule = parse_rrule("FREQ=DAILY")
+    start = datetime(2030, 1, 1)
+
+    assert occurrences(rule, DTSTART, start, start + timedelta(days=2)) == [
+        datetime(2030, 1, 1, 9), datetime(2030, 1, 2, 9),
+    ]
+
+
+def test_monthly_skips_months_without_the_day():
+    dtstart = datetime(2026, 1, 31, 9, 0)
+    rule = parse_rrule("FREQ=MONTHLY;COUNT=4")
+
+    assert occurrences(rule, dtstart, dtstart, datetime(2027, 1, 1)) == [
+        datetime(2026, 1, 31, 9), datetime(2026, 3, 31, 9),
+        datetime(2026, 5, 31, 9), datetime(2026, 7, 31, 9),
+    ]
+
+
+def test_monthly_byday_ordinals():
+    rule = parse_rrule("FREQ=MONTHLY;BYDAY=1WE,-1FR")
+
+    assert occurrences(rule, DTSTART, DTSTART, datetime(2026, 5, 1)) == [
+        datetime(2026, 3, 4, 9), datetime(2026, 3, 27, 9),
+        datetime(2026, 4, 1, 9), datetime(2026, 4, 24, 9),
+    ]
+
+
+def test_monthly_fifth_weekday_only_in_months_that_have_one():
+    rule = parse_rrule("FREQ=MONTHLY;BYDAY=5MO")
+
+    # 2026 年 3 月和 6 月有第五个周一，4、5 月没有
+    assert occurrences(rule, DTSTART, DTSTART, datetime(2026, 7, 1)) == [
+        datetime(2026, 3, 30, 9), datetime(2026, 6, 29, 9),
+    ]
+
+
+def test_offset_expands_in_local_time():
+    # 本地时间（UTC+8）周二 07:00 即 UTC 周一 23:00
+    offset = timedelta(hours=8)
+    dtstart = datetime(2026, 3, 2, 23, 0)
+    rule = parse_rrule("FREQ=WEEKLY;BYDAY=TU,TH;COUNT=4")
+
+    expected = [
+        datetime(2026, 3, 2, 23), datetime(2026, 3, 4, 23),
+        datetime(2026, 3, 9, 23), datetime(2026, 3, 11, 23),
+    ]
+    assert occurrences(rule, dtstart, DTSTART, datetime(2026, 4, 1), offset) == expected
+    assert last_occurrence(rule, dtstart, offset) == expected[-1]
+
+
+def test_offset_applies_to_monthly_days():
+    # 本地时间（UTC-5）每月 1 日 20:00 即 UTC 次日 01:00
+    offset = timedelta(hours=-5)
+    dtstart = datetime(2026, 3, 2, 1, 0)
+    rule = parse_rrule("FREQ=MONTHLY;UNTIL=20260502T010000Z")
+
+    assert occurrences(rule, dtstart, dtstart, datetime(2026, 6, 1), offset) == [
+        datetime(2026, 3, 2, 1), datetime(2026, 4, 2, 1), datetime(2026, 5, 2, 1),
+    ]
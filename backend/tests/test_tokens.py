@@ -0,0 +1,113 @@
+import asyncio
+
+from fastapi import HTTPException
+import pytest
+
+from app.api import deps
+from app.core import security, tokens
+from app.core.redis import InMemoryRedis
+from app.models.app_user import AppUser
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    redis = InMemoryRedis()
+    monkeypatch.setattr(tokens, "redis_client", redis)
+    return redis
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def payload_of(token: str):
+    return security.decode_token(token)
+
+
+def test_refresh_rotates_within_the_same_family():
+    pair = security.create_token_pair(1)
+    refresh = payload_of(pair["refresh_token"])
+
+    family = run(tokens.consume_refresh_token(refresh))
+
+    assert family == refresh["fam"]
+    rotated = security.create_token_pair(refresh["sub"], family=family)
+    assert payload_of(rotated["access_token"])["fam"] == family
+    assert not run(tokens.is_revoked(payload_of(rotated["access_token"])))
+
+
+def test_reused_refresh_token_revokes_the_family():
+    pair = security.create_token_pair(1)
+    refresh = payload_of(pair["refresh_token"])
+    family = run(tokens.consume_refresh_token(refresh))
+    rotated = security.create_token_pair(refresh["sub"], family=family)
+
+    assert run(tokens.consume_refresh_token(refresh)) is None
+
+    # 同一会话里轮换前后签发的令牌全部失效，其他会话不受影响
+    assert run(tokens.is_revoked(payload_of(pair["access_token"])))
+    assert run(tokens.is_revoked(payload_of(rotated["access_token"])))
+    assert run(tokens.is_revoked(payload_of(rotated["refresh_token"])))
+    other = security.create_token_pair(1)
+    assert not run(tokens.is_revoked(payload_of(other["access_token"])))
+
+
+def test_revoke_family_rejects_the_access_token():
+    pair = security.create_token_pair(1)
+
+    run(tokens.revoke_family(payload_of(pair["access_token"])["fam"]))
+
+    with pytest.raises(HTTPException) as exc_info:
+        run(deps.get_token_payload(pair["access_token"]))
+    assert exc_info.value.status_code == 401
+
+
+def test_revoke_user_uses_whole_seconds(monkeypatch):
+    monkeypatch.setattr(tokens.time, "time", lambda: 1000.9)
+    run(tokens.revoke_user(7))
+
+    assert run(tokens.is_revoked({"sub": "7", "pt": security.USER_PRINCIPAL, "iat": 999}))
+    # 同一秒内重新登录签发的令牌不受影响
+    assert not run(tokens.is_revoked({"sub": "7", "pt": security.USER_PRINCIPAL, "iat": 1000}))
+    # 吊销按主体类型区分，App 用户 7 不受影响
+    assert not run(
+        tokens.is_revoked({"sub": "7", "pt": security.APP_USER_PRINCIPAL, "iat": 999})
+    )
+
+
+@pytest.fixture
+def app_user(db):
+    app_user = AppUser(phone="13800000000", nickname="Grandma")
+    db.add(app_user)
+    db.commit()
+    return app_user
+
+
+def test_app_user_token_resolves_to_the_app_user(db, app_user, make_user):
+    make_user("admin@example.com")
+    payload = {"sub": str(app_user.id), "pt": security.APP_USER_PRINCIPAL}
+
+    assert run(deps.get_current_app_user(db, payload)) is app_user
+    assert run(deps.get_current_account(db, payload)) is app_user
+    with pytest.raises(HTTPException) as exc_info:
+        run(deps.get_current_user(db, payload))
+    assert exc_info.value.status_code == 401
+
+
+def test_user_token_is_not_an_app_user(db, app_user, make_user):
+    user = make_user("admin@example.com")
+    payload = {"sub": str(user.id), "pt": security.USER_PRINCIPAL}
+
+    assert run(deps.get_current_account(db, payload)) is user
+    with pytest.raises(HTTPException) as exc_info:
+        run(deps.get_current_app_user(db, payload))
+    assert exc_info.value.status_code == 401
+
+
+def test_inactive_app_user_is_rejected(db, app_user):
+    app_user.is_active = False
+    db.commit()
+
+    with pytest.raises(HTTPException) as exc_info:
+        run(deps.get_current_app_user(db, {"sub": str(app_user.id), "pt": "app_user"}))
+    assert exc_info.value.status_code == 400